@@ -0,0 +1,390 @@
+"""
+卡牌战斗引擎基准测试
+微基准：抽牌、出牌、升级手牌、受到伤害、获取战斗状态、编码/解码战斗状态、绘制战斗界面（空闲帧和整帧重绘，dummy SDL视频驱动，无需显示器）
+宏基准：每秒完成的单场战斗数、每秒完成的三连战（依次挑战三种敌人，HP延续）数
+
+用法:
+    python benchmarks/run_benchmarks.py                       # 运行并输出结果
+    python benchmarks/run_benchmarks.py --save                # 记录为基线
+    python benchmarks/run_benchmarks.py --compare             # 与基线比较，变慢超过阈值时返回1
+    python benchmarks/run_benchmarks.py -k battle --quick     # 只运行名称包含battle的基准，缩短测量时间
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# 无显示器环境下使用dummy驱动，必须在导入pygame之前设置
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from cards import get_card
+from characters import Warrior
+from enemies import Enemy, GoblinWarrior, GoblinArcher, Slime
+from simulation.batch_runner import run_battle
+from simulation.policies import GreedyPolicy
+from state_codec import encode_battle, decode_battle
+
+try:
+    from ui import BattleUI
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+# 默认基线文件
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 基线文件格式版本
+BASELINE_FORMAT = 1
+
+# 默认回归阈值：比基线慢25%以上视为回归
+DEFAULT_THRESHOLD = 0.25
+
+# 三连战的敌人顺序，与游戏主程序一致
+GAUNTLET = (GoblinWarrior, GoblinArcher, Slime)
+
+
+def _started_battle(enemy=None, seed=0):
+    """创建已开始第一回合的战斗"""
+    battle = BattleSystem(Warrior(), enemy if enemy is not None else GoblinWarrior(), seed=seed)
+    battle.start_player_turn()
+    return battle
+
+
+def bench_draw_cards():
+    """弃掉手牌并抽5张"""
+    battle = _started_battle()
+    player = battle.player
+    rng = random.Random(0)
+
+    def run():
+        player.discard_all()
+        player.draw_cards(5, rng)
+    return run
+
+
+def bench_play_card():
+    """使用一张打击，然后把卡牌、能量和敌人HP还原"""
+    enemy = Enemy("木桩", 10 ** 9)
+    battle = _started_battle(enemy)
+    player = battle.player
+    player.hand = [get_card("strike")]
+
+    def run():
+        player.energy = player.max_energy
+        player.play_card(0, enemy)
+        player.hand.append(player.discard_pile.pop())
+    return run
+
+
+def bench_upgrade_hand():
+    """把手牌全部换成升级版再换回来（只替换共享定义的引用，不复制卡牌）"""
+    battle = _started_battle()
+    hand = battle.player.hand
+    base = hand[:]
+
+    def run():
+        hand[:] = [card.upgrade() for card in hand]
+        hand[:] = base
+    return run
+
+
+def bench_take_damage():
+    """敌人受到一次有护甲的伤害"""
+    enemy = Enemy("木桩", 10 ** 9)
+    _started_battle(enemy)
+
+    def run():
+        enemy.armor = 3
+        enemy.take_damage(6, "战士")
+    return run
+
+
+def bench_get_battle_status():
+    """状态未变化时获取战斗状态（命中缓存）"""
+    battle = _started_battle()
+    battle.get_battle_status()
+    return battle.get_battle_status
+
+
+def bench_get_battle_status_dirty():
+    """玩家状态变化后获取战斗状态（重建玩家部分）"""
+    battle = _started_battle()
+    player = battle.player
+
+    def run():
+        player.version += 1
+        battle.get_battle_status()
+    return run
+
+
+def bench_encode_state():
+    """编码第一回合的战斗状态（含随机数状态）"""
+    battle = _started_battle()
+    return lambda: encode_battle(battle)
+
+
+def bench_decode_state():
+    """解码第一回合的战斗状态（含随机数状态）"""
+    data = encode_battle(_started_battle())
+    return lambda: decode_battle(data)
+
+
+def bench_draw_battle():
+    """绘制一帧没有变化的战斗界面并推送到屏幕（玩家思考时的空闲帧）"""
+    ui = BattleUI()
+    ui.init()
+    battle = _started_battle()
+
+    def run():
+        ui.draw_battle(battle)
+        ui.flip()
+    return run
+
+
+def bench_draw_battle_full():
+    """重绘整个战斗界面并推送到屏幕"""
+    ui = BattleUI()
+    ui.init()
+    battle = _started_battle()
+
+    def run():
+        ui.invalidate()
+        ui.draw_battle(battle)
+        ui.flip()
+    return run
+
+
+def bench_battle():
+    """一场完整的战斗（贪心策略，敌人轮换）"""
+    policy = GreedyPolicy()
+    seeds = iter(range(10 ** 9))
+
+    def run():
+        seed = next(seeds)
+        run_battle(GAUNTLET[seed % len(GAUNTLET)], policy, seed=seed)
+    return run
+
+
+def run_gauntlet(policy, seed):
+    """
+    完成一次三连战：依次挑战GAUNTLET中的敌人，玩家HP在战斗之间延续
+
+    Returns:
+        bool: 是否全部获胜
+    """
+    player = Warrior()
+    rng = random.Random(seed)
+    for enemy_cls in GAUNTLET:
+        battle = BattleSystem(player, enemy_cls(), seed=rng.getrandbits(32), record_events=False)
+        battle.start_player_turn()
+        while not battle.is_battle_over():
+            card_index = policy.choose_action(battle)
+            if card_index is None or battle.play_card(card_index) is None:
+                battle.end_player_turn()
+                if battle.state == BattleState.ENEMY_TURN:
+                    battle.execute_enemy_action()
+        if battle.state != BattleState.VICTORY:
+            return False
+    return True
+
+
+def bench_gauntlet():
+    """一次完整的三连战"""
+    policy = GreedyPolicy()
+    seeds = iter(range(10 ** 9))
+    return lambda: run_gauntlet(policy, next(seeds))
+
+
+# 基准名称 -> (创建被测函数的工厂, 是否需要pygame)
+BENCHMARKS = {
+    "draw_cards": (bench_draw_cards, False),
+    "play_card": (bench_play_card, False),
+    "upgrade_hand": (bench_upgrade_hand, False),
+    "take_damage": (bench_take_damage, False),
+    "get_battle_status": (bench_get_battle_status, False),
+    "get_battle_status_dirty": (bench_get_battle_status_dirty, False),
+    "encode_state": (bench_encode_state, False),
+    "decode_state": (bench_decode_state, False),
+    "draw_battle": (bench_draw_battle, True),
+    "draw_battle_full": (bench_draw_battle_full, True),
+    "battle": (bench_battle, False),
+    "gauntlet": (bench_gauntlet, False),
+}
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """
+    测量单次调用的耗时
+
+    先按min_time确定每轮的调用次数，再重复repeat轮取最快的一轮，减少系统噪声的影响。
+    与timeit一样，测量期间关闭垃圾回收，避免前面的基准留下的对象影响后面的结果
+
+    Args:
+        func: 被测函数
+        min_time: 每轮的最短时间（秒）
+        repeat: 轮数
+
+    Returns:
+        float: 单次调用的耗时（秒）
+    """
+    timer = time.perf_counter
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(func, timer, min_time, repeat)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure(func, timer, min_time, repeat):
+    """measure的计时循环"""
+    number = 1
+    while True:
+        start = timer()
+        for _ in range(number):
+            func()
+        elapsed = timer() - start
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = timer()
+        for _ in range(number):
+            func()
+        best = min(best, (timer() - start) / number)
+    return best
+
+
+def run_benchmarks(names=None, min_time=0.2, repeat=5):
+    """
+    运行基准测试
+
+    Args:
+        names: 基准名称列表，默认全部
+        min_time: 每轮的最短时间（秒）
+        repeat: 轮数
+
+    Returns:
+        dict: 基准名称 -> 单次耗时（秒），缺少pygame时跳过界面基准
+    """
+    results = {}
+    for name in names if names is not None else BENCHMARKS:
+        factory, needs_pygame = BENCHMARKS[name]
+        if needs_pygame and not PYGAME_AVAILABLE:
+            continue
+        results[name] = measure(factory(), min_time, repeat)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基线比较
+
+    Args:
+        results: 基准名称 -> 单次耗时
+        baseline: 基准名称 -> 单次耗时
+        threshold: 回归阈值（比基线慢的比例）
+
+    Returns:
+        list: [(基准名称, 当前耗时, 基线耗时, 比值, 是否回归), ...]，基线中没有的基准的基线耗时和比值为None
+    """
+    rows = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, seconds, None, None, False))
+            continue
+        ratio = seconds / base
+        rows.append((name, seconds, base, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def load_baseline(path):
+    """读取基线文件，返回 基准名称 -> 单次耗时"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != BASELINE_FORMAT:
+        raise ValueError(f"不支持的基线格式: {data.get('format')}")
+    return {name: entry["seconds"] for name, entry in data["results"].items()}
+
+
+def save_baseline(path, results):
+    """把结果写入基线文件"""
+    data = {
+        "format": BASELINE_FORMAT,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {name: {"seconds": seconds, "per_second": 1 / seconds} for name, seconds in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def _format_time(seconds):
+    """格式化单次耗时"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:10.2f} µs"
+    return f"{seconds * 1e3:10.2f} ms"
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="卡牌战斗引擎基准测试")
+    parser.add_argument("-k", "--filter", default=None, help="只运行名称包含该字符串的基准")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="把结果记录为基线")
+    parser.add_argument("--compare", action="store_true", help="与基线比较，有回归时返回1")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值，0.25表示慢25%%")
+    parser.add_argument("--quick", action="store_true", help="缩短测量时间（结果噪声更大）")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+    if not PYGAME_AVAILABLE:
+        print("未安装pygame，跳过界面基准")
+    min_time, repeat = (0.05, 3) if args.quick else (0.2, 5)
+    results = run_benchmarks(names, min_time, repeat)
+
+    if args.compare:
+        rows = compare(results, load_baseline(args.baseline), args.threshold)
+        regressions = 0
+        missing = 0
+        print(f"{'基准':<26}{'当前':>14}{'基线':>14}{'比值':>8}")
+        for name, seconds, base, ratio, regressed in rows:
+            if base is None:
+                missing += 1
+                print(f"{name:<26}{_format_time(seconds)}{'无基线':>12}")
+                continue
+            flag = "  回归" if regressed else ""
+            regressions += regressed
+            print(f"{name:<26}{_format_time(seconds)}{_format_time(base)}{ratio:>8.2f}{flag}")
+        if missing:
+            print(f"{missing}项基准没有基线，无法检查回归，请用--save重新记录基线")
+        if regressions:
+            print(f"{regressions}项基准比基线慢{args.threshold:.0%}以上")
+            return 1
+        return 0
+
+    print(f"{'基准':<26}{'单次耗时':>14}{'每秒次数':>14}")
+    for name, seconds in results.items():
+        print(f"{name:<26}{_format_time(seconds)}{1 / seconds:>14,.0f}")
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"基线已写入 {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+战斗事件
+结构化的战斗事件流，日志文本只在界面显示时才格式化
+"""
+from collections import deque
+from enum import Enum
+from statuses import STATUSES
+
+# 战斗日志保留的事件数量
+LOG_SIZE = 10
+
+
+class EventType(Enum):
+    """战斗事件类型"""
+    BATTLE_START = "战斗开始"
+    TURN_START = "回合开始"
+    TURN_END = "回合结束"
+    CARDS_DRAWN = "抽牌"
+    CARD_PLAYED = "使用卡牌"
+    INTENT = "意图"
+    DAMAGE = "伤害"
+    ARMOR = "护甲"
+    STATUS_APPLIED = "施加状态"
+    DEFEATED = "被击败"
+    UNDO = "撤销"
+
+
+def _format_turn_start(event):
+    """格式化回合开始事件"""
+    if event.detail is None:
+        return f"{event.source}回合开始"
+    return f"=== 第{event.value}回合 === {event.source}回合开始，能量: {event.detail}"
+
+
+def _format_damage(event):
+    """格式化伤害事件"""
+    text = f"{event.source}对{event.target}造成{event.value}点伤害"
+    if event.detail < event.value:
+        text += f"（护甲抵挡{event.value - event.detail}点）"
+    return text
+
+
+# 事件类型 -> 日志文本格式化函数
+_FORMATTERS = {
+    EventType.BATTLE_START: lambda event: f"战斗开始！{event.source} VS {event.target}",
+    EventType.TURN_START: _format_turn_start,
+    EventType.TURN_END: lambda event: f"{event.source}结束回合",
+    EventType.CARDS_DRAWN: lambda event: f"抽了{event.value}张牌",
+    EventType.CARD_PLAYED: lambda event: f"{event.source}使用了{event.detail.name}",
+    EventType.INTENT: lambda event: f"{event.source}的意图: {event.detail.value} {event.value}",
+    EventType.DAMAGE: _format_damage,
+    EventType.ARMOR: lambda event: f"{event.target}获得了{event.value}点护甲",
+    EventType.STATUS_APPLIED: lambda event: (
+        f"{event.target}获得了{event.value}层{STATUSES.display_name(event.detail)}"
+    ),
+    EventType.DEFEATED: lambda event: f"{event.target}被击败！",
+    EventType.UNDO: lambda event: f"{event.source}撤销了{event.detail.name}",
+}
+
+
+class BattleEvent:
+    """
+    战斗事件
+
+    各类型事件的字段含义:
+        DAMAGE: source造成伤害的一方或状态名称，value伤害值，detail实际损失的HP
+        ARMOR: target获得护甲的一方，value护甲值
+        STATUS_APPLIED: target获得状态的一方，value层数，detail状态名称
+        CARD_PLAYED: source使用者，target目标，value能量消耗，detail卡牌对象
+        TURN_START: source回合方，value回合数，detail玩家能量（敌人回合为None）
+        INTENT: source敌人，value意图值，detail意图类型
+        UNDO: source撤销的一方，detail被撤销的卡牌对象
+    """
+
+    __slots__ = ("type", "source", "target", "value", "detail", "_text")
+
+    def __init__(self, event_type, source=None, target=None, value=0, detail=None):
+        """
+        初始化战斗事件
+
+        Args:
+            event_type: 事件类型
+            source: 事件发起方名称
+            target: 事件目标名称
+            value: 数值
+            detail: 附加信息
+        """
+        self.type = event_type
+        self.source = source
+        self.target = target
+        self.value = value
+        self.detail = detail
+        self._text = None
+
+    def format(self):
+        """格式化为日志文本，结果会被缓存"""
+        if self._text is None:
+            self._text = _FORMATTERS[self.type](self)
+        return self._text
+
+    def __str__(self):
+        return self.format()
+
+
+class EventBus:
+    """战斗事件总线，最近的事件保存在定长环形缓冲区中"""
+
+    def __init__(self, log_size=LOG_SIZE):
+        """
+        初始化事件总线
+
+        Args:
+            log_size: 保留的事件数量
+        """
+        self.log = deque(maxlen=log_size)
+        self._subscribers = {}  # 事件类型 -> 回调列表，None表示订阅全部事件
+
+    def subscribe(self, callback, event_types=None):
+        """
+        订阅事件
+
+        Args:
+            callback: 回调函数，参数为BattleEvent
+            event_types: 订阅的事件类型列表，默认全部
+        """
+        for event_type in (event_types or (None,)):
+            self._subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, callback):
+        """取消订阅"""
+        for callbacks in self._subscribers.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def emit(self, event):
+        """
+        发布事件
+
+        Args:
+            event: BattleEvent对象
+        """
+        self.log.append(event)
+        if self._subscribers:
+            for callback in self._subscribers.get(event.type, ()):
+                callback(event)
+            for callback in self._subscribers.get(None, ()):
+                callback(event)
@@ -0,0 +1,226 @@
+"""
+战斗阶段计时
+可选的性能统计：记录BattleSystem各阶段和每种卡牌的调用次数、累计耗时与耗时分位数（由对数直方图近似）。
+
+计时通过BattleSystem.enable_metrics()在实例上安装计时包装实现，未启用时不产生任何开销。
+阶段之间会互相调用（如结束玩家回合会开始敌人回合），每个阶段只统计自身耗时，不含其中被计时的子阶段。
+
+用法:
+    metrics = battle.enable_metrics()
+    ...
+    battle.get_metrics()["play_card"]["p99"]
+    metrics.dump("metrics.json")
+"""
+import json
+import math
+import time
+
+# 被计时的BattleSystem方法
+PHASES = (
+    "start_player_turn",
+    "play_card",
+    "end_player_turn",
+    "start_enemy_turn",
+    "execute_enemy_action",
+    "end_enemy_turn",
+)
+
+# 每种卡牌的统计项名称前缀
+CARD_PREFIX = "card:"
+
+# 输出的耗时分位数
+PERCENTILES = (50, 90, 99)
+
+# 耗时直方图每个2倍区间的桶数，分位数的相对误差不超过2**(1/32)-1（约2.2%）
+BUCKETS_PER_OCTAVE = 16
+
+# 直方图的下限（秒），更短的耗时都计入第0个桶
+MIN_SECONDS = 1e-9
+
+
+class PhaseStats:
+    """
+    单个阶段的统计
+
+    耗时不逐次保存，而是计入按对数划分的直方图：每个2倍区间分成BUCKETS_PER_OCTAVE个桶，
+    长时间运行或合并大量进程的结果时内存占用不会增长，分位数的相对误差不超过半个桶宽。
+    """
+
+    __slots__ = ("count", "total", "fastest", "slowest", "buckets")
+
+    def __init__(self):
+        """初始化统计"""
+        self.count = 0
+        self.total = 0.0
+        self.fastest = 0.0
+        self.slowest = 0.0
+        self.buckets = {}  # 桶序号 -> 调用次数
+
+    def add(self, seconds):
+        """记录一次调用，不超过MIN_SECONDS的耗时都计入第0个桶"""
+        if not self.count:
+            self.fastest = self.slowest = seconds
+        elif seconds < self.fastest:
+            self.fastest = seconds
+        elif seconds > self.slowest:
+            self.slowest = seconds
+        self.count += 1
+        self.total += seconds
+        index = int(math.log2(seconds / MIN_SECONDS) * BUCKETS_PER_OCTAVE) if seconds > MIN_SECONDS else 0
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        """合并另一份统计"""
+        if not other.count:
+            return
+        if not self.count or other.fastest < self.fastest:
+            self.fastest = other.fastest
+        if not self.count or other.slowest > self.slowest:
+            self.slowest = other.slowest
+        self.count += other.count
+        self.total += other.total
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def percentile(self, percentile):
+        """
+        耗时分位数（最近秩法），取所在桶的几何中点并限制在最快和最慢耗时之间
+
+        Args:
+            percentile: 分位（0-100）
+
+        Returns:
+            float: 耗时（秒），没有调用时为0
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-percentile * self.count // 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                break
+        value = MIN_SECONDS * 2 ** ((index + 0.5) / BUCKETS_PER_OCTAVE)
+        return min(max(value, self.fastest), self.slowest)
+
+    def to_dict(self):
+        """
+        转换为字典，耗时单位为秒
+
+        Returns:
+            dict: count、total、mean、max以及各分位数（p50等）
+        """
+        result = {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0}
+        for percentile in PERCENTILES:
+            result[f"p{percentile}"] = self.percentile(percentile)
+        result["max"] = self.slowest
+        return result
+
+
+class BattleMetrics:
+    """战斗阶段计时统计"""
+
+    def __init__(self):
+        """初始化统计"""
+        self.phases = {}  # 统计项名称 -> PhaseStats
+        self._children = []  # 正在计时的阶段中，子阶段的累计耗时
+
+    def record(self, name, seconds):
+        """
+        记录一次调用
+
+        Args:
+            name: 统计项名称
+            seconds: 耗时（秒）
+        """
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.add(seconds)
+
+    def wrap(self, name, func, per_card=False):
+        """
+        创建计时包装
+
+        Args:
+            name: 阶段名称
+            func: 被计时的函数
+            per_card: 是否按返回的卡牌额外统计（用于play_card）
+
+        Returns:
+            function: 计时包装
+        """
+        timer = time.perf_counter
+        children = self._children
+        record = self.record
+
+        def timed(*args):
+            children.append(0.0)
+            start = timer()
+            try:
+                result = func(*args)
+            finally:
+                elapsed = timer() - start
+                own = elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+                record(name, own)
+            if per_card and result is not None:
+                record(CARD_PREFIX + result.key, own)
+            return result
+        return timed
+
+    def merge(self, other):
+        """
+        合并另一份统计，用于汇总多个进程的结果
+
+        Args:
+            other: BattleMetrics对象
+        """
+        for name, stats in other.phases.items():
+            mine = self.phases.get(name)
+            if mine is None:
+                mine = self.phases[name] = PhaseStats()
+            mine.merge(stats)
+
+    def reset(self):
+        """清空统计"""
+        self.phases.clear()
+
+    def get_metrics(self):
+        """
+        获取统计结果
+
+        Returns:
+            dict: 统计项名称 -> {count, total, mean, p50, p90, p99, max}，阶段在前，卡牌在后
+        """
+        names = [name for name in PHASES if name in self.phases]
+        names += sorted(name for name in self.phases if name not in PHASES)
+        return {name: self.phases[name].to_dict() for name in names}
+
+    def dump(self, path):
+        """
+        把统计结果写入JSON文件
+
+        Args:
+            path: 输出路径
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_metrics(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def format_report(self):
+        """
+        格式化统计报告
+
+        Returns:
+            str: 报告文本，耗时单位为微秒
+        """
+        lines = [f"{'阶段':<24}{'次数':>10}{'累计(ms)':>12}{'平均':>9}{'p50':>9}{'p90':>9}{'p99':>9}"]
+        for name, stats in self.get_metrics().items():
+            lines.append(
+                f"{name:<24}{stats['count']:>10}{stats['total'] * 1e3:>12.2f}{stats['mean'] * 1e6:>9.2f}"
+                f"{stats['p50'] * 1e6:>9.2f}{stats['p90'] * 1e6:>9.2f}{stats['p99'] * 1e6:>9.2f}"
+            )
+        return "\n".join(lines)
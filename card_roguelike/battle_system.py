@@ -3,11 +3,17 @@
 """
 import sys
 import os
+import random
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from characters import Character
-from enemies import Enemy
+from enemies import Enemy, EnemyGroup
+from battle_events import BattleEvent, EventBus, EventType
+from battle_metrics import BattleMetrics, PHASES
 from enum import Enum
 
+# 回放中的结束回合操作，使用卡牌记为手牌索引+1
+ACTION_END_TURN = 0
+
 
 class BattleState(Enum):
     """战斗状态"""
@@ -17,48 +23,220 @@ class BattleState(Enum):
     DEFEAT = "失败"
 
 
+class BattleSnapshot:
+    """战斗状态快照，由BattleSystem.snapshot()创建"""
+    
+    __slots__ = ("version", "state", "turn_count", "rng_state", "history_len", "player", "enemies")
+    
+    def __init__(self, battle):
+        """
+        记录战斗状态
+        
+        Args:
+            battle: BattleSystem对象
+        """
+        self.version = battle.version
+        self.state = battle.state
+        self.turn_count = battle.turn_count
+        self.rng_state = battle.get_rng_state()
+        self.history_len = len(battle.action_history)
+        self.player = battle.player.snapshot()
+        self.enemies = tuple(enemy.snapshot() for enemy in battle.enemies)
+
+
 class BattleSystem:
     """战斗系统"""
     
-    def __init__(self, player: Character, enemy: Enemy):
+    def __init__(self, player: Character, enemies, seed=None, record_events=True):
         """
         初始化战斗系统
         
         Args:
             player: 玩家角色
-            enemy: 敌人
+            enemies: 敌人，或多个敌人组成的列表（遭遇战）
+            seed: 随机种子，为None时随机生成，用于复现战斗
+            record_events: 是否发布战斗事件，无界面模拟时关闭以省去全部事件开销
         """
+        if isinstance(enemies, Enemy):
+            enemies = [enemies]
         self.player = player
-        self.enemy = enemy
+        self.enemies = EnemyGroup(enemies)
         self.state = BattleState.PLAYER_TURN
         self.turn_count = 0
-        self.battle_log = []  # 战斗日志
+        self.version = 0  # 战斗状态版本号，战斗状态或回合数变化时递增
+        
+        # 战斗事件总线，最近的事件即战斗日志
+        self.events = EventBus() if record_events else None
+        self.player.events = self.events
+        for enemy in self.enemies:
+            enemy.events = self.events
+        
+        # 每场战斗独立的随机数流
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self._rng_state = None  # 缓存的随机数状态，抽牌后失效
+        
+        # 玩家操作记录，用于回放
+        self.action_history = []
+        self.player_start_hp = player.hp
+        self.player_start_status = dict(player.status_effects)
+        self.enemy_start_hp = [(enemy.hp, enemy.max_hp) for enemy in self.enemies]  # 地图会调整敌人HP
+        
+        # 缓存的战斗状态快照，只重建版本号变化的部分
+        self._status = {"log": self.battle_log}
+        self._status_versions = (-1, -1, -1)
+        
+        # 阶段计时统计，由enable_metrics()开启
+        self.metrics = None
         
         # 初始化牌组
-        self.player.reset_deck()
+        self.player.reset_deck(self.rng)
         
         # 记录战斗开始
-        self.add_log(f"战斗开始！{self.player.name} VS {self.enemy.name}")
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.BATTLE_START, self.player.name,
+                                         "、".join(enemy.name for enemy in self.enemies)))
+    
+    def clone(self, seed=None):
+        """
+        复制战斗用于搜索推演，副本不发布事件、不记录操作
+        
+        Args:
+            seed: 副本的随机种子，为None时沿用当前随机数状态
+        
+        Returns:
+            BattleSystem: 战斗副本
+        """
+        other = object.__new__(BattleSystem)
+        other.player = self.player.clone()
+        other.enemies = EnemyGroup([enemy.clone() for enemy in self.enemies])
+        other.state = self.state
+        other.turn_count = self.turn_count
+        other.version = self.version
+        other.events = None
+        other.seed = self.seed if seed is None else seed
+        other.rng = random.Random(seed)
+        if seed is None:
+            other.rng.setstate(self.rng.getstate())
+        other._rng_state = None
+        other.action_history = []
+        other.player_start_hp = self.player_start_hp
+        other.player_start_status = self.player_start_status
+        other.enemy_start_hp = self.enemy_start_hp
+        other._status = {"log": ()}
+        other._status_versions = (-1, -1, -1)
+        other.metrics = None
+        return other
+    
+    def enable_metrics(self, metrics=None):
+        """
+        开启阶段计时
+        
+        在实例上为各阶段方法安装计时包装，未开启时各阶段方法没有任何额外开销
+        
+        Args:
+            metrics: 统计对象，可在多场战斗之间共享，默认新建
+        
+        Returns:
+            BattleMetrics: 统计对象
+        """
+        if self.metrics is not None:
+            self.disable_metrics()
+        self.metrics = metrics if metrics is not None else BattleMetrics()
+        for phase in PHASES:
+            method = getattr(BattleSystem, phase).__get__(self)
+            setattr(self, phase, self.metrics.wrap(phase, method, per_card=phase == "play_card"))
+        return self.metrics
+    
+    def disable_metrics(self):
+        """关闭阶段计时，已有的统计保留在返回的统计对象中"""
+        metrics = self.metrics
+        if metrics is not None:
+            for phase in PHASES:
+                del self.__dict__[phase]
+            self.metrics = None
+        return metrics
+    
+    def get_metrics(self):
+        """
+        获取阶段计时统计
+        
+        Returns:
+            dict: 阶段或卡牌（card:卡牌键）-> {count, total, mean, p50, p90, p99, max}，未开启时为空
+        """
+        if self.metrics is None:
+            return {}
+        return self.metrics.get_metrics()
+    
+    def snapshot(self):
+        """
+        获取战斗状态快照，用于撤销和推演分支
+        
+        牌堆和状态效果不复制，与当前战斗共享，之后被修改时才复制（写时复制），
+        战斗日志不在快照范围内。
+        
+        Returns:
+            BattleSnapshot: 战斗状态快照
+        """
+        return BattleSnapshot(self)
+    
+    def restore(self, snapshot):
+        """
+        恢复战斗状态快照，只恢复快照之后变化过的部分
+        
+        Args:
+            snapshot: snapshot()返回的快照，可以多次恢复
+        """
+        if snapshot.version != self.version:
+            self.state = snapshot.state
+            self.turn_count = snapshot.turn_count
+            # 随机数只在回合开始抽牌时使用，此时版本号一定已经变化
+            self.rng.setstate(snapshot.rng_state)
+            self._rng_state = snapshot.rng_state
+            self.version += 1
+        self.player.restore(snapshot.player)
+        for enemy, enemy_snapshot in zip(self.enemies, snapshot.enemies):
+            enemy.restore(enemy_snapshot)
+        del self.action_history[snapshot.history_len:]
+    
+    def get_rng_state(self):
+        """
+        获取随机数状态，两次抽牌之间重复获取时复用同一份
+        
+        Returns:
+            tuple: random.Random.getstate()的结果
+        """
+        if self._rng_state is None:
+            self._rng_state = self.rng.getstate()
+        return self._rng_state
+    
+    @property
+    def enemy(self):
+        """单体攻击的目标：最前面的存活敌人"""
+        return self.enemies.target()
     
-    def add_log(self, message):
-        """添加战斗日志"""
-        self.battle_log.append(message)
-        if len(self.battle_log) > 10:  # 只保留最近10条
-            self.battle_log.pop(0)
+    @property
+    def battle_log(self):
+        """战斗日志，最近的战斗事件"""
+        return self.events.log if self.events is not None else ()
     
     def start_player_turn(self):
         """开始玩家回合"""
         self.state = BattleState.PLAYER_TURN
         self.turn_count += 1
-        self.add_log(f"\n=== 第{self.turn_count}回合 ===")
+        self.version += 1
         
         # 玩家回合开始
         self.player.start_turn()
-        self.add_log(f"{self.player.name}回合开始，能量: {self.player.energy}")
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.TURN_START, self.player.name, value=self.turn_count,
+                                         detail=self.player.energy))
         
         # 抽牌（默认5张）
-        self.player.draw_cards(5)
-        self.add_log(f"抽了{len(self.player.hand)}张牌")
+        self._rng_state = None
+        self.player.draw_cards(5, self.rng)
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.CARDS_DRAWN, self.player.name, value=len(self.player.hand)))
     
     def play_card(self, card_index):
         """
@@ -66,27 +244,31 @@ class BattleSystem:
         
         Args:
             card_index: 卡牌索引
+        
+        Returns:
+            Card: 使用的卡牌，无法使用时返回None
         """
         if self.state != BattleState.PLAYER_TURN:
             return None
         
-        result = self.player.play_card(card_index, self.enemy)
-        if result:
-            self.add_log(result)
+        card = self.player.play_card(card_index, self.enemy)
+        if card:
+            self.action_history.append(card_index + 1)
             
-            # 检查敌人是否死亡
-            if not self.enemy.is_alive():
-                self.state = BattleState.VICTORY
-                self.add_log(f"{self.enemy.name}被击败！")
+            # 检查敌人是否全部死亡
+            if self.enemies.all_dead():
+                self._defeated(BattleState.VICTORY)
         
-        return result
+        return card
     
     def end_player_turn(self):
         """结束玩家回合"""
         if self.state != BattleState.PLAYER_TURN:
             return
         
-        self.add_log(f"{self.player.name}结束回合")
+        self.action_history.append(ACTION_END_TURN)
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.TURN_END, self.player.name))
         
         # 弃掉所有手牌
         self.player.discard_all()
@@ -96,8 +278,7 @@ class BattleSystem:
         
         # 检查玩家是否死亡
         if not self.player.is_alive():
-            self.state = BattleState.DEFEAT
-            self.add_log(f"{self.player.name}战败了...")
+            self._defeated(BattleState.DEFEAT, self.player)
             return
         
         # 开始敌人回合
@@ -106,29 +287,38 @@ class BattleSystem:
     def start_enemy_turn(self):
         """开始敌人回合"""
         self.state = BattleState.ENEMY_TURN
-        self.add_log(f"{self.enemy.name}回合开始")
-        
-        # 敌人计划下一个行动
-        self.enemy.plan_next_action()
+        self.version += 1
+        if self.events is not None:
+            name = self.enemy.name if len(self.enemies) == 1 else "敌人"
+            self.events.emit(BattleEvent(EventType.TURN_START, name, value=self.turn_count))
         
-        # 显示敌人意图
-        intent_text = self.get_enemy_intent_text()
-        self.add_log(intent_text)
+        for enemy in self.enemies:
+            if enemy.hp <= 0:
+                continue
+            
+            # 敌人计划下一个行动
+            enemy.plan_next_action(self.player)
+            
+            # 显示敌人意图
+            if self.events is not None and enemy.intent:
+                self.events.emit(BattleEvent(EventType.INTENT, enemy.name, value=enemy.intent_value,
+                                             detail=enemy.intent))
     
     def execute_enemy_action(self):
         """执行敌人行动"""
         if self.state != BattleState.ENEMY_TURN:
             return
         
-        # 执行敌人行动
-        result = self.enemy.execute_action(self.player)
-        self.add_log(result)
-        
-        # 检查玩家是否死亡
-        if not self.player.is_alive():
-            self.state = BattleState.DEFEAT
-            self.add_log(f"{self.player.name}战败了...")
-            return
+        # 存活的敌人依次执行行动
+        for enemy in self.enemies:
+            if enemy.hp <= 0:
+                continue
+            enemy.execute_action(self.player)
+            
+            # 检查玩家是否死亡
+            if not self.player.is_alive():
+                self._defeated(BattleState.DEFEAT, self.player)
+                return
         
         # 敌人回合结束
         self.end_enemy_turn()
@@ -136,21 +326,34 @@ class BattleSystem:
     def end_enemy_turn(self):
         """结束敌人回合"""
         # 处理敌人状态效果
-        status_result = self.enemy.end_turn()
-        if status_result:
-            self.add_log(status_result)
-        
-        # 检查敌人是否死亡
-        if not self.enemy.is_alive():
-            self.state = BattleState.VICTORY
-            self.add_log(f"{self.enemy.name}被击败！")
+        alive = self.enemies.alive()
+        for enemy in alive:
+            enemy.end_turn()
+        
+        # 检查敌人是否全部死亡
+        if self.enemies.all_dead():
+            self._defeated(BattleState.VICTORY)
             return
         
-        self.enemy.clear_armor()
+        for enemy in alive:
+            enemy.clear_armor()
         
         # 开始玩家回合
         self.start_player_turn()
     
+    def _defeated(self, state, loser=None):
+        """
+        战斗结束
+        
+        Args:
+            state: 战斗结果状态
+            loser: 被击败的玩家；敌人的击败事件在受到致命伤害时已各自发布
+        """
+        self.state = state
+        self.version += 1
+        if loser is not None and self.events is not None:
+            self.events.emit(BattleEvent(EventType.DEFEATED, target=loser.name))
+    
     def get_enemy_intent_text(self):
         """获取敌人意图文本"""
         if self.enemy.intent:
@@ -169,22 +372,56 @@ class BattleSystem:
             return self.enemy
         return None
     
+    def get_version(self):
+        """
+        获取整体状态版本号，战斗、玩家或敌人的状态变化后都会增大
+        
+        Returns:
+            int: 版本号
+        """
+        return self.version + self.player.version + self.enemies.version
+    
+    def has_changed_since(self, version):
+        """
+        检查状态在指定版本号之后是否变化
+        
+        Args:
+            version: 之前通过get_version获取的版本号
+        """
+        return self.get_version() != version
+    
     def get_battle_status(self):
-        """获取战斗状态信息"""
-        return {
-            "state": self.state.value,
-            "turn": self.turn_count,
-            "player_hp": self.player.hp,
-            "player_max_hp": self.player.max_hp,
-            "player_energy": self.player.energy,
-            "player_max_energy": self.player.max_energy,
-            "player_armor": self.player.armor,
-            "enemy_hp": self.enemy.hp,
-            "enemy_max_hp": self.enemy.max_hp,
-            "enemy_armor": self.enemy.armor,
-            "enemy_intent": self.get_enemy_intent_text(),
-            "hand_size": len(self.player.hand),
-            "deck_size": len(self.player.deck),
-            "discard_size": len(self.player.discard_pile),
-            "log": self.battle_log
-        }
+        """
+        获取战斗状态信息
+        
+        返回的字典会被缓存复用，只重新计算版本号变化的部分，调用方不要修改它。
+        """
+        status = self._status
+        player = self.player
+        enemies_version = self.enemies.version
+        battle_version, player_version, enemy_version = self._status_versions
+        
+        if battle_version != self.version:
+            status["state"] = self.state.value
+            status["turn"] = self.turn_count
+        
+        if player_version != player.version:
+            status["player_hp"] = player.hp
+            status["player_max_hp"] = player.max_hp
+            status["player_energy"] = player.energy
+            status["player_max_energy"] = player.max_energy
+            status["player_armor"] = player.armor
+            status["hand_size"] = len(player.hand)
+            status["deck_size"] = len(player.deck)
+            status["discard_size"] = len(player.discard_pile)
+        
+        if enemy_version != enemies_version:
+            enemy = self.enemy
+            status["enemy_hp"] = enemy.hp
+            status["enemy_max_hp"] = enemy.max_hp
+            status["enemy_armor"] = enemy.armor
+            status["enemy_intent"] = self.get_enemy_intent_text()
+            status["enemy_count"] = len(self.enemies.alive())
+        
+        self._status_versions = (self.version, player.version, enemies_version)
+        return status
@@ -2,13 +2,68 @@
 卡牌模块
 """
 from .card_base import Card, CardType
-from .attack_cards import Strike, HeavyAttack, Whirlwind
-from .skill_cards import Defend, IronWave
-from .ability_cards import Burning, DemonForm
+from .catalog import CardCatalog, DEFAULT_CATALOG_PATH, RARITY_WEIGHTS, parse_catalog
+
+# 全局卡牌目录
+CATALOG = CardCatalog.load()
+
+# 卡牌ID -> 共享的卡牌定义，卡牌ID = 卡牌在目录中的位置 * 2 + 是否升级，牌组以卡牌ID数组保存
+CARD_DEFINITIONS = CATALOG.definitions
+
+
+def get_card(key, upgraded=False):
+    """
+    从全局卡牌目录获取卡牌定义
+
+    Args:
+        key: 卡牌键
+        upgraded: 是否升级
+    """
+    return CATALOG.get(key, upgraded)
+
+
+def card_id(card):
+    """
+    获取卡牌ID
+
+    Args:
+        card: 卡牌对象
+    """
+    return card.card_id
+
+
+def card_effects(card):
+    """
+    获取卡牌效果，供不执行play()的模拟与搜索使用，只统计燃烧和恶魔形态两种状态
+
+    Args:
+        card: 卡牌对象
+
+    Returns:
+        tuple: (伤害, 护甲, 燃烧, 恶魔形态)
+    """
+    burning = demon_form = 0
+    for name, stacks in card.enemy_status:
+        if name == "burning":
+            burning += stacks
+    for name, stacks in card.self_status:
+        if name == "demon_form":
+            demon_form += stacks
+    return card.damage, card.armor, burning, demon_form
+
+
+def card_from_id(card_id):
+    """
+    根据卡牌ID获取共享的卡牌定义
+
+    Args:
+        card_id: 卡牌ID
+    """
+    return CARD_DEFINITIONS[card_id]
+
 
 __all__ = [
     'Card', 'CardType',
-    'Strike', 'HeavyAttack', 'Whirlwind',
-    'Defend', 'IronWave',
-    'Burning', 'DemonForm'
+    'CardCatalog', 'CATALOG', 'DEFAULT_CATALOG_PATH', 'RARITY_WEIGHTS', 'parse_catalog',
+    'CARD_DEFINITIONS', 'get_card', 'card_id', 'card_from_id', 'card_effects'
 ]
@@ -13,50 +13,104 @@ class CardType(Enum):
 
 
 class Card:
-    """卡牌基类"""
-    
-    def __init__(self, name, card_type, cost, description, upgraded=False):
+    """
+    卡牌
+
+    卡牌由卡牌目录（cards/catalog.json）中的数据定义，效果按字段统一结算。
+    卡牌对象创建后不再修改，同一卡牌ID的卡牌共享同一个对象（享元），牌组中只保存卡牌ID。
+    卡牌目录设置好变体后调用freeze()，之后修改任何属性都会抛出AttributeError，
+    避免改动一张卡牌时影响所有共享这个定义的卡牌。
+    """
+
+    __slots__ = ("name", "card_type", "cost", "description", "upgraded", "base_cost",
+                 "key", "card_id", "rarity", "damage", "armor", "target_all",
+                 "enemy_status", "self_status", "variants", "_frozen")
+
+    def __init__(self, name, card_type, cost, description, upgraded=False, key="", card_id=0,
+                 rarity="common", damage=0, armor=0, target_all=False, enemy_status=(), self_status=()):
         """
         初始化卡牌
-        
+
         Args:
             name: 卡牌名称
             card_type: 卡牌类型
             cost: 能量消耗
             description: 卡牌描述
             upgraded: 是否升级
+            key: 卡牌在目录中的键
+            card_id: 卡牌ID
+            rarity: 稀有度
+            damage: 伤害
+            armor: 护甲
+            target_all: 伤害是否作用于所有敌人
+            enemy_status: 施加给敌人的状态 ((状态名, 层数), ...)
+            self_status: 施加给自己的状态 ((状态名, 层数), ...)
         """
+        object.__setattr__(self, "_frozen", False)
         self.name = name
         self.card_type = card_type
         self.cost = cost
         self.description = description
         self.upgraded = upgraded
         self.base_cost = cost  # 记录基础消耗
-    
+        self.key = key
+        self.card_id = card_id
+        self.rarity = rarity
+        self.damage = damage
+        self.armor = armor
+        self.target_all = target_all
+        self.enemy_status = enemy_status
+        self.self_status = self_status
+        self.variants = (self, self)  # (基础版, 升级版)，由卡牌目录设置
+
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError(f"卡牌定义是共享的，不能修改: {self.name}.{name}")
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __setstate__(self, state):
+        # 反序列化时绕过冻结检查恢复各个槽
+        for name, value in state[1].items():
+            object.__setattr__(self, name, value)
+
+    def freeze(self):
+        """冻结卡牌定义，之后不能再修改属性"""
+        object.__setattr__(self, "_frozen", True)
+
     def play(self, player, enemy):
         """
         使用卡牌
-        
+
         Args:
             player: 玩家对象
             enemy: 敌人对象
         """
-        raise NotImplementedError("子类必须实现play方法")
-    
+        if self.damage:
+            if self.target_all and enemy.group is not None:
+                enemy.group.take_damage_all(self.damage, player.name)
+            else:
+                enemy.take_damage(self.damage, player.name)
+        if self.armor:
+            player.add_armor(self.armor)
+        for name, stacks in self.enemy_status:
+            enemy.add_status(name, stacks)
+        for name, stacks in self.self_status:
+            player.add_status(name, stacks)
+
     def upgrade(self):
-        """升级卡牌"""
-        self.upgraded = True
-        self._apply_upgrade()
-    
-    def _apply_upgrade(self):
-        """应用升级效果"""
-        pass
-    
+        """获取升级后的卡牌定义"""
+        return self.variants[1]
+
     def clone(self):
-        """克隆卡牌"""
-        new_card = self.__class__(upgraded=self.upgraded)
-        return new_card
-    
+        """克隆卡牌，卡牌不可变，直接返回共享定义"""
+        return self
+
     def __str__(self):
         upgraded_text = " (升级)" if self.upgraded else ""
         return f"{self.name}{upgraded_text} [{self.card_type.value}] {self.cost}能量"
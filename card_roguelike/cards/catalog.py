@@ -0,0 +1,261 @@
+"""
+卡牌目录
+从声明式的卡牌表（JSON）加载卡牌，预先生成基础版和升级版的卡牌定义。
+
+卡牌表中每张卡牌的格式:
+
+    {
+        "key": "strike", "name": "打击", "type": "ATTACK", "rarity": "basic", "cost": 1,
+        "description": "造成{damage}点伤害",
+        "effects": {"damage": 6},
+        "upgrade": {"damage": 9}
+    }
+
+effects可包含 damage、armor、target（"single"或"all"）、enemy_status、self_status，
+upgrade中的字段覆盖effects（以及cost），description中可引用效果字段、状态名和cost。
+卡牌ID = 卡牌在表中的位置 * 2 + 是否升级，回放和牌组都保存卡牌ID，新卡牌只能追加在表末尾。
+
+解析和校验后的结果按源文件的修改时间和大小缓存在同目录的__pycache__中，
+源文件未变化时直接读取缓存。
+"""
+import json
+import os
+import pickle
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from statuses import STATUSES
+from .card_base import Card, CardType
+
+# 默认卡牌表
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+
+# 缓存格式版本，修改解析结果的结构时递增
+CACHE_FORMAT = 1
+
+# 稀有度 -> 商店中出现的权重，基础卡牌不会在商店出售
+RARITY_WEIGHTS = {"basic": 0, "common": 6, "uncommon": 3, "rare": 1}
+
+_EFFECT_FIELDS = ("damage", "armor", "target", "enemy_status", "self_status")
+_TARGETS = ("single", "all")
+
+
+def _check_int(value, field, key):
+    """校验非负整数字段"""
+    if type(value) is not int or value < 0:
+        raise ValueError(f"卡牌 {key} 的 {field} 必须是非负整数: {value!r}")
+    return value
+
+
+def _parse_status(value, field, key):
+    """
+    校验状态效果字段
+
+    Returns:
+        tuple: ((状态名, 层数), ...)
+    """
+    if not isinstance(value, dict):
+        raise ValueError(f"卡牌 {key} 的 {field} 必须是 状态名 -> 层数 的字典")
+    for name, stacks in value.items():
+        if name not in STATUSES.ids:
+            raise ValueError(f"卡牌 {key} 使用了未注册的状态效果: {name}")
+        _check_int(stacks, f"{field}.{name}", key)
+    return tuple(value.items())
+
+
+def _parse_variant(entry, key, cost, effects, upgraded):
+    """
+    生成一个卡牌版本的数据行
+
+    Returns:
+        tuple: Card构造参数
+    """
+    unknown = set(effects) - set(_EFFECT_FIELDS)
+    if unknown:
+        raise ValueError(f"卡牌 {key} 有未知的效果字段: {', '.join(sorted(unknown))}")
+
+    damage = _check_int(effects.get("damage", 0), "damage", key)
+    armor = _check_int(effects.get("armor", 0), "armor", key)
+    target = effects.get("target", "single")
+    if target not in _TARGETS:
+        raise ValueError(f"卡牌 {key} 的 target 必须是 {' 或 '.join(_TARGETS)}: {target!r}")
+    enemy_status = _parse_status(effects.get("enemy_status", {}), "enemy_status", key)
+    self_status = _parse_status(effects.get("self_status", {}), "self_status", key)
+
+    values = {"cost": cost, "damage": damage, "armor": armor}
+    values.update(enemy_status)
+    values.update(self_status)
+    try:
+        description = entry["description"].format(**values)
+    except (KeyError, IndexError) as e:
+        raise ValueError(f"卡牌 {key} 的描述引用了不存在的字段: {e}") from None
+
+    return (entry["name"], entry["type"], cost, description, upgraded, key, entry["rarity"],
+            damage, armor, target == "all", enemy_status, self_status)
+
+
+def parse_catalog(entries):
+    """
+    解析并校验卡牌表
+
+    Args:
+        entries: 卡牌表（JSON解析后的列表）
+
+    Returns:
+        list: 按卡牌ID排列的数据行，每张卡牌依次为基础版和升级版
+    """
+    if not isinstance(entries, list):
+        raise ValueError("卡牌表必须是列表")
+
+    rows = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"第{index}张卡牌不是对象")
+        key = entry.get("key")
+        for field in ("key", "name", "type", "rarity", "cost", "description"):
+            if field not in entry:
+                raise ValueError(f"第{index}张卡牌缺少字段: {field}")
+        if key in seen:
+            raise ValueError(f"卡牌重复: {key}")
+        seen.add(key)
+        if entry["type"] not in CardType.__members__:
+            raise ValueError(f"卡牌 {key} 的类型无效: {entry['type']}")
+        if entry["rarity"] not in RARITY_WEIGHTS:
+            raise ValueError(f"卡牌 {key} 的稀有度无效: {entry['rarity']}")
+
+        cost = _check_int(entry["cost"], "cost", key)
+        effects = entry.get("effects", {})
+        rows.append(_parse_variant(entry, key, cost, effects, False))
+
+        upgrade = dict(entry.get("upgrade", {}))
+        upgraded_cost = _check_int(upgrade.pop("cost", cost), "upgrade.cost", key)
+        upgraded_effects = dict(effects)
+        for field, value in upgrade.items():
+            # 状态效果按状态名合并，其余字段直接覆盖
+            if field in ("enemy_status", "self_status") and isinstance(value, dict):
+                value = {**effects.get(field, {}), **value}
+            upgraded_effects[field] = value
+        rows.append(_parse_variant(entry, key, upgraded_cost, upgraded_effects, True))
+    return rows
+
+
+def _cache_path(path):
+    """缓存文件路径"""
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", f"{os.path.splitext(filename)[0]}.catalog.pickle")
+
+
+class CardCatalog:
+    """卡牌目录"""
+
+    def __init__(self, rows):
+        """
+        根据数据行创建卡牌定义
+
+        Args:
+            rows: parse_catalog返回的数据行
+        """
+        self.definitions = []  # 卡牌ID -> 共享的卡牌定义
+        self.ids = {}  # 卡牌键 -> 基础版卡牌ID
+        self.from_cache = False
+        for card_id, (name, card_type, cost, description, upgraded, key, rarity,
+                      damage, armor, target_all, enemy_status, self_status) in enumerate(rows):
+            self.definitions.append(Card(
+                name, CardType[card_type], cost, description, upgraded, key, card_id,
+                rarity, damage, armor, target_all, enemy_status, self_status,
+            ))
+            if not upgraded:
+                self.ids[key] = card_id
+        for card_id in range(0, len(self.definitions), 2):
+            variants = (self.definitions[card_id], self.definitions[card_id + 1])
+            for card in variants:
+                card.variants = variants
+                card.freeze()
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH, use_cache=True):
+        """
+        加载卡牌表，源文件未修改时使用缓存
+
+        Args:
+            path: 卡牌表路径
+            use_cache: 是否读写缓存
+
+        Returns:
+            CardCatalog: 卡牌目录
+        """
+        stat = os.stat(path)
+        signature = (CACHE_FORMAT, stat.st_mtime_ns, stat.st_size)
+        cache_path = _cache_path(path)
+
+        if use_cache:
+            catalog = cls._load_cache(cache_path, signature)
+            if catalog is not None:
+                return catalog
+
+        with open(path, "r", encoding="utf-8") as f:
+            rows = parse_catalog(json.load(f))
+
+        if use_cache:
+            # 缓存写入失败（如目录只读）时只是下次不能使用缓存
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump((signature, rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, cache_path)
+            except OSError:
+                pass
+        return cls(rows)
+
+    @classmethod
+    def _load_cache(cls, cache_path, signature):
+        """
+        读取缓存
+
+        缓存由本模块写入，但可能被截断、来自旧版本或被其他程序改写；
+        任何读取或构建失败都视为没有缓存，由调用方重新解析卡牌表
+
+        Returns:
+            CardCatalog: 卡牌目录，缓存不可用时返回None
+        """
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(cached, tuple) or len(cached) != 2 or cached[0] != signature:
+            return None
+        rows = cached[1]
+        if not isinstance(rows, list) or len(rows) % 2:
+            return None
+        try:
+            catalog = cls(rows)
+        except Exception:
+            return None
+        catalog.from_cache = True
+        return catalog
+
+    def __len__(self):
+        """卡牌种类数"""
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def get(self, key, upgraded=False):
+        """
+        获取卡牌定义
+
+        Args:
+            key: 卡牌键
+            upgraded: 是否升级
+
+        Returns:
+            Card: 共享的卡牌定义
+        """
+        try:
+            card_id = self.ids[key]
+        except KeyError:
+            raise KeyError(f"卡牌不存在: {key}") from None
+        return self.definitions[card_id + int(upgraded)]
@@ -3,13 +3,30 @@
 """
 import sys
 import os
+import random
+from array import array
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from cards import Card
+from cards import Card, card_id, card_from_id
+from battle_events import BattleEvent, EventType
+from statuses import STATUSES, TURN_START, ON_DAMAGED
+
+# 写时复制标记：被快照共享的容器在修改前需要先复制
+SHARED_HAND = 1
+SHARED_DRAW = 2
+SHARED_DISCARD = 4
+SHARED_STATUS = 8
+SHARED_ALL = SHARED_HAND | SHARED_DRAW | SHARED_DISCARD | SHARED_STATUS
 
 
 class Character:
     """角色基类"""
     
+    __slots__ = (
+        "name", "max_hp", "hp", "max_energy", "energy", "armor",
+        "deck", "hand", "discard_pile", "draw_pile",
+        "status_effects", "relics", "potions", "events", "version", "shared", "triggers",
+    )
+    
     def __init__(self, name, max_hp, max_energy):
         """
         初始化角色
@@ -25,21 +42,99 @@ class Character:
         self.max_energy = max_energy
         self.energy = max_energy
         self.armor = 0
-        self.deck = []  # 牌库
+        self.deck = array("H")  # 牌库（卡牌ID）
         self.hand = []  # 手牌
         self.discard_pile = []  # 弃牌堆
         self.draw_pile = []  # 抽牌堆
-        self.status_effects = {}  # 状态效果
+        self.status_effects = {}  # 状态效果：状态ID -> 层数
+        self.triggers = 0  # 身上状态的触发掩码
         self.relics = []  # 遗物
         self.potions = []  # 药水
+        self.events = None  # 战斗事件总线，由BattleSystem设置，为None时不发布事件
+        self.version = 0  # 状态版本号，状态变化时递增
+        self.shared = 0  # 被快照共享的容器标记
     
-    def take_damage(self, damage):
+    def clone(self):
+        """
+        复制角色用于推演，卡牌定义共享，牌堆与状态效果复制，不发布事件
+        
+        Returns:
+            Character: 同类型的角色副本
+        """
+        other = object.__new__(type(self))
+        other.name = self.name
+        other.max_hp = self.max_hp
+        other.hp = self.hp
+        other.max_energy = self.max_energy
+        other.energy = self.energy
+        other.armor = self.armor
+        other.deck = self.deck
+        other.hand = self.hand[:]
+        other.discard_pile = self.discard_pile[:]
+        other.draw_pile = self.draw_pile[:]
+        other.status_effects = dict(self.status_effects)
+        other.relics = self.relics
+        other.potions = self.potions
+        other.events = None
+        other.version = self.version
+        other.shared = 0
+        other.triggers = self.triggers
+        return other
+    
+    def snapshot(self):
+        """
+        获取战斗状态快照，牌堆和状态效果与快照共享，修改前才复制（写时复制）
+        
+        Returns:
+            tuple: 快照数据，交给restore()恢复
+        """
+        self.shared = SHARED_ALL
+        return (self.version, self.hp, self.energy, self.armor,
+                self.hand, self.draw_pile, self.discard_pile, self.status_effects, self.triggers)
+    
+    def restore(self, snapshot):
+        """
+        恢复战斗状态快照，快照之后状态没有变化时直接返回
+        
+        Args:
+            snapshot: snapshot()返回的快照数据
+        """
+        if snapshot[0] == self.version:
+            return
+        (_, self.hp, self.energy, self.armor,
+         self.hand, self.draw_pile, self.discard_pile, self.status_effects, self.triggers) = snapshot
+        self.shared = SHARED_ALL
+        # 版本号只增不减，避免与快照之后出现过的版本号混淆
+        self.version += 1
+    
+    def _unshare(self, mask):
+        """
+        复制仍被快照共享的容器
+        
+        Args:
+            mask: 即将修改的容器标记
+        """
+        shared = self.shared & mask
+        if shared & SHARED_HAND:
+            self.hand = self.hand[:]
+        if shared & SHARED_DRAW:
+            self.draw_pile = self.draw_pile[:]
+        if shared & SHARED_DISCARD:
+            self.discard_pile = self.discard_pile[:]
+        if shared & SHARED_STATUS:
+            self.status_effects = dict(self.status_effects)
+        self.shared &= ~mask
+    
+    def take_damage(self, damage, source=None):
         """
         受到伤害
         
         Args:
             damage: 伤害值
+            source: 伤害来源名称
         """
+        raw_damage = damage
+        
         # 先扣除护甲
         if self.armor > 0:
             if self.armor >= damage:
@@ -52,6 +147,12 @@ class Character:
         self.hp -= damage
         if self.hp < 0:
             self.hp = 0
+        self.version += 1
+        
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.DAMAGE, source, self.name, raw_damage, damage))
+        if self.triggers & ON_DAMAGED:
+            STATUSES.on_damaged(self, damage, source)
         return damage
     
     def heal(self, amount):
@@ -64,6 +165,20 @@ class Character:
         self.hp += amount
         if self.hp > self.max_hp:
             self.hp = self.max_hp
+        self.version += 1
+    
+    def set_hp(self, hp, max_hp=None):
+        """
+        直接设置HP，用于读档、回放和调整数值；直接给hp赋值不会更新版本号
+        
+        Args:
+            hp: 生命值
+            max_hp: 最大生命值，为None时不变
+        """
+        if max_hp is not None:
+            self.max_hp = max_hp
+        self.hp = hp
+        self.version += 1
     
     def add_armor(self, amount):
         """
@@ -73,10 +188,15 @@ class Character:
             amount: 护甲值
         """
         self.armor += amount
+        self.version += 1
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.ARMOR, target=self.name, value=amount))
     
     def clear_armor(self):
         """清除护甲"""
-        self.armor = 0
+        if self.armor:
+            self.armor = 0
+            self.version += 1
     
     def add_status(self, status_name, value):
         """
@@ -86,23 +206,35 @@ class Character:
             status_name: 状态名称
             value: 状态值
         """
-        if status_name in self.status_effects:
-            self.status_effects[status_name] += value
+        status_id = STATUSES.ids[status_name]
+        if self.shared & SHARED_STATUS:
+            self._unshare(SHARED_STATUS)
+        if status_id in self.status_effects:
+            self.status_effects[status_id] += value
         else:
-            self.status_effects[status_name] = value
+            self.status_effects[status_id] = value
+            self.triggers |= STATUSES.masks[status_id]
+        self.version += 1
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.STATUS_APPLIED, target=self.name, value=value, detail=status_name))
     
     def remove_status(self, status_name):
         """移除状态效果"""
-        if status_name in self.status_effects:
-            del self.status_effects[status_name]
+        status_id = STATUSES.ids[status_name]
+        if status_id in self.status_effects:
+            if self.shared & SHARED_STATUS:
+                self._unshare(SHARED_STATUS)
+            del self.status_effects[status_id]
+            self.triggers = STATUSES.trigger_mask(self.status_effects)
+            self.version += 1
     
     def has_status(self, status_name):
         """检查是否有状态效果"""
-        return status_name in self.status_effects
+        return STATUSES.ids[status_name] in self.status_effects
     
     def get_status(self, status_name):
         """获取状态效果值"""
-        return self.status_effects.get(status_name, 0)
+        return self.status_effects.get(STATUSES.ids[status_name], 0)
     
     def add_card_to_deck(self, card):
         """
@@ -111,41 +243,47 @@ class Character:
         Args:
             card: 卡牌对象
         """
-        self.deck.append(card.clone())
+        self.deck.append(card_id(card))
+        self.version += 1
     
     def start_turn(self):
         """回合开始"""
         self.energy = self.max_energy
+        self.version += 1
         self.clear_armor()
         
         # 处理状态效果
-        if self.has_status("demon_form"):
-            strength = self.get_status("demon_form")
-            self.add_status("strength", strength)
+        if self.triggers & TURN_START:
+            STATUSES.dispatch(TURN_START, self)
     
     def end_turn(self):
         """回合结束"""
-        # 清除未使用的护甲
+        # 清除未使用的护甲；玩家身上的毒等回合结束状态不结算
         self.clear_armor()
     
     def is_alive(self):
         """检查是否存活"""
         return self.hp > 0
     
-    def draw_cards(self, num):
+    def draw_cards(self, num, rng=None):
         """
         抽牌
         
         Args:
             num: 抽牌数量
+            rng: 随机数生成器，默认使用全局random
         """
+        if rng is None:
+            rng = random
+        if self.shared & (SHARED_HAND | SHARED_DRAW):
+            self._unshare(SHARED_HAND | SHARED_DRAW)
+        self.version += 1
         for _ in range(num):
             if len(self.draw_pile) == 0:
                 # 抽牌堆为空，洗牌
                 self.draw_pile = self.discard_pile[:]
                 self.discard_pile = []
-                import random
-                random.shuffle(self.draw_pile)
+                rng.shuffle(self.draw_pile)
                 
                 if len(self.draw_pile) == 0:
                     return  # 没有牌可抽
@@ -160,6 +298,9 @@ class Character:
         Args:
             card_index: 卡牌在手牌中的索引
             enemy: 敌人对象
+        
+        Returns:
+            Card: 使用的卡牌，无法使用时返回None
         """
         if card_index < 0 or card_index >= len(self.hand):
             return None
@@ -171,24 +312,40 @@ class Character:
             return None
         
         # 使用卡牌
+        if self.shared & (SHARED_HAND | SHARED_DISCARD):
+            self._unshare(SHARED_HAND | SHARED_DISCARD)
         self.energy -= card.cost
-        result = card.play(self, enemy)
+        self.version += 1
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.CARD_PLAYED, self.name, enemy.name, card.cost, card))
+        card.play(self, enemy)
         
         # 将卡牌移到弃牌堆
         self.hand.pop(card_index)
         self.discard_pile.append(card)
         
-        return result
+        return card
     
     def discard_all(self):
         """弃掉所有手牌"""
+        if self.shared & SHARED_DISCARD:
+            self._unshare(SHARED_DISCARD)
         self.discard_pile.extend(self.hand)
         self.hand = []
+        self.version += 1
     
-    def reset_deck(self):
-        """重置牌库"""
-        self.draw_pile = self.deck[:]
+    def reset_deck(self, rng=None):
+        """
+        重置牌库
+        
+        Args:
+            rng: 随机数生成器，默认使用全局random
+        """
+        if rng is None:
+            rng = random
+        self.draw_pile = [card_from_id(card) for card in self.deck]
         self.discard_pile = []
         self.hand = []
-        import random
-        random.shuffle(self.draw_pile)
+        rng.shuffle(self.draw_pile)
+        self.shared &= SHARED_STATUS
+        self.version += 1
@@ -5,12 +5,22 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from characters.character import Character
-from cards import Strike, Defend, HeavyAttack, IronWave
+from cards import get_card
 
 
 class Warrior(Character):
     """战士职业 - 高生命值，擅长攻击和护甲"""
     
+    __slots__ = ()
+    
+    # 初始卡组：(卡牌键, 数量)
+    STARTER_DECK = (
+        ("strike", 5),  # 5张打击
+        ("defend", 4),  # 4张防御
+        ("heavy_attack", 1),  # 1张重击
+        ("iron_wave", 1),  # 1张铁波
+    )
+    
     def __init__(self):
         super().__init__(
             name="战士",
@@ -22,17 +32,8 @@ class Warrior(Character):
         self._init_deck()
     
     def _init_deck(self):
-        """初始化战士的初始卡组"""
-        # 5张打击
-        for _ in range(5):
-            self.add_card_to_deck(Strike())
-        
-        # 4张防御
-        for _ in range(4):
-            self.add_card_to_deck(Defend())
-        
-        # 1张重击
-        self.add_card_to_deck(HeavyAttack())
-        
-        # 1张铁波
-        self.add_card_to_deck(IronWave())
+        """按STARTER_DECK从卡牌目录初始化战士的初始卡组"""
+        for key, count in self.STARTER_DECK:
+            card = get_card(key)
+            for _ in range(count):
+                self.add_card_to_deck(card)
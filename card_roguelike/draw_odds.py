@@ -0,0 +1,177 @@
+"""
+抽牌概率
+精确计算接下来K个回合内抽到指定卡牌或组合的概率。
+
+计算基于抽牌堆和弃牌堆的卡牌构成（抽牌堆顺序对玩家未知，视为均匀随机），
+按Character.draw_cards的规则建模：每回合抽5张，抽牌堆不足时把弃牌堆洗回抽牌堆后继续抽，
+回合结束时手牌全部进入弃牌堆。每回合的抽牌结果按多元超几何分布精确枚举，
+结果按牌堆构成记忆化，同一局面只计算一次。
+
+用法:
+    draw_probability(player, {"heavy_attack": 1}, turns=2)  # 两回合内抽到重击
+    draw_probability(player, {"strike": 2, "iron_wave": 1})  # 下回合同时抽到2张打击和铁波
+"""
+from functools import lru_cache
+from math import comb
+
+# 每回合抽牌数，与BattleSystem.start_player_turn一致
+DRAW_PER_TURN = 5
+
+
+@lru_cache(maxsize=4096)
+def draw_outcomes(counts, k):
+    """
+    枚举从卡牌构成中无放回抽k张的所有结果
+
+    Args:
+        counts: 各类卡牌的数量
+        k: 抽牌数
+
+    Returns:
+        tuple: ((抽到的构成, 剩余构成, 概率), ...)
+    """
+    total = sum(counts)
+    if k >= total:
+        return ((counts, (0,) * len(counts), 1.0),)
+
+    denominator = comb(total, k)
+    outcomes = []
+    drawn = [0] * len(counts)
+
+    def expand(index, left, ways):
+        if left == 0:
+            rest = tuple(count - taken for count, taken in zip(counts, drawn))
+            outcomes.append((tuple(drawn), rest, ways / denominator))
+            return
+        if index == len(counts):
+            return
+        for taken in range(min(counts[index], left) + 1):
+            drawn[index] = taken
+            expand(index + 1, left - taken, ways * comb(counts[index], taken))
+        drawn[index] = 0
+
+    expand(0, k, 1)
+    return tuple(outcomes)
+
+
+def deal(draw, discard, k=DRAW_PER_TURN):
+    """
+    枚举一次抽牌的结果，抽牌堆不足时与Character.draw_cards一样把弃牌堆洗回抽牌堆
+
+    Args:
+        draw: 抽牌堆构成
+        discard: 弃牌堆构成
+        k: 抽牌数
+
+    Returns:
+        list: [(手牌构成, 抽牌堆构成, 弃牌堆构成, 概率), ...]
+    """
+    in_draw = sum(draw)
+    if in_draw >= k:
+        return [(hand, rest, discard, p) for hand, rest, p in draw_outcomes(draw, k)]
+    empty = (0,) * len(discard)
+    return [
+        (tuple(a + b for a, b in zip(draw, hand)), rest, empty, p)
+        for hand, rest, p in draw_outcomes(discard, k - in_draw)
+    ]
+
+
+@lru_cache(maxsize=65536)
+def combo_probability(draw, discard, need, turns, hand_size=DRAW_PER_TURN):
+    """
+    在卡牌构成上计算turns个回合内某一回合的手牌满足组合的概率
+
+    卡牌构成的前len(need)项与need一一对应，其余项为不关心的卡牌
+
+    Args:
+        draw: 抽牌堆构成
+        discard: 弃牌堆构成
+        need: 组合中各类卡牌的最少张数
+        turns: 回合数
+        hand_size: 每回合抽牌数
+
+    Returns:
+        float: 概率
+    """
+    if turns <= 0:
+        return 0.0
+    probability = 0.0
+    for hand, next_draw, next_discard, p in deal(draw, discard, hand_size):
+        if all(have >= want for have, want in zip(hand, need)):
+            probability += p
+        elif turns > 1:
+            # 回合结束时手牌进入弃牌堆
+            next_discard = tuple(a + b for a, b in zip(next_discard, hand))
+            probability += p * combo_probability(next_draw, next_discard, need, turns - 1, hand_size)
+    return probability
+
+
+def _count(cards, keys):
+    """按卡牌键统计构成，最后一项为不在keys中的卡牌"""
+    index = {key: i for i, key in enumerate(keys)}
+    counts = [0] * (len(keys) + 1)
+    for card in cards:
+        counts[index.get(card.key, len(keys))] += 1
+    return counts
+
+
+def pile_state(player, keys):
+    """
+    获取下一回合开始时的牌堆构成
+
+    当前手牌（包括本回合将要打出的卡牌）在回合结束时都会进入弃牌堆
+
+    Args:
+        player: 角色对象
+        keys: 关心的卡牌键列表
+
+    Returns:
+        tuple: (抽牌堆构成, 弃牌堆构成)
+    """
+    draw = _count(player.draw_pile, keys)
+    discard = _count(player.discard_pile, keys)
+    for i, count in enumerate(_count(player.hand, keys)):
+        discard[i] += count
+    return tuple(draw), tuple(discard)
+
+
+def draw_probability(player, combo, turns=1, hand_size=DRAW_PER_TURN):
+    """
+    计算接下来turns个回合内，至少有一回合的手牌包含组合中全部卡牌的概率
+
+    卡牌按卡牌键匹配，升级版与基础版视为同一种卡牌
+
+    Args:
+        player: 角色对象
+        combo: 卡牌键 -> 最少张数，或单个卡牌键（至少1张）
+        turns: 回合数
+        hand_size: 每回合抽牌数
+
+    Returns:
+        float: 概率
+    """
+    if isinstance(combo, str):
+        combo = {combo: 1}
+    keys = tuple(combo)
+    draw, discard = pile_state(player, keys)
+    return combo_probability(draw, discard, tuple(combo.values()), turns, hand_size)
+
+
+def next_turn_odds(player, turns=1, hand_size=DRAW_PER_TURN):
+    """
+    计算牌组中每种卡牌在接下来turns个回合内至少抽到一张的概率
+
+    Args:
+        player: 角色对象
+        turns: 回合数
+        hand_size: 每回合抽牌数
+
+    Returns:
+        dict: 卡牌键 -> 概率，按卡牌第一次出现的顺序
+    """
+    keys = []
+    for pile in (player.hand, player.draw_pile, player.discard_pile):
+        for card in pile:
+            if card.key not in keys:
+                keys.append(card.key)
+    return {key: draw_probability(player, key, turns, hand_size) for key in keys}
@@ -5,5 +5,7 @@ from .enemy import Enemy
 from .goblin_warrior import GoblinWarrior
 from .goblin_archer import GoblinArcher
 from .slime import Slime
+from .enemy_group import EnemyGroup
+from .enemy_ai import ExpectimaxAI
 
-__all__ = ['Enemy', 'GoblinWarrior', 'GoblinArcher', 'Slime']
+__all__ = ['Enemy', 'GoblinWarrior', 'GoblinArcher', 'Slime', 'EnemyGroup', 'ExpectimaxAI']
@@ -1,7 +1,12 @@
 """
 敌人类
 """
+import sys
+import os
 from enum import Enum
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_events import BattleEvent, EventType
+from statuses import STATUSES, TURN_END, ON_ATTACK, ON_DAMAGED
 
 
 class IntentType(Enum):
@@ -15,6 +20,14 @@ class IntentType(Enum):
 class Enemy:
     """敌人类"""
     
+    __slots__ = (
+        "name", "max_hp", "hp", "armor", "status_effects",
+        "intent", "intent_value", "action_index", "actions", "events", "version", "status_shared", "triggers", "group",
+    )
+    
+    # 敌人AI，为None时按行动模式循环，按敌人类设置（如 GoblinWarrior.AI = ExpectimaxAI()）
+    AI = None
+    
     def __init__(self, name, max_hp):
         """
         初始化敌人
@@ -27,60 +40,190 @@ class Enemy:
         self.max_hp = max_hp
         self.hp = max_hp
         self.armor = 0
-        self.status_effects = {}
+        self.status_effects = {}  # 状态效果：状态ID -> 层数
+        self.triggers = 0  # 身上状态的触发掩码
+        self.group = None  # 所属的敌人组，由EnemyGroup设置
         self.intent = None
         self.intent_value = 0
         self.action_index = 0
-        self.actions = []  # 行动模式列表
+        self.actions = ()  # 行动模式列表，同类敌人共享
+        self.events = None  # 战斗事件总线，由BattleSystem设置，为None时不发布事件
+        self.version = 0  # 状态版本号，状态变化时递增
+        self.status_shared = False  # 状态效果是否被快照共享
+    
+    def clone(self):
+        """
+        复制敌人用于推演，不发布事件
+        
+        Returns:
+            Enemy: 同类型的敌人副本
+        """
+        other = object.__new__(type(self))
+        other.name = self.name
+        other.max_hp = self.max_hp
+        other.hp = self.hp
+        other.armor = self.armor
+        other.status_effects = dict(self.status_effects)
+        other.intent = self.intent
+        other.intent_value = self.intent_value
+        other.action_index = self.action_index
+        other.actions = self.actions
+        other.events = None
+        other.version = self.version
+        other.status_shared = False
+        other.triggers = self.triggers
+        other.group = None
+        return other
+    
+    def snapshot(self):
+        """
+        获取战斗状态快照，状态效果与快照共享，修改前才复制（写时复制）
+        
+        Returns:
+            tuple: 快照数据，交给restore()恢复
+        """
+        self.status_shared = True
+        return (self.version, self.hp, self.armor, self.status_effects,
+                self.intent, self.intent_value, self.action_index, self.triggers)
+    
+    def restore(self, snapshot):
+        """
+        恢复战斗状态快照，快照之后状态没有变化时直接返回
+        
+        Args:
+            snapshot: snapshot()返回的快照数据
+        """
+        if snapshot[0] == self.version:
+            return
+        (_, self.hp, self.armor, self.status_effects,
+         self.intent, self.intent_value, self.action_index, self.triggers) = snapshot
+        self.status_shared = True
+        # 版本号只增不减，避免与快照之后出现过的版本号混淆
+        self.version += 1
     
-    def take_damage(self, damage):
+    def take_damage(self, damage, source=None, hits=1):
         """
         受到伤害
         
+        Args:
+            damage: 每次命中的伤害值
+            source: 伤害来源名称
+            hits: 命中次数，敌人死亡后剩余的命中不再结算
+        
+        Returns:
+            int: 护甲抵消后的总伤害
+        """
+        total = 0
+        for hit in range(hits):
+            if hit and self.hp <= 0:
+                break
+            alive = self.hp > 0
+            lost = self.absorb_damage(damage)
+            self.report_damage(damage, lost, source, alive and self.hp == 0)
+            total += lost
+        return total
+    
+    def absorb_damage(self, damage):
+        """
+        结算一次命中：先扣除护甲，再扣除HP，不发布事件、不触发受伤钩子
+        
+        take_damage和EnemyGroup.take_damage_all共用这一结算规则
+        
         Args:
             damage: 伤害值
+        
+        Returns:
+            int: 护甲抵消后的伤害
+        """
+        armor = self.armor
+        if armor >= damage:
+            self.armor = armor - damage
+            lost = 0
+        else:
+            lost = damage - armor
+            self.armor = 0
+            hp = self.hp
+            self.hp = hp - lost if hp > lost else 0
+        self.version += 1
+        return lost
+    
+    def report_damage(self, damage, lost, source, killed):
         """
-        # 先扣除护甲
-        if self.armor > 0:
-            if self.armor >= damage:
-                self.armor -= damage
-                damage = 0
-            else:
-                damage -= self.armor
-                self.armor = 0
+        发布一次命中的伤害事件（被击败时再发布击败事件），然后触发受伤钩子
         
-        self.hp -= damage
-        if self.hp < 0:
-            self.hp = 0
-        return damage
+        Args:
+            damage: 伤害值
+            lost: 护甲抵消后的伤害
+            source: 伤害来源名称
+            killed: 这次命中是否击败了敌人
+        """
+        events = self.events
+        if events is not None:
+            events.emit(BattleEvent(EventType.DAMAGE, source, self.name, damage, lost))
+            if killed:
+                events.emit(BattleEvent(EventType.DEFEATED, target=self.name))
+        if self.triggers & ON_DAMAGED:
+            STATUSES.on_damaged(self, lost, source)
+    
+    def set_hp(self, hp, max_hp=None):
+        """
+        直接设置HP，用于按幕调整敌人强度等场景；直接给hp赋值不会更新版本号
+        
+        Args:
+            hp: 生命值
+            max_hp: 最大生命值，为None时不变
+        """
+        if max_hp is not None:
+            self.max_hp = max_hp
+        self.hp = hp
+        self.version += 1
     
     def add_armor(self, amount):
         """添加护甲"""
         self.armor += amount
+        self.version += 1
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.ARMOR, target=self.name, value=amount))
     
     def clear_armor(self):
         """清除护甲"""
-        self.armor = 0
+        if self.armor:
+            self.armor = 0
+            self.version += 1
     
     def add_status(self, status_name, value):
         """添加状态效果"""
-        if status_name in self.status_effects:
-            self.status_effects[status_name] += value
+        status_id = STATUSES.ids[status_name]
+        if self.status_shared:
+            self.status_effects = dict(self.status_effects)
+            self.status_shared = False
+        if status_id in self.status_effects:
+            self.status_effects[status_id] += value
         else:
-            self.status_effects[status_name] = value
+            self.status_effects[status_id] = value
+            self.triggers |= STATUSES.masks[status_id]
+        self.version += 1
+        if self.events is not None:
+            self.events.emit(BattleEvent(EventType.STATUS_APPLIED, target=self.name, value=value, detail=status_name))
     
     def remove_status(self, status_name):
         """移除状态效果"""
-        if status_name in self.status_effects:
-            del self.status_effects[status_name]
+        status_id = STATUSES.ids[status_name]
+        if status_id in self.status_effects:
+            if self.status_shared:
+                self.status_effects = dict(self.status_effects)
+                self.status_shared = False
+            del self.status_effects[status_id]
+            self.triggers = STATUSES.trigger_mask(self.status_effects)
+            self.version += 1
     
     def has_status(self, status_name):
         """检查是否有状态效果"""
-        return status_name in self.status_effects
+        return STATUSES.ids[status_name] in self.status_effects
     
     def get_status(self, status_name):
         """获取状态效果值"""
-        return self.status_effects.get(status_name, 0)
+        return self.status_effects.get(STATUSES.ids[status_name], 0)
     
     def set_intent(self, intent_type, value):
         """
@@ -92,6 +235,7 @@ class Enemy:
         """
         self.intent = intent_type
         self.intent_value = value
+        self.version += 1
     
     def execute_action(self, player):
         """
@@ -102,29 +246,32 @@ class Enemy:
         """
         if self.intent == IntentType.ATTACK:
             damage = self.intent_value
-            # 考虑力量加成
-            if self.has_status("strength"):
-                damage += self.get_status("strength")
-            player.take_damage(damage)
-            return f"{self.name}攻击了，造成{damage}点伤害"
+            # 考虑力量等状态加成
+            if self.triggers & ON_ATTACK:
+                damage = STATUSES.modify_attack(self, damage)
+            player.take_damage(damage, self.name)
         elif self.intent == IntentType.DEFEND:
             self.add_armor(self.intent_value)
-            return f"{self.name}获得了{self.intent_value}点护甲"
         elif self.intent == IntentType.BUFF:
             self.add_status("strength", self.intent_value)
-            return f"{self.name}获得了{self.intent_value}点力量"
         elif self.intent == IntentType.DEBUFF:
             player.add_status("poison", self.intent_value)
-            return f"{self.name}给你施加了{self.intent_value}层毒"
-        
-        return f"{self.name}什么也没做"
     
-    def plan_next_action(self):
-        """计划下一个行动"""
+    def plan_next_action(self, player=None):
+        """
+        计划下一个行动
+        
+        Args:
+            player: 玩家对象，敌人类设置了AI时据此搜索行动
+        """
         if not self.actions:
             return
         
-        action = self.actions[self.action_index % len(self.actions)]
+        action = None
+        if self.AI is not None and player is not None:
+            action = self.AI.choose_action(self, player)
+        if action is None:
+            action = self.actions[self.action_index % len(self.actions)]
         self.set_intent(action["type"], action["value"])
         self.action_index += 1
     
@@ -132,18 +279,9 @@ class Enemy:
         """回合结束"""
         self.clear_armor()
         
-        # 处理状态效果
-        if self.has_status("burning"):
-            damage = self.get_status("burning")
-            self.take_damage(damage)
-            return f"{self.name}受到了{damage}点火伤"
-        
-        if self.has_status("poison"):
-            poison = self.get_status("poison")
-            self.take_damage(poison)
-            return f"{self.name}受到了{poison}点毒伤害"
-        
-        return None
+        # 一次结算所有回合结束的状态效果
+        if self.triggers & TURN_END:
+            STATUSES.dispatch(TURN_END, self)
     
     def is_alive(self):
         """检查是否存活"""
@@ -0,0 +1,265 @@
+"""
+敌人AI
+基于期望最大化搜索（expectimax）选择敌人意图，按敌人类启用:
+
+    GoblinWarrior.AI = ExpectimaxAI(max_depth=3, time_budget=0.005)
+
+搜索在抽象状态上进行：双方HP、护甲、状态效果以及玩家抽牌堆/弃牌堆的卡牌构成。
+敌人节点取最大值，玩家抽牌为机会节点（按多元超几何分布精确枚举），
+玩家对每手牌的应对按“本回合伤害最大”估计。搜索采用迭代加深，
+超出单次决策的时间预算时返回上一层完整搜索的结果。
+"""
+import sys
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cards import CARD_DEFINITIONS, card_effects, card_id
+from draw_odds import DRAW_PER_TURN, deal
+from enemies.enemy import IntentType
+
+# 终局评分，远大于任何HP差
+WIN_SCORE = 10000
+
+# 局面评估中持续效果折算的回合数
+EFFECT_HORIZON = 3
+
+# 卡牌ID -> (费用, 伤害, 护甲, 燃烧)
+_CARD_TABLE = tuple((card.cost,) + card_effects(card)[:3] for card in CARD_DEFINITIONS)
+
+
+class _SearchTimeout(Exception):
+    """搜索超出时间预算"""
+
+
+class TranspositionTable:
+    """置换表 - 容量有限，按最近最少使用淘汰"""
+
+    def __init__(self, capacity=50000):
+        """
+        初始化置换表
+
+        Args:
+            capacity: 最多保存的局面数
+        """
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        查询局面
+
+        Args:
+            key: 局面键
+
+        Returns:
+            保存的值，不存在时返回None
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        保存局面
+
+        Args:
+            key: 局面键
+            value: 值
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空置换表"""
+        self._entries.clear()
+
+
+@lru_cache(maxsize=4096)
+def _player_response(hand, energy):
+    """
+    估计玩家对一手牌的应对：在能量范围内使本回合伤害（含燃烧折算）最大
+
+    Args:
+        hand: 手牌构成
+        energy: 能量
+
+    Returns:
+        tuple: (伤害, 护甲, 燃烧)
+    """
+    cards = [card for card, count in enumerate(hand) for _ in range(count)]
+    best_key = (-1, -1)
+    best = (0, 0, 0)
+
+    def expand(index, energy_left, damage, armor, burning):
+        nonlocal best_key, best
+        if index == len(cards):
+            key = (damage + burning * EFFECT_HORIZON, armor)
+            if key > best_key:
+                best_key = key
+                best = (damage, armor, burning)
+            return
+        expand(index + 1, energy_left, damage, armor, burning)
+        cost, card_damage, card_armor, card_burning = _CARD_TABLE[cards[index]]
+        if cost <= energy_left:
+            expand(index + 1, energy_left - cost, damage + card_damage,
+                   armor + card_armor, burning + card_burning)
+
+    expand(0, energy, 0, 0, 0)
+    return best
+
+
+def _through_armor(hp, armor, damage):
+    """结算护甲后的HP和护甲，与take_damage一致"""
+    if armor >= damage:
+        return hp, armor - damage
+    return hp - (damage - armor), 0
+
+
+class ExpectimaxAI:
+    """期望最大化搜索敌人AI"""
+
+    def __init__(self, max_depth=3, time_budget=0.005, table_size=50000):
+        """
+        初始化敌人AI
+
+        Args:
+            max_depth: 最大搜索深度（敌人回合数）
+            time_budget: 单次决策的时间预算（秒），为None时总是搜索到最大深度，
+                结果与运行速度无关，可用于回放复现
+            table_size: 置换表容量
+        """
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.table = TranspositionTable(table_size)
+        self.last_depth = 0  # 上一次决策完成的搜索深度
+        self._deadline = None
+
+    def choose_action(self, enemy, player):
+        """
+        选择敌人的下一个行动
+
+        Args:
+            enemy: 敌人对象
+            player: 玩家对象
+
+        Returns:
+            dict: 敌人行动模式中的一个行动，来不及完成一层搜索时返回None
+        """
+        options = {}
+        for action in enemy.actions:
+            options.setdefault((action["type"], action["value"]), action)
+        if len(options) <= 1:
+            return next(iter(options.values()), None)
+
+        moves = tuple(options)
+        state = self._encode(enemy, player)
+        self._deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+
+        best = None
+        self.last_depth = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                values = [self._after_enemy(moves, state, move, depth) for move in moves]
+            except _SearchTimeout:
+                break
+            best = moves[values.index(max(values))]
+            self.last_depth = depth
+        return None if best is None else options[best]
+
+    @staticmethod
+    def _encode(enemy, player):
+        """
+        构建局面键：双方HP、护甲、状态效果、玩家能量与牌堆构成
+
+        敌人决策时玩家手牌已全部弃掉，只需记录抽牌堆和弃牌堆
+        """
+        draw = [0] * len(CARD_DEFINITIONS)
+        for card in player.draw_pile:
+            draw[card_id(card)] += 1
+        discard = [0] * len(CARD_DEFINITIONS)
+        for card in player.discard_pile:
+            discard[card_id(card)] += 1
+        for card in player.hand:
+            discard[card_id(card)] += 1
+        return (
+            player.hp, player.armor, player.max_energy,
+            enemy.hp, enemy.armor, enemy.get_status("strength"),
+            enemy.get_status("poison"), enemy.get_status("burning"),
+            tuple(draw), tuple(discard),
+        )
+
+    def _check_time(self):
+        """超出时间预算时中止搜索"""
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+    def _max_node(self, moves, state, depth):
+        """敌人决策节点"""
+        key = (moves, state, depth)
+        value = self.table.get(key)
+        if value is None:
+            value = max(self._after_enemy(moves, state, move, depth) for move in moves)
+            self.table.put(key, value)
+        return value
+
+    def _after_enemy(self, moves, state, move, depth):
+        """执行敌人行动与回合结束，然后进入玩家抽牌的机会节点"""
+        self._check_time()
+        (player_hp, player_armor, energy, enemy_hp, enemy_armor,
+         strength, poison, burning, draw, discard) = state
+        intent, value = move
+
+        # Enemy.execute_action
+        if intent == IntentType.ATTACK:
+            player_hp, player_armor = _through_armor(player_hp, player_armor, value + strength)
+            if player_hp <= 0:
+                return WIN_SCORE + enemy_hp
+        elif intent == IntentType.DEFEND:
+            enemy_armor += value
+        elif intent == IntentType.BUFF:
+            strength += value
+
+        # Enemy.end_turn 与 BattleSystem.end_enemy_turn
+        enemy_armor = 0
+        enemy_hp -= burning + poison
+        if enemy_hp <= 0:
+            return -WIN_SCORE - player_hp
+
+        # 玩家回合：清除护甲后抽牌并应对
+        expected = 0.0
+        for hand, next_draw, next_discard, p in deal(draw, discard, DRAW_PER_TURN):
+            damage, _, added_burning = _player_response(hand, energy)
+            next_enemy_hp = enemy_hp - damage
+            if next_enemy_hp <= 0:
+                expected += p * (-WIN_SCORE - player_hp)
+                continue
+            # 回合结束时手牌进入弃牌堆，玩家护甲清除
+            next_discard = tuple(a + b for a, b in zip(next_discard, hand))
+            next_state = (
+                player_hp, 0, energy, next_enemy_hp, enemy_armor, strength,
+                poison, burning + added_burning, next_draw, next_discard,
+            )
+            if depth > 1:
+                expected += p * self._max_node(moves, next_state, depth - 1)
+            else:
+                expected += p * self._evaluate(next_state)
+        return expected
+
+    @staticmethod
+    def _evaluate(state):
+        """局面评估（敌人视角）：HP差加上持续效果的折算"""
+        player_hp, _, _, enemy_hp, _, strength, poison, burning, _, _ = state
+        return enemy_hp - player_hp + (strength - burning - poison) * EFFECT_HORIZON
@@ -10,18 +10,22 @@ from enemies.enemy import Enemy, IntentType
 class GoblinArcher(Enemy):
     """地精射手 - 普通敌人，初始带毒"""
     
+    __slots__ = ()
+    
+    # 行动模式：攻击→上毒→攻击，同类敌人共享
+    ACTIONS = (
+        {"type": IntentType.ATTACK, "value": 4},
+        {"type": IntentType.DEBUFF, "value": 2},
+        {"type": IntentType.ATTACK, "value": 4},
+    )
+    
     def __init__(self):
         super().__init__(
             name="地精射手",
             max_hp=30
         )
         
-        # 行动模式：攻击→上毒→攻击
-        self.actions = [
-            {"type": IntentType.ATTACK, "value": 4},
-            {"type": IntentType.DEBUFF, "value": 2},
-            {"type": IntentType.ATTACK, "value": 4}
-        ]
+        self.actions = self.ACTIONS
         
         # 初始带1层毒
         self.add_status("poison", 1)
@@ -10,18 +10,22 @@ from enemies.enemy import Enemy, IntentType
 class GoblinWarrior(Enemy):
     """地精战士 - 普通敌人"""
     
+    __slots__ = ()
+    
+    # 行动模式：攻击→防御→攻击，同类敌人共享
+    ACTIONS = (
+        {"type": IntentType.ATTACK, "value": 6},
+        {"type": IntentType.DEFEND, "value": 5},
+        {"type": IntentType.ATTACK, "value": 6},
+    )
+    
     def __init__(self):
         super().__init__(
             name="地精战士",
             max_hp=40
         )
         
-        # 行动模式：攻击→防御→攻击
-        self.actions = [
-            {"type": IntentType.ATTACK, "value": 6},
-            {"type": IntentType.DEFEND, "value": 5},
-            {"type": IntentType.ATTACK, "value": 6}
-        ]
+        self.actions = self.ACTIONS
         
         # 初始意图
         self.plan_next_action()
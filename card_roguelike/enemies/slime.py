@@ -10,18 +10,22 @@ from enemies.enemy import Enemy, IntentType
 class Slime(Enemy):
     """史莱姆 - 普通敌人"""
     
+    __slots__ = ()
+    
+    # 行动模式：攻击→分裂→攻击，同类敌人共享
+    ACTIONS = (
+        {"type": IntentType.ATTACK, "value": 3},
+        {"type": IntentType.BUFF, "value": 1},  # 分裂：获得力量
+        {"type": IntentType.ATTACK, "value": 3},
+    )
+    
     def __init__(self):
         super().__init__(
             name="史莱姆",
             max_hp=50
         )
         
-        # 行动模式：攻击→分裂→攻击
-        self.actions = [
-            {"type": IntentType.ATTACK, "value": 3},
-            {"type": IntentType.BUFF, "value": 1},  # 分裂：获得力量
-            {"type": IntentType.ATTACK, "value": 3}
-        ]
+        self.actions = self.ACTIONS
         
         # 初始意图
         self.plan_next_action()
@@ -1,49 +1,111 @@
 """
 卡牌Roguelike游戏主程序
 """
+import argparse
 import pygame
 import sys
 import random
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cards import card_id, card_from_id
 from characters import Warrior
-from enemies import GoblinWarrior, GoblinArcher, Slime
-from battle_system import BattleSystem, BattleState
+from battle_system import BattleSystem, BattleState, ACTION_END_TURN
+from battle_events import BattleEvent, EventType
 from ui import BattleUI
+from simulation.mcts import MCTSPolicy
+from run_map import RunMap, NodeType
+from save_journal import (SaveJournal, RunSnapshot, read_journal, JOURNAL_ERRORS,
+                          RECORD_ACTION, RECORD_UNDO, RECORD_BUY, RECORD_CHOOSE)
+
+# 自动战斗/出牌提示每次决策的搜索时间（秒）和推演次数上限
+# 搜索在主循环中进行，预算控制在两帧以内；自动战斗时子树在决策之间复用，搜索量会累积
+BOT_TIME_BUDGET = 0.03
+BOT_PLAYOUTS = 300
+
+# 一局游戏的幕数
+RUN_ACTS = 3
+
+# 默认存档路径
+SAVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "save.journal")
+
+# 无法读取的存档被移动到加上该后缀的路径
+BAD_SAVE_SUFFIX = ".bad"
+
+# 画面空闲时每次阻塞等待事件的最长时间（毫秒）
+IDLE_WAIT_MS = 500
 
 
 class Game:
     """游戏主类"""
     
-    def __init__(self):
-        """初始化游戏"""
+    def __init__(self, save_path=SAVE_PATH):
+        """
+        初始化游戏，存档存在时从存档继续
+        
+        Args:
+            save_path: 存档路径，为None时不存档
+        """
         self.ui = BattleUI()
         self.ui.init()
         
         # 创建玩家角色
         self.player = Warrior()
         
-        # 创建敌人
-        self.enemies = [GoblinWarrior(), GoblinArcher(), Slime()]
-        self.current_enemy_index = 0
-        
-        # 创建战斗系统
-        self.enemy = self.enemies[self.current_enemy_index]
-        self.battle_system = BattleSystem(self.player, self.enemy)
+        # MCTS出牌机器人，用于自动战斗和出牌提示
+        self.bot = MCTSPolicy(playouts=BOT_PLAYOUTS, time_budget=BOT_TIME_BUDGET)
+        self.autoplay = False
         
-        # 开始第一回合
-        self.battle_system.start_player_turn()
+        # 本回合出牌前的快照，用于撤销：[(快照, 卡牌), ...]
+        self.undo_stack = []
         
+        # 存档日志，每个操作都追加一条记录
+        self.journal = None
+        self.battle_system = None
+        self.run_complete = False
         self.running = True
+        resumed = False
+        if save_path is not None and os.path.exists(save_path):
+            try:
+                self.resume(save_path)
+                resumed = True
+            except JOURNAL_ERRORS as e:
+                # 存档为空、损坏（例如刚创建就中断）或与卡牌目录不一致时移到一边，开始新的一局
+                bad_path = save_path + BAD_SAVE_SUFFIX
+                try:
+                    os.replace(save_path, bad_path)
+                    print(f"存档无法读取（{type(e).__name__}: {e}），已移动到 {bad_path}，开始新的一局")
+                except OSError as move_error:
+                    print(f"存档无法读取（{type(e).__name__}: {e}），也无法移走（{move_error}），本局不存档")
+                    save_path = None
+                self.player = Warrior()
+                self.undo_stack.clear()
+                self.run_complete = False
+        if not resumed:
+            # 按种子生成的路线地图，从起点的战斗开始
+            self.run_map = RunMap(acts=RUN_ACTS)
+            if save_path is not None:
+                self.journal = SaveJournal(save_path)
+            self.enter_node(self.run_map.current)
     
-    def handle_events(self):
-        """处理事件"""
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        """
+        处理事件
+        
+        Args:
+            events: 本帧的事件列表，为None时从事件队列获取
+        """
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
                 return
             
+            # 窗口被遮挡后重新露出时，整个画面重绘
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.ui.invalidate()
+            
             elif event.type == pygame.KEYDOWN:
                 # ESC退出
                 if event.key == pygame.K_ESCAPE:
@@ -52,53 +114,228 @@ class Game:
                 
                 # 检查战斗是否结束
                 if self.battle_system.is_battle_over():
+                    choices = self.ui.map_choices
+                    shop_cards = self.ui.shop_cards
+                    # 数字键选择下一层的节点
+                    if choices and pygame.K_1 <= event.key < pygame.K_1 + len(choices):
+                        self.choose_node(event.key - pygame.K_1)
+                    # 数字键选择商店的卡牌后继续
+                    elif shop_cards and pygame.K_1 <= event.key < pygame.K_1 + len(shop_cards):
+                        self.buy_card(shop_cards[event.key - pygame.K_1])
                     # 按任意键继续或退出
-                    if event.key == pygame.K_SPACE:
+                    elif event.key == pygame.K_SPACE:
                         if self.battle_system.state == BattleState.VICTORY:
-                            # 继续下一个敌人
-                            self.next_enemy()
+                            # 商店中跳过购买，否则显示下一层的节点
+                            if shop_cards:
+                                self.buy_card(None)
+                            elif not choices:
+                                self.show_map_choices()
                         else:
                             # 游戏结束
                             self.running = False
                     return
                 
+                # A键切换自动战斗
+                if event.key == pygame.K_a:
+                    self.autoplay = not self.autoplay
+                    self.undo_stack.clear()
+                    self.ui.hint = None
+                    return
+                
                 # 玩家回合才能操作
-                if self.battle_system.state == BattleState.PLAYER_TURN:
+                if self.battle_system.state == BattleState.PLAYER_TURN and not self.autoplay:
                     # 数字键1-9使用卡牌
                     if pygame.K_1 <= event.key <= pygame.K_9:
                         card_index = event.key - pygame.K_1
                         if card_index < len(self.player.hand):
-                            self.battle_system.play_card(card_index)
+                            self.play_card(card_index)
+                    
+                    # U键撤销本回合上一张卡牌
+                    elif event.key == pygame.K_u:
+                        self.undo_last_card()
                     
                     # E键结束回合
                     elif event.key == pygame.K_e:
-                        self.battle_system.end_player_turn()
+                        self.end_turn()
+                    
+                    # H键显示出牌提示
+                    elif event.key == pygame.K_h:
+                        card_index = self.bot.choose_action(self.battle_system)
+                        self.ui.hint = -1 if card_index is None else card_index
                     
                     # 敌人回合自动执行
                     if self.battle_system.state == BattleState.ENEMY_TURN:
                         self.battle_system.execute_enemy_action()
     
-    def next_enemy(self):
-        """下一个敌人"""
-        self.current_enemy_index += 1
-        if self.current_enemy_index < len(self.enemies):
-            # 创建新的战斗
-            self.enemy = self.enemies[self.current_enemy_index]
-            self.battle_system = BattleSystem(self.player, self.enemy)
-            self.battle_system.start_player_turn()
-        else:
-            # 所有敌人都击败了
+    def play_card(self, card_index):
+        """
+        使用手牌，记录撤销快照并写入存档
+        
+        Args:
+            card_index: 卡牌索引
+        
+        Returns:
+            Card: 使用的卡牌，无法使用时返回None
+        """
+        snapshot = self.battle_system.snapshot()
+        card = self.battle_system.play_card(card_index)
+        if card is not None:
+            if self.battle_system.state == BattleState.PLAYER_TURN:
+                self.undo_stack.append((snapshot, card))
+            if self.journal is not None:
+                self.journal.action(card_index + 1)
+        self.ui.hint = None
+        return card
+    
+    def end_turn(self):
+        """结束玩家回合并执行敌人行动"""
+        self.battle_system.end_player_turn()
+        if self.battle_system.state == BattleState.ENEMY_TURN:
+            self.battle_system.execute_enemy_action()
+        self.undo_stack.clear()
+        self.ui.hint = None
+        if self.journal is not None:
+            self.journal.action(ACTION_END_TURN)
+    
+    def undo_last_card(self):
+        """撤销本回合使用的上一张卡牌"""
+        if not self.undo_stack:
+            return
+        snapshot, card = self.undo_stack.pop()
+        self.battle_system.restore(snapshot)
+        self.battle_system.events.emit(BattleEvent(EventType.UNDO, self.player.name, detail=card))
+        self.ui.hint = None
+        if self.journal is not None:
+            self.journal.undo()
+    
+    def buy_card(self, card):
+        """
+        选择商店卡牌后显示下一层的节点
+        
+        Args:
+            card: 加入牌库的卡牌，为None时跳过
+        """
+        if card is not None:
+            self.player.add_card_to_deck(card)
+        if self.journal is not None:
+            self.journal.buy(None if card is None else card_id(card))
+        self.show_map_choices()
+    
+    def choose_node(self, index):
+        """
+        前往下一层的节点
+        
+        Args:
+            index: 可选节点的索引
+        """
+        if self.journal is not None:
+            self.journal.choose(index)
+        self.enter_node(self.run_map.advance(index))
+    
+    def show_map_choices(self):
+        """显示下一层可到达的节点，路线走完时结束游戏"""
+        self.ui.shop_cards = None
+        if self.run_map.is_complete():
+            self.run_complete = True
             self.running = False
+        else:
+            self.ui.map_choices = [self.run_map.describe(node) for node in self.run_map.choices()]
+    
+    def enter_node(self, node):
+        """
+        进入地图节点：战斗节点开始新的战斗，休息处恢复HP，商店提供卡牌选择
+        
+        Args:
+            node: MapNode对象
+        """
+        self.ui.map_choices = None
+        self.ui.shop_cards = None
+        if node.kind == NodeType.REST:
+            self.player.heal(self.run_map.rest_amount(self.player))
+            self.show_map_choices()
+        elif node.kind == NodeType.SHOP:
+            self.ui.shop_cards = self.run_map.shop_cards(node)
+        else:
+            # 每场战斗开始前写入快照，读档时从这里重放
+            if self.journal is not None:
+                self.journal.snapshot(RunSnapshot.capture(self.run_map, self.player))
+            # 战斗种子由节点决定，同一张地图的同一场战斗可以复现
+            self.battle_system = BattleSystem(self.player, self.run_map.create_enemies(node), seed=node.seed)
+            self.battle_system.start_player_turn()
+            self.undo_stack.clear()
+    
+    def resume(self, path):
+        """
+        从存档继续：恢复最后一个快照的局面，重放其后的记录，然后继续写入同一个存档
+        
+        Args:
+            path: 存档路径
+        """
+        snapshot, records, end = read_journal(path)
+        if snapshot is None:
+            raise ValueError(f"存档中没有快照: {path}")
+        self.player = snapshot.create_player()
+        self.run_map = RunMap(snapshot.map_seed, snapshot.acts)
+        self.run_map.goto(snapshot.floor, snapshot.lane)
+        self.enter_node(self.run_map.current)
+        
+        # 重放时journal为None，不会重复写入
+        for kind, value in records:
+            if kind == RECORD_ACTION:
+                if value == ACTION_END_TURN:
+                    self.end_turn()
+                else:
+                    self.play_card(value - 1)
+            elif kind == RECORD_UNDO:
+                self.undo_last_card()
+            elif kind == RECORD_BUY:
+                self.buy_card(None if value == 0 else card_from_id(value - 1))
+            elif kind == RECORD_CHOOSE:
+                self.choose_node(value)
+        self.journal = SaveJournal(path, resume_at=end)
+    
+    def is_run_over(self):
+        """一局游戏是否已结束（失败或走完路线）"""
+        return self.run_complete or self.battle_system.state == BattleState.DEFEAT
     
     def update(self):
         """更新游戏状态"""
-        pass
+        # 自动战斗每帧执行一个动作
+        if self.autoplay and self.battle_system.state == BattleState.PLAYER_TURN:
+            card_index = self.bot.choose_action(self.battle_system)
+            if card_index is None or self.play_card(card_index) is None:
+                self.end_turn()
     
     def draw(self):
         """绘制游戏画面"""
         self.ui.draw_battle(self.battle_system)
         self.ui.flip()
     
+    def frame_state(self):
+        """
+        获取决定画面内容的状态：当前战斗和它的版本号
+        
+        Returns:
+            tuple: (战斗系统对象, 版本号)
+        """
+        return self.battle_system, self.battle_system.get_version()
+    
+    def is_idle(self, drawn):
+        """
+        画面是否不需要更新：没有在自动战斗，战斗和版本号与上次绘制时相同
+        
+        出牌提示、商店和路线选择只随输入变化，有输入时总会重绘
+        
+        Args:
+            drawn: 上次绘制后的frame_state()，还没有绘制时为None
+        """
+        if self.autoplay and self.battle_system.state == BattleState.PLAYER_TURN:
+            return False
+        if drawn is None:
+            return False
+        battle, version = drawn
+        return battle is self.battle_system and version == self.battle_system.get_version()
+    
     def run(self):
         """运行游戏主循环"""
         print("=" * 60)
@@ -107,25 +344,56 @@ class Game:
         print("\n操作说明:")
         print("  - 数字键1-9: 使用对应的卡牌")
         print("  - E键: 结束回合")
+        print("  - U键: 撤销本回合上一张卡牌")
+        print("  - H键: 出牌提示")
+        print("  - A键: 切换自动战斗")
         print("  - ESC键: 退出游戏")
+        print("  - 数字键1-5: 在商店选择一张卡牌加入牌库")
+        print("  - 数字键: 选择地图上下一层的节点")
         print("  - 空格键: 战斗结束后继续")
+        print(f"\n地图种子: {self.run_map.seed}")
         print("\n游戏开始！")
         print("=" * 60)
         
+        drawn = None
         while self.running:
-            self.handle_events()
+            events = pygame.event.get()
+            if not events and self.is_idle(drawn):
+                # 画面没有变化时阻塞等待输入，不重绘也不按帧率空转
+                event = pygame.event.wait(IDLE_WAIT_MS)
+                if event.type == pygame.NOEVENT:
+                    continue
+                events = [event] + pygame.event.get()
+            self.handle_events(events)
             self.update()
             self.draw()
+            drawn = self.frame_state()
             self.ui.tick()
         
+        # 一局结束时删除存档，中途退出时保留
+        if self.journal is not None:
+            if self.is_run_over():
+                self.journal.discard()
+            else:
+                self.journal.close()
+        
         pygame.quit()
         print("\n游戏结束！")
         print(f"最终HP: {self.player.hp}/{self.player.max_hp}")
 
 
-def main():
+def main(argv=None):
     """主函数"""
-    game = Game()
+    parser = argparse.ArgumentParser(description="卡牌Roguelike游戏")
+    parser.add_argument("--save", default=SAVE_PATH, help="存档路径，存在时从存档继续")
+    parser.add_argument("--new", action="store_true", help="忽略已有存档，开始新的一局")
+    parser.add_argument("--no-save", action="store_true", help="不存档")
+    args = parser.parse_args(argv)
+    
+    save_path = None if args.no_save else args.save
+    if args.new and save_path is not None and os.path.exists(save_path):
+        os.remove(save_path)
+    game = Game(save_path)
     game.run()
 
 
@@ -0,0 +1,300 @@
+"""
+战斗回放
+紧凑的二进制回放格式（随机种子 + varint编码的操作序列）与无界面快进回放器
+
+回放格式（所有整数均为varint）:
+    魔数 b"CRRP" | 版本 | 种子 | 玩家职业 | 敌人数量 {敌人类型 初始HP 最大HP} | 玩家初始HP
+    | 状态数量 {状态名 状态值} | 牌组大小 {卡牌ID} | 操作数量 {操作}
+其中字符串编码为 长度 + UTF-8字节，操作为0表示结束回合，i+1表示使用第i张手牌。
+版本1只有一个敌人，没有敌人数量字段；版本1和2没有敌人HP，敌人按类型的默认HP创建。
+
+用法:
+    python replay.py battle.rpl --turn 3
+"""
+import argparse
+import sys
+import os
+from array import array
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from battle_system import BattleSystem, BattleState, ACTION_END_TURN
+from characters import Warrior
+from enemies import GoblinWarrior, GoblinArcher, Slime
+from statuses import STATUSES
+
+REPLAY_MAGIC = b"CRRP"
+REPLAY_VERSION = 3
+
+# 可回放的玩家职业和敌人类型，按类名编码
+PLAYER_CLASSES = {cls.__name__: cls for cls in (Warrior,)}
+ENEMY_CLASSES = {cls.__name__: cls for cls in (GoblinWarrior, GoblinArcher, Slime)}
+
+
+def write_varint(buffer, value):
+    """
+    写入无符号varint
+
+    Args:
+        buffer: bytearray
+        value: 非负整数
+    """
+    if value < 0:
+        raise ValueError(f"varint不支持负数: {value}")
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, pos):
+    """
+    读取无符号varint
+
+    Args:
+        data: 字节数据
+        pos: 起始位置
+
+    Returns:
+        tuple: (值, 下一个位置)
+    """
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("回放数据不完整")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def write_str(buffer, text):
+    """写入长度前缀的字符串"""
+    raw = text.encode("utf-8")
+    write_varint(buffer, len(raw))
+    buffer.extend(raw)
+
+
+def read_str(data, pos):
+    """读取长度前缀的字符串"""
+    length, pos = read_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode("utf-8"), pos + length
+
+
+def _default_hp(enemy_class):
+    """敌人类型的默认 (HP, 最大HP)"""
+    enemy = ENEMY_CLASSES[enemy_class]()
+    return enemy.hp, enemy.max_hp
+
+
+class Replay:
+    """战斗回放"""
+
+    def __init__(self, seed, player_class, enemy_classes, player_hp, player_status, deck, actions, enemy_hp=None):
+        """
+        初始化回放
+
+        Args:
+            seed: 战斗随机种子
+            player_class: 玩家职业类名
+            enemy_classes: 敌人类名列表
+            player_hp: 战斗开始时玩家HP
+            player_status: 战斗开始时玩家状态效果（状态名称 -> 层数）
+            deck: 牌组卡牌ID列表
+            actions: 操作列表
+            enemy_hp: 战斗开始时每个敌人的 (HP, 最大HP)，为None时使用敌人类型的默认HP
+        """
+        self.seed = seed
+        self.player_class = player_class
+        self.enemy_classes = enemy_classes
+        self.player_hp = player_hp
+        self.player_status = player_status
+        self.deck = deck
+        self.actions = actions
+        self.enemy_hp = enemy_hp
+
+    @classmethod
+    def from_battle(cls, battle):
+        """
+        从战斗系统记录回放
+
+        Args:
+            battle: BattleSystem对象
+        """
+        return cls(
+            seed=battle.seed,
+            player_class=type(battle.player).__name__,
+            enemy_classes=[type(enemy).__name__ for enemy in battle.enemies],
+            player_hp=battle.player_start_hp,
+            player_status={STATUSES.names[status_id]: value
+                           for status_id, value in battle.player_start_status.items()},
+            deck=list(battle.player.deck),
+            actions=list(battle.action_history),
+            enemy_hp=list(battle.enemy_start_hp),
+        )
+
+    def encode(self):
+        """
+        编码为二进制
+
+        Returns:
+            bytes: 回放数据
+        """
+        buffer = bytearray(REPLAY_MAGIC)
+        write_varint(buffer, REPLAY_VERSION)
+        write_varint(buffer, self.seed)
+        write_str(buffer, self.player_class)
+        write_varint(buffer, len(self.enemy_classes))
+        enemy_hp = self.enemy_hp or [_default_hp(enemy_class) for enemy_class in self.enemy_classes]
+        for enemy_class, (hp, max_hp) in zip(self.enemy_classes, enemy_hp):
+            write_str(buffer, enemy_class)
+            write_varint(buffer, hp)
+            write_varint(buffer, max_hp)
+        write_varint(buffer, self.player_hp)
+        write_varint(buffer, len(self.player_status))
+        for name, value in self.player_status.items():
+            write_str(buffer, name)
+            write_varint(buffer, value)
+        write_varint(buffer, len(self.deck))
+        for card in self.deck:
+            write_varint(buffer, card)
+        write_varint(buffer, len(self.actions))
+        for action in self.actions:
+            write_varint(buffer, action)
+        return bytes(buffer)
+
+    @classmethod
+    def decode(cls, data):
+        """
+        从二进制解码
+
+        Args:
+            data: 回放数据
+        """
+        if data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC:
+            raise ValueError("不是有效的回放数据")
+        pos = len(REPLAY_MAGIC)
+        version, pos = read_varint(data, pos)
+        if not 1 <= version <= REPLAY_VERSION:
+            raise ValueError(f"不支持的回放版本: {version}")
+
+        seed, pos = read_varint(data, pos)
+        player_class, pos = read_str(data, pos)
+        count = 1
+        if version >= 2:
+            count, pos = read_varint(data, pos)
+        enemy_classes = []
+        enemy_hp = [] if version >= 3 else None
+        for _ in range(count):
+            enemy_class, pos = read_str(data, pos)
+            enemy_classes.append(enemy_class)
+            if enemy_hp is not None:
+                hp, pos = read_varint(data, pos)
+                max_hp, pos = read_varint(data, pos)
+                enemy_hp.append((hp, max_hp))
+        player_hp, pos = read_varint(data, pos)
+
+        player_status = {}
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            name, pos = read_str(data, pos)
+            player_status[name], pos = read_varint(data, pos)
+
+        deck = []
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            card, pos = read_varint(data, pos)
+            deck.append(card)
+
+        actions = []
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            action, pos = read_varint(data, pos)
+            actions.append(action)
+
+        return cls(seed, player_class, enemy_classes, player_hp, player_status, deck, actions, enemy_hp)
+
+    def save(self, path):
+        """保存回放文件"""
+        with open(path, "wb") as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        """读取回放文件"""
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+    def create_battle(self):
+        """
+        创建回放开始时的战斗，并开始第一回合
+
+        Returns:
+            BattleSystem: 战斗系统对象
+        """
+        player = PLAYER_CLASSES[self.player_class]()
+        player.set_hp(self.player_hp)
+        for name, value in self.player_status.items():
+            player.add_status(name, value)
+        player.deck = array("H", self.deck)
+        enemies = [ENEMY_CLASSES[enemy_class]() for enemy_class in self.enemy_classes]
+        if self.enemy_hp is not None:
+            for enemy, (hp, max_hp) in zip(enemies, self.enemy_hp):
+                enemy.set_hp(hp, max_hp)
+
+        battle = BattleSystem(player, enemies, seed=self.seed)
+        battle.start_player_turn()
+        return battle
+
+    def play(self, turn=None):
+        """
+        快进回放
+
+        Args:
+            turn: 停在该回合开始时（玩家尚未操作），为None时回放全部操作
+
+        Returns:
+            BattleSystem: 回放后的战斗系统对象
+        """
+        battle = self.create_battle()
+        for action in self.actions:
+            if turn is not None and battle.turn_count >= turn:
+                break
+            apply_action(battle, action)
+        return battle
+
+
+def apply_action(battle, action):
+    """
+    执行一个回放操作，结束回合后与界面一样自动执行敌人行动
+
+    Args:
+        battle: BattleSystem对象
+        action: 操作
+    """
+    if action == ACTION_END_TURN:
+        battle.end_player_turn()
+        if battle.state == BattleState.ENEMY_TURN:
+            battle.execute_enemy_action()
+    elif battle.play_card(action - 1) is None:
+        raise ValueError(f"回放操作无效: 第{battle.turn_count}回合使用第{action}张牌")
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="卡牌Roguelike战斗回放")
+    parser.add_argument("files", nargs="+", help="回放文件")
+    parser.add_argument("--turn", type=int, default=None, help="停在该回合开始时")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        battle = Replay.load(path).play(args.turn)
+        status = battle.get_battle_status()
+        print(f"{path}: 第{status['turn']}回合 {status['state']}  "
+              f"玩家HP {status['player_hp']}/{status['player_max_hp']}  "
+              f"敌人HP {status['enemy_hp']}/{status['enemy_max_hp']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+路线地图
+按种子生成的分支路线，每层有LANES个位置，节点类型为普通战斗、精英战斗、休息处和商店。
+
+节点的类型、遭遇的敌人、战斗种子以及通往下一层的连线都只由 (地图种子, 层, 位置) 的哈希决定，
+不依赖其他节点，所以地图不需要预先生成或保存：RunMap只保存当前节点和下一层可到达的节点，
+前进时再生成新的可选节点。无尽模式下层数没有上限，内存占用也不随层数增长；
+同一种子总是得到同一张地图，存档只需记录种子和当前位置。
+
+用法:
+    run_map = RunMap(seed=42, acts=3)
+    run_map.choices()                     # 下一层可到达的节点
+    node = run_map.advance(0)             # 前往第一个可选节点
+    enemies = run_map.create_enemies(node)
+"""
+import os
+import random
+import sys
+from enum import Enum
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cards import CATALOG, RARITY_WEIGHTS
+from enemies import GoblinWarrior, GoblinArcher, Slime
+
+# 每层的位置数
+LANES = 4
+
+# 每幕的层数，每幕最后一层是精英战斗，前一层是休息处
+ACT_LENGTH = 15
+
+# 每幕开头只有普通战斗的层数
+OPENING_FLOORS = 3
+
+# 每过一幕敌人HP增加的比例
+ACT_HP_SCALE = 0.5
+
+# 精英战斗的敌人HP倍率
+ELITE_HP_SCALE = 1.25
+
+# 休息处恢复的HP比例
+REST_HEAL = 0.3
+
+# 商店出售的卡牌数
+SHOP_SIZE = 5
+
+# 遭遇战中可能出现的敌人
+ENEMY_POOL = (GoblinWarrior, GoblinArcher, Slime)
+
+MASK64 = (1 << 64) - 1
+
+# 哈希的用途标记，保证同一节点的不同属性互不相关
+_START, _KIND, _EDGE, _ENEMY, _SEED = range(5)
+
+
+class NodeType(Enum):
+    """节点类型"""
+    COMBAT = "战斗"
+    ELITE = "精英"
+    REST = "休息"
+    SHOP = "商店"
+
+
+# 开场之后的节点类型权重
+NODE_WEIGHTS = (
+    (NodeType.COMBAT, 10),
+    (NodeType.ELITE, 3),
+    (NodeType.REST, 2),
+    (NodeType.SHOP, 2),
+)
+_WEIGHT_TOTAL = sum(weight for _, weight in NODE_WEIGHTS)
+
+
+def mix(*values):
+    """
+    把若干整数混合为64位哈希（逐个输入做splitmix64），结果只取决于输入，与进程和平台无关
+
+    Args:
+        values: 整数
+
+    Returns:
+        int: 64位哈希
+    """
+    h = 0
+    for value in values:
+        h = (h + (value & MASK64) + 0x9E3779B97F4A7C15) & MASK64
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+        h ^= h >> 31
+    return h
+
+
+class MapNode:
+    """地图节点"""
+
+    __slots__ = ("floor", "lane", "kind", "seed")
+
+    def __init__(self, floor, lane, kind, seed):
+        """
+        初始化节点
+
+        Args:
+            floor: 层数，从0开始
+            lane: 位置
+            kind: 节点类型（NodeType）
+            seed: 节点的随机种子，用于战斗和商店
+        """
+        self.floor = floor
+        self.lane = lane
+        self.kind = kind
+        self.seed = seed
+
+    @property
+    def act(self):
+        """所在的幕，从0开始"""
+        return self.floor // ACT_LENGTH
+
+    def __eq__(self, other):
+        return (isinstance(other, MapNode) and self.floor == other.floor
+                and self.lane == other.lane and self.seed == other.seed)
+
+    def __hash__(self):
+        return hash((self.floor, self.lane, self.seed))
+
+    def __repr__(self):
+        return f"MapNode(floor={self.floor}, lane={self.lane}, kind={self.kind.name})"
+
+
+class RunMap:
+    """按需生成的路线地图"""
+
+    def __init__(self, seed=None, acts=None, lanes=LANES):
+        """
+        初始化地图，当前节点为第0层的起点
+
+        Args:
+            seed: 地图种子，为None时随机生成
+            acts: 幕数，为None时为无尽模式
+            lanes: 每层的位置数
+        """
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.acts = acts
+        self.lanes = lanes
+        self.current = self.node(0, mix(self.seed, _START) % lanes)
+        self._frontier = None  # 下一层可到达的节点，第一次访问时生成
+
+    @property
+    def floors(self):
+        """总层数，无尽模式为None"""
+        return None if self.acts is None else self.acts * ACT_LENGTH
+
+    def node(self, floor, lane):
+        """
+        生成指定位置的节点，不会保存
+
+        Args:
+            floor: 层数
+            lane: 位置
+
+        Returns:
+            MapNode: 节点
+        """
+        step = floor % ACT_LENGTH
+        if step < OPENING_FLOORS:
+            kind = NodeType.COMBAT
+        elif step == ACT_LENGTH - 1:
+            kind = NodeType.ELITE
+        elif step == ACT_LENGTH - 2:
+            kind = NodeType.REST
+        else:
+            roll = mix(self.seed, _KIND, floor, lane) % _WEIGHT_TOTAL
+            for kind, weight in NODE_WEIGHTS:
+                if roll < weight:
+                    break
+                roll -= weight
+        return MapNode(floor, lane, kind, mix(self.seed, _SEED, floor, lane) & 0xFFFFFFFF)
+
+    def children(self, node):
+        """
+        生成节点通往下一层的节点
+
+        每个节点连向下一层相邻的位置（左、正前、右）中由哈希选出的若干个，至少一个
+
+        Args:
+            node: 节点
+
+        Returns:
+            list: 下一层的节点，已到达最后一层时为空
+        """
+        floor = node.floor + 1
+        if self.floors is not None and floor >= self.floors:
+            return []
+        bits = mix(self.seed, _EDGE, node.floor, node.lane)
+        lanes = [lane for offset, lane in enumerate(range(node.lane - 1, node.lane + 2))
+                 if 0 <= lane < self.lanes and bits >> offset & 1]
+        if not lanes:
+            lanes = [node.lane]
+        return [self.node(floor, lane) for lane in lanes]
+
+    def choices(self):
+        """
+        获取下一层可到达的节点
+
+        Returns:
+            list: 节点列表，为空表示路线已走完
+        """
+        if self._frontier is None:
+            self._frontier = self.children(self.current)
+        return self._frontier
+
+    def advance(self, index):
+        """
+        前往下一层的一个可选节点
+
+        Args:
+            index: choices()中的索引
+
+        Returns:
+            MapNode: 新的当前节点
+        """
+        self.current = self.choices()[index]
+        self._frontier = None
+        return self.current
+
+    def goto(self, floor, lane):
+        """
+        直接跳到指定位置，用于从存档恢复
+
+        Args:
+            floor: 层数
+            lane: 位置
+
+        Returns:
+            MapNode: 新的当前节点
+        """
+        self.current = self.node(floor, lane)
+        self._frontier = None
+        return self.current
+
+    def is_complete(self):
+        """路线是否已走完"""
+        return not self.choices()
+
+    def create_enemies(self, node):
+        """
+        创建战斗节点的敌人
+
+        普通战斗为1个敌人，第一幕开场的几层之后可能为2个；精英战斗为2到3个HP更高的敌人。
+        每过一幕敌人HP提高ACT_HP_SCALE
+
+        Args:
+            node: 战斗或精英节点
+
+        Returns:
+            list: 敌人列表
+        """
+        h = mix(self.seed, _ENEMY, node.floor, node.lane)
+        if node.kind == NodeType.ELITE:
+            count = 2 + (h & 1)
+        elif node.floor >= OPENING_FLOORS:
+            count = 1 + (h & 1)
+        else:
+            count = 1
+        h >>= 2
+
+        scale = 1 + ACT_HP_SCALE * node.act
+        if node.kind == NodeType.ELITE:
+            scale *= ELITE_HP_SCALE
+
+        enemies = []
+        for _ in range(count):
+            enemy = ENEMY_POOL[h % len(ENEMY_POOL)]()
+            h //= len(ENEMY_POOL)
+            if scale != 1:
+                max_hp = int(enemy.max_hp * scale)
+                enemy.set_hp(max_hp, max_hp)
+            enemies.append(enemy)
+        return enemies
+
+    def rest_amount(self, player):
+        """休息处为玩家恢复的HP"""
+        return int(player.max_hp * REST_HEAL)
+
+    def shop_cards(self, node):
+        """
+        商店出售的卡牌：按稀有度权重从卡牌目录中抽取不重复的基础版卡牌，同一节点总是出售同样的卡牌
+
+        Args:
+            node: 商店节点
+
+        Returns:
+            list: 卡牌定义列表
+        """
+        rng = random.Random(node.seed)
+        pool = [card for card in CATALOG.definitions[::2] if RARITY_WEIGHTS[card.rarity] > 0]
+        cards = []
+        while pool and len(cards) < SHOP_SIZE:
+            card = rng.choices(pool, weights=[RARITY_WEIGHTS[card.rarity] for card in pool])[0]
+            pool.remove(card)
+            cards.append(card)
+        return cards
+
+    def describe(self, node):
+        """
+        节点的说明文字
+
+        Args:
+            node: 节点
+
+        Returns:
+            str: 说明
+        """
+        if node.kind == NodeType.REST:
+            return f"第{node.floor + 1}层 休息处（恢复{REST_HEAL:.0%}HP）"
+        if node.kind == NodeType.SHOP:
+            return f"第{node.floor + 1}层 商店（{SHOP_SIZE}张卡牌中选择1张）"
+        names = "、".join(enemy.name for enemy in self.create_enemies(node))
+        label = "精英战斗" if node.kind == NodeType.ELITE else "战斗"
+        return f"第{node.floor + 1}层 {label}：{names}"
@@ -0,0 +1,444 @@
+"""
+存档日志
+只追加的单文件存档：每进入一场战斗写入一个紧凑快照，之后的每个操作追加一条记录。
+读档时用mmap扫描文件，从最后一个快照恢复，再重放其后的记录。
+
+写入在后台线程完成：每次出牌只把编码好的记录放入队列，不会阻塞帧循环；
+后台线程批量写入，并按FSYNC_INTERVAL合并fsync。文件超过COMPACT_BYTES时，
+在下一个快照处把文件改写为只包含该快照，避免无限增长。
+
+文件格式:
+    魔数 b"CRSJ" | 版本(varint) | {记录}
+    记录 = 类型(1字节) | 数据长度(varint) | 数据 | CRC32(4字节，小端，覆盖类型和数据)
+快照数据的整数和字符串编码与回放格式相同；其他记录的数据是一个varint。
+意外中断留下的不完整记录在读档时被忽略，继续写入前截掉。
+
+用法:
+    journal = SaveJournal("save.journal")
+    journal.snapshot(RunSnapshot.capture(run_map, player))
+    journal.action(3)
+    journal.close()
+
+    snapshot, records, end = read_journal("save.journal")
+    journal = SaveJournal("save.journal", resume_at=end)
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from replay import PLAYER_CLASSES, write_varint, read_varint, write_str, read_str
+from statuses import STATUSES
+
+JOURNAL_MAGIC = b"CRSJ"
+JOURNAL_VERSION = 1
+
+# 记录类型
+RECORD_SNAPSHOT = 1  # 进入战斗前的局面（RunSnapshot）
+RECORD_ACTION = 2  # 战斗操作，编码与回放相同：0结束回合，i+1使用第i张手牌
+RECORD_UNDO = 3  # 撤销本回合上一张卡牌
+RECORD_BUY = 4  # 选择商店卡牌：0表示跳过，否则为卡牌ID+1
+RECORD_CHOOSE = 5  # 选择下一层的节点：RunMap.choices()中的索引
+
+# 合并fsync的最长间隔（秒）
+FSYNC_INTERVAL = 0.5
+
+# 文件超过该大小时在下一个快照处压缩
+COMPACT_BYTES = 1 << 20
+
+_CRC = struct.Struct("<I")
+
+# 读取或重放存档可能抛出的异常：文件无法读取、格式错误、快照中的职业或状态未知，
+# 以及卡牌目录或地图与存档不一致时的越界
+JOURNAL_ERRORS = (OSError, ValueError, KeyError, IndexError, struct.error)
+
+
+class RunSnapshot:
+    """一局游戏在进入战斗前的局面"""
+
+    __slots__ = ("map_seed", "acts", "floor", "lane", "player_class", "max_hp", "hp", "status", "deck")
+
+    def __init__(self, map_seed, acts, floor, lane, player_class, max_hp, hp, status, deck):
+        """
+        初始化快照
+
+        Args:
+            map_seed: 地图种子
+            acts: 地图幕数，None表示无尽模式
+            floor: 当前节点的层数
+            lane: 当前节点的位置
+            player_class: 玩家职业类名
+            max_hp: 玩家最大HP
+            hp: 玩家HP
+            status: 玩家状态效果（状态名称 -> 层数）
+            deck: 牌组卡牌ID列表
+        """
+        self.map_seed = map_seed
+        self.acts = acts
+        self.floor = floor
+        self.lane = lane
+        self.player_class = player_class
+        self.max_hp = max_hp
+        self.hp = hp
+        self.status = status
+        self.deck = deck
+
+    @classmethod
+    def capture(cls, run_map, player):
+        """
+        记录当前局面
+
+        Args:
+            run_map: RunMap对象，当前节点为即将进入的节点
+            player: 玩家角色
+        """
+        return cls(
+            map_seed=run_map.seed,
+            acts=run_map.acts,
+            floor=run_map.current.floor,
+            lane=run_map.current.lane,
+            player_class=type(player).__name__,
+            max_hp=player.max_hp,
+            hp=player.hp,
+            status={STATUSES.names[status_id]: value for status_id, value in player.status_effects.items()},
+            deck=list(player.deck),
+        )
+
+    def create_player(self):
+        """
+        创建快照中的玩家角色
+
+        Returns:
+            Character: 玩家角色
+        """
+        player = PLAYER_CLASSES[self.player_class]()
+        player.set_hp(self.hp, self.max_hp)
+        for name, value in self.status.items():
+            player.add_status(name, value)
+        player.deck = array("H", self.deck)
+        return player
+
+    def encode(self):
+        """
+        编码为二进制
+
+        Returns:
+            bytes: 快照数据
+        """
+        buffer = bytearray()
+        write_varint(buffer, self.map_seed)
+        write_varint(buffer, 0 if self.acts is None else self.acts + 1)
+        write_varint(buffer, self.floor)
+        write_varint(buffer, self.lane)
+        write_str(buffer, self.player_class)
+        write_varint(buffer, self.max_hp)
+        write_varint(buffer, self.hp)
+        write_varint(buffer, len(self.status))
+        for name, value in self.status.items():
+            write_str(buffer, name)
+            write_varint(buffer, value)
+        write_varint(buffer, len(self.deck))
+        for card in self.deck:
+            write_varint(buffer, card)
+        return bytes(buffer)
+
+    @classmethod
+    def decode(cls, data):
+        """
+        从二进制解码
+
+        Args:
+            data: 快照数据
+        """
+        map_seed, pos = read_varint(data, 0)
+        acts, pos = read_varint(data, pos)
+        floor, pos = read_varint(data, pos)
+        lane, pos = read_varint(data, pos)
+        player_class, pos = read_str(data, pos)
+        max_hp, pos = read_varint(data, pos)
+        hp, pos = read_varint(data, pos)
+        status = {}
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            name, pos = read_str(data, pos)
+            status[name], pos = read_varint(data, pos)
+        deck = []
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            card, pos = read_varint(data, pos)
+            deck.append(card)
+        return cls(map_seed, None if acts == 0 else acts - 1, floor, lane, player_class, max_hp, hp, status, deck)
+
+
+def encode_record(kind, payload):
+    """
+    编码一条记录
+
+    Args:
+        kind: 记录类型
+        payload: 数据（bytes）
+
+    Returns:
+        bytes: 记录
+    """
+    buffer = bytearray((kind,))
+    write_varint(buffer, len(payload))
+    buffer += payload
+    crc = zlib.crc32(payload, zlib.crc32(buffer[:1]))
+    buffer += _CRC.pack(crc)
+    return bytes(buffer)
+
+
+def _header():
+    """文件头"""
+    buffer = bytearray(JOURNAL_MAGIC)
+    write_varint(buffer, JOURNAL_VERSION)
+    return bytes(buffer)
+
+
+def read_journal(path):
+    """
+    读取存档日志
+
+    用mmap扫描记录头，只解码最后一个快照和其后的记录；遇到不完整或校验失败的记录时停止
+
+    Args:
+        path: 存档路径
+
+    Returns:
+        tuple: (RunSnapshot或None, [(记录类型, 值), ...], 有效数据的结尾位置)
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("不是有效的存档")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+                raise ValueError("不是有效的存档")
+            version, pos = read_varint(data, len(JOURNAL_MAGIC))
+            if version != JOURNAL_VERSION:
+                raise ValueError(f"不支持的存档版本: {version}")
+
+            # 第一遍只定位记录，找到最后一个快照
+            records = []  # (类型, 数据起始位置, 数据结尾位置)
+            last_snapshot = None
+            size = len(data)
+            while pos < size:
+                kind = data[pos]
+                try:
+                    length, start = read_varint(data, pos + 1)
+                except ValueError:
+                    break
+                end = start + length
+                if end + _CRC.size > size:
+                    break
+                crc = zlib.crc32(data[start:end], zlib.crc32(data[pos:pos + 1]))
+                if _CRC.unpack_from(data, end)[0] != crc:
+                    break
+                if kind == RECORD_SNAPSHOT:
+                    last_snapshot = len(records)
+                records.append((kind, start, end))
+                pos = end + _CRC.size
+
+            snapshot = None
+            tail = records
+            if last_snapshot is not None:
+                _, start, end = records[last_snapshot]
+                snapshot = RunSnapshot.decode(data[start:end])
+                tail = records[last_snapshot + 1:]
+            return snapshot, [(kind, read_varint(data, start)[0]) for kind, start, _ in tail], pos
+
+
+class SaveJournal:
+    """只追加的存档日志，记录由后台线程写入"""
+
+    def __init__(self, path, resume_at=None, fsync_interval=FSYNC_INTERVAL, compact_bytes=COMPACT_BYTES):
+        """
+        打开存档日志
+
+        Args:
+            path: 存档路径
+            resume_at: 继续写入已有存档时，read_journal()返回的有效数据结尾位置；为None时新建存档
+            fsync_interval: 合并fsync的最长间隔（秒）
+            compact_bytes: 文件超过该大小时在下一个快照处压缩
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        if resume_at is None:
+            # 文件头立即落盘，避免刚创建就中断时留下空文件
+            self._file = open(path, "wb")
+            self._file.write(_header())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        else:
+            self._file = open(path, "r+b")
+            self._file.truncate(resume_at)
+            self._file.seek(resume_at)
+        self.size = self._file.tell()  # 已提交记录写入后的文件大小
+
+        self._pending = []  # 等待写入的 (记录, 是否压缩)
+        self._submitted = 0
+        self._written = 0
+        self._sync_requests = 0  # flush()请求fsync的次数，fsync由后台线程执行
+        self._synced = 0  # 后台线程已完成的fsync请求数
+        self._closed = False
+        self._error = None  # 后台线程写入失败时的异常
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="save-journal", daemon=True)
+        self._thread.start()
+
+    def _submit(self, record, compact=False):
+        """把记录放入写入队列"""
+        with self._cond:
+            if self._closed:
+                raise ValueError("存档日志已关闭")
+            self._check()
+            self._pending.append((record, compact))
+            self._submitted += 1
+            self._cond.notify()
+        self.size = len(_header()) + len(record) if compact else self.size + len(record)
+
+    def snapshot(self, state):
+        """
+        写入快照，文件超过compact_bytes时改写为只包含该快照
+
+        Args:
+            state: RunSnapshot对象
+        """
+        self._submit(encode_record(RECORD_SNAPSHOT, state.encode()), self.size >= self.compact_bytes)
+
+    def _value(self, kind, value):
+        """写入数据为一个varint的记录"""
+        payload = bytearray()
+        write_varint(payload, value)
+        self._submit(encode_record(kind, payload))
+
+    def action(self, action):
+        """写入战斗操作"""
+        self._value(RECORD_ACTION, action)
+
+    def undo(self):
+        """写入撤销"""
+        self._value(RECORD_UNDO, 0)
+
+    def buy(self, card_id):
+        """写入商店卡牌选择，card_id为None表示跳过"""
+        self._value(RECORD_BUY, 0 if card_id is None else card_id + 1)
+
+    def choose(self, index):
+        """写入节点选择"""
+        self._value(RECORD_CHOOSE, index)
+
+    def _check(self):
+        """后台线程写入失败时抛出OSError，调用时需持有锁"""
+        if self._error is not None:
+            raise OSError(f"存档写入失败: {self._error}") from self._error
+
+    def flush(self):
+        """
+        等待已提交的记录全部写入并fsync，写入失败时抛出OSError
+
+        fsync在后台线程中执行，压缩可能随时替换文件对象，只有后台线程能安全地使用它
+        """
+        with self._cond:
+            if self._closed:
+                self._check()
+                return
+            self._sync_requests += 1
+            request = self._sync_requests
+            self._cond.notify()
+            while self._synced < request and self._error is None:
+                self._cond.wait()
+            self._check()
+
+    def close(self):
+        """写入剩余记录并关闭，写入失败时抛出OSError"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._file.close()
+        with self._cond:
+            self._check()
+
+    def discard(self):
+        """关闭并删除存档，用于一局游戏结束"""
+        try:
+            self.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _run(self):
+        """后台写入循环"""
+        dirty = False  # 有已写入但未fsync的数据
+        last_sync = time.monotonic()
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed and self._synced == self._sync_requests:
+                    if dirty:
+                        timeout = self.fsync_interval - (time.monotonic() - last_sync)
+                        if timeout <= 0 or not self._cond.wait(timeout):
+                            break
+                    else:
+                        self._cond.wait()
+                batch, self._pending = self._pending, []
+                closed = self._closed
+                sync_request = self._sync_requests
+
+            try:
+                chunk = []
+                for record, compact in batch:
+                    if compact:
+                        self._write(chunk)
+                        chunk = []
+                        self._compact(record)
+                    else:
+                        chunk.append(record)
+                if self._write(chunk):
+                    dirty = True
+
+                syncing = closed or sync_request != self._synced
+                if dirty and (syncing or time.monotonic() - last_sync >= self.fsync_interval):
+                    os.fsync(self._file.fileno())
+                    dirty = False
+                    last_sync = time.monotonic()
+            except Exception as e:
+                # 保存异常并唤醒等待的线程，由flush、close和下一次写入抛出
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                self._written += len(batch)
+                self._synced = sync_request
+                self._cond.notify_all()
+            if closed and not batch:
+                return
+
+    def _write(self, chunk):
+        """写入一批记录，返回是否写入了数据"""
+        if not chunk:
+            return False
+        self._file.write(b"".join(chunk))
+        self._file.flush()
+        return True
+
+    def _compact(self, record):
+        """把存档改写为只包含一个快照，先写临时文件再原子替换"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_header())
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, "ab")
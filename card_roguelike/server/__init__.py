@@ -0,0 +1,10 @@
+"""
+战斗服务器模块
+"""
+from .battle_server import BattleServer, Session, battle_view
+from .load_client import LoadStats, run_load
+
+__all__ = [
+    'BattleServer', 'Session', 'battle_view',
+    'LoadStats', 'run_load'
+]
@@ -0,0 +1,375 @@
+"""
+无界面战斗服务器
+基于asyncio的本地服务器，通过TCP或Unix套接字上的JSON Lines协议同时托管大量互相独立的战斗会话，
+供出牌机器人和测试工具驱动战斗引擎，不需要为每个会话打开pygame窗口。
+
+协议：每行一个JSON请求，服务器按顺序每行返回一个JSON响应，请求中的id原样带回。
+    {"cmd": "new", "enemies": ["slime"], "seed": 1}  -> {"ok": true, "session": 1, "state": {...}}
+    {"cmd": "play", "session": 1, "card": 0}         -> {"ok": true, "diff": {...}}
+    {"cmd": "end_turn", "session": 1}                -> {"ok": true, "diff": {...}}
+    {"cmd": "state", "session": 1}                   -> {"ok": true, "state": {...}}
+    {"cmd": "close", "session": 1}                   -> {"ok": true}
+    {"cmd": "stats"}                                 -> {"ok": true, "stats": {...}}
+出错时返回 {"ok": false, "error": "..."}。diff只包含与该会话上一次返回的状态相比发生变化的字段。
+结束回合后自动执行敌人行动，与游戏界面一致。长时间没有请求的会话会被回收。
+
+用法:
+    python server/battle_server.py --port 8765
+    python server/battle_server.py --unix /tmp/battle.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_system import BattleSystem, BattleState
+from characters import Warrior
+from simulation.batch_runner import ENEMY_TYPES
+
+# 默认端口
+DEFAULT_PORT = 8765
+
+# 会话空闲多久后被回收（秒）
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+# 默认会话数上限
+DEFAULT_MAX_SESSIONS = 100000
+
+# 单行请求的长度上限（字节）
+MAX_LINE = 1 << 16
+
+
+class ServerError(Exception):
+    """请求错误，返回给客户端"""
+
+
+def _int_field(request, name, required=True):
+    """
+    读取请求中的整数字段，布尔值不算整数
+
+    Args:
+        request: 请求字典
+        name: 字段名
+        required: 是否必须提供
+
+    Returns:
+        int: 字段值，没有提供且非必须时为None
+    """
+    value = request.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ServerError(f"{name}必须是整数")
+    return value
+
+
+def _encode(response):
+    """把响应编码为一行JSON"""
+    return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class Session:
+    """战斗会话"""
+
+    __slots__ = ("session_id", "battle", "view", "last_active")
+
+    def __init__(self, session_id, battle, now):
+        """
+        初始化会话
+
+        Args:
+            session_id: 会话ID
+            battle: BattleSystem对象
+            now: 当前时间
+        """
+        self.session_id = session_id
+        self.battle = battle
+        self.view = {}  # 上一次返回给客户端的状态
+        self.last_active = now
+
+
+def battle_view(battle):
+    """
+    获取可序列化为JSON的战斗状态
+
+    在get_battle_status的基础上加入手牌和每个敌人的状态，去掉战斗日志
+
+    Args:
+        battle: BattleSystem对象
+
+    Returns:
+        dict: 战斗状态
+    """
+    view = {key: value for key, value in battle.get_battle_status().items() if key != "log"}
+    view["hand"] = [[card.key, card.upgraded, card.cost] for card in battle.player.hand]
+    view["enemies"] = [
+        [enemy.name, enemy.hp, enemy.max_hp, enemy.armor,
+         enemy.intent.value if enemy.intent else None, enemy.intent_value]
+        for enemy in battle.enemies
+    ]
+    return view
+
+
+class BattleServer:
+    """战斗会话服务器"""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_sessions=DEFAULT_MAX_SESSIONS, clock=time.monotonic):
+        """
+        初始化服务器
+
+        Args:
+            idle_timeout: 会话空闲多久后被回收（秒）
+            max_sessions: 会话数上限
+            clock: 时间函数，测试时可替换
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.sessions = OrderedDict()  # 会话ID -> Session，按最近活动时间排序
+        self.next_id = 1
+        self._evict_task = None
+        self.stats = {"requests": 0, "errors": 0, "created": 0, "closed": 0, "evicted": 0, "connections": 0}
+        self._commands = {
+            "new": self._cmd_new,
+            "play": self._cmd_play,
+            "end_turn": self._cmd_end_turn,
+            "state": self._cmd_state,
+            "close": self._cmd_close,
+            "stats": self._cmd_stats,
+        }
+
+    def handle(self, request):
+        """
+        处理一个请求
+
+        Args:
+            request: 请求字典
+
+        Returns:
+            dict: 响应字典
+        """
+        self.stats["requests"] += 1
+        try:
+            if not isinstance(request, dict):
+                raise ServerError("请求必须是JSON对象")
+            name = request.get("cmd")
+            command = self._commands.get(name) if isinstance(name, str) else None
+            if command is None:
+                raise ServerError(f"未知命令: {name}")
+            response = command(request)
+        except ServerError as e:
+            self.stats["errors"] += 1
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # 未预料到的请求内容不能让连接断开，也不能影响其他会话
+            self.stats["errors"] += 1
+            response = {"ok": False, "error": f"服务器内部错误: {type(e).__name__}"}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def handle_line(self, line):
+        """
+        处理一行JSON请求
+
+        Args:
+            line: 请求行（bytes或str）
+
+        Returns:
+            bytes: 响应行，以换行结尾
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.stats["requests"] += 1
+            self.stats["errors"] += 1
+            return _encode({"ok": False, "error": "请求不是有效的JSON"})
+        return _encode(self.handle(request))
+
+    def _session(self, request):
+        """获取请求的会话并更新活动时间"""
+        session_id = _int_field(request, "session")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ServerError(f"会话不存在: {session_id}")
+        session.last_active = self.clock()
+        self.sessions.move_to_end(session.session_id)
+        return session
+
+    def _diff(self, session):
+        """计算会话状态相对上一次返回的变化"""
+        view = battle_view(session.battle)
+        last = session.view
+        session.view = view
+        return {key: value for key, value in view.items() if last.get(key) != value}
+
+    def _cmd_new(self, request):
+        """创建战斗会话"""
+        self.evict_idle()
+        if len(self.sessions) >= self.max_sessions:
+            raise ServerError("会话数已达上限")
+        keys = request.get("enemies") or ["goblin_warrior"]
+        if isinstance(keys, str):
+            keys = [keys]
+        try:
+            enemies = [ENEMY_TYPES[key]() for key in keys]
+        except (KeyError, TypeError):
+            raise ServerError(f"未知敌人类型: {keys}，可选: {', '.join(ENEMY_TYPES)}")
+        seed = _int_field(request, "seed", required=False)
+        if seed is not None and seed < 0:
+            raise ServerError("seed必须是非负整数")
+
+        battle = BattleSystem(Warrior(), enemies, seed=seed, record_events=False)
+        battle.start_player_turn()
+        session = Session(self.next_id, battle, self.clock())
+        self.next_id += 1
+        self.sessions[session.session_id] = session
+        self.stats["created"] += 1
+        session.view = battle_view(battle)
+        return {"ok": True, "session": session.session_id, "seed": battle.seed, "state": session.view}
+
+    def _cmd_play(self, request):
+        """使用手牌"""
+        session = self._session(request)
+        card_index = _int_field(request, "card")
+        if session.battle.state != BattleState.PLAYER_TURN:
+            raise ServerError("不是玩家回合")
+        if session.battle.play_card(card_index) is None:
+            raise ServerError(f"无法使用第{card_index}张手牌")
+        return {"ok": True, "diff": self._diff(session)}
+
+    def _cmd_end_turn(self, request):
+        """结束回合，自动执行敌人行动"""
+        session = self._session(request)
+        battle = session.battle
+        if battle.state != BattleState.PLAYER_TURN:
+            raise ServerError("不是玩家回合")
+        battle.end_player_turn()
+        if battle.state == BattleState.ENEMY_TURN:
+            battle.execute_enemy_action()
+        return {"ok": True, "diff": self._diff(session)}
+
+    def _cmd_state(self, request):
+        """获取完整状态"""
+        session = self._session(request)
+        session.view = battle_view(session.battle)
+        return {"ok": True, "state": session.view}
+
+    def _cmd_close(self, request):
+        """关闭会话"""
+        session = self._session(request)
+        del self.sessions[session.session_id]
+        self.stats["closed"] += 1
+        return {"ok": True}
+
+    def _cmd_stats(self, request):
+        """服务器统计"""
+        return {"ok": True, "stats": dict(self.stats, sessions=len(self.sessions))}
+
+    def evict_idle(self):
+        """
+        回收空闲超时的会话，会话按活动时间排序，只需检查最前面的
+
+        Returns:
+            int: 回收的会话数
+        """
+        deadline = self.clock() - self.idle_timeout
+        sessions = self.sessions
+        evicted = 0
+        while sessions:
+            session = next(iter(sessions.values()))
+            if session.last_active > deadline:
+                break
+            del sessions[session.session_id]
+            evicted += 1
+        self.stats["evicted"] += evicted
+        return evicted
+
+    async def handle_client(self, reader, writer):
+        """处理一个连接：逐行读取请求，按顺序写回响应"""
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(_encode({"ok": False, "error": f"请求超过{MAX_LINE}字节"}))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    writer.write(self.handle_line(line))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _evict_loop(self):
+        """定期回收空闲会话"""
+        interval = max(1.0, self.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """
+        开始监听
+
+        Args:
+            host: 监听地址
+            port: 端口，为0时由系统分配
+            unix_path: Unix套接字路径，指定时忽略host和port
+
+        Returns:
+            asyncio.Server: 服务器对象
+        """
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        if self._evict_task is None:
+            self._evict_task = asyncio.get_running_loop().create_task(self._evict_loop())
+        return server
+
+    def stop(self):
+        """停止回收空闲会话的后台任务"""
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+            self._evict_task = None
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        """监听并一直运行"""
+        server = await self.start(host, port, unix_path)
+        address = unix_path or "%s:%d" % server.sockets[0].getsockname()[:2]
+        print(f"战斗服务器已启动: {address}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="无界面战斗服务器（JSON Lines）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="端口")
+    parser.add_argument("--unix", default=None, help="改为监听Unix套接字")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="会话空闲回收时间（秒）")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="会话数上限")
+    args = parser.parse_args(argv)
+
+    server = BattleServer(args.idle_timeout, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
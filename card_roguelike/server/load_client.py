@@ -0,0 +1,206 @@
+"""
+战斗服务器压测客户端
+开启多个并发连接，每个连接不断创建会话并用简单策略打完战斗（依次尝试使用第一张手牌，无法使用时结束回合），
+统计请求延迟的p50/p99和每秒完成的会话数。
+
+用法:
+    python server/load_client.py --port 8765 -c 64 -n 2000
+    python server/load_client.py --unix /tmp/battle.sock -c 64 --duration 10
+    python server/load_client.py --spawn -c 64 -n 2000      # 在本进程内启动服务器
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.battle_server import BattleServer, DEFAULT_PORT
+from simulation.batch_runner import ENEMY_TYPES, DEFAULT_MAX_TURNS
+
+
+class LoadStats:
+    """压测统计"""
+
+    def __init__(self):
+        """初始化统计"""
+        self.latencies = array("d")  # 每个请求的往返时间（秒）
+        self.sessions = 0
+        self.victories = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def percentile(self, percentile):
+        """请求延迟的分位数（最近秩法），单位为秒"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[max(0, -(-percentile * len(ordered) // 100) - 1)]
+
+    def to_dict(self):
+        """
+        转换为字典
+
+        Returns:
+            dict: 请求数、会话数、胜场、延迟分位数（毫秒）、每秒会话数和每秒请求数
+        """
+        elapsed = self.elapsed or 1e-9
+        return {
+            "requests": len(self.latencies),
+            "sessions": self.sessions,
+            "victories": self.victories,
+            "errors": self.errors,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "sessions_per_sec": self.sessions / elapsed,
+            "requests_per_sec": len(self.latencies) / elapsed,
+        }
+
+
+class Connection:
+    """一个客户端连接，请求按顺序发送并等待响应"""
+
+    def __init__(self, reader, writer, stats):
+        self.reader = reader
+        self.writer = writer
+        self.stats = stats
+
+    async def request(self, **request):
+        """发送请求并等待响应，记录往返时间"""
+        start = time.perf_counter()
+        self.writer.write(json.dumps(request, separators=(",", ":")).encode("utf-8") + b"\n")
+        line = await self.reader.readline()
+        self.stats.latencies.append(time.perf_counter() - start)
+        if not line:
+            raise ConnectionError("服务器关闭了连接")
+        return json.loads(line)
+
+    async def play_session(self, enemy, seed):
+        """创建会话并打完一场战斗，返回是否获胜"""
+        response = await self.request(cmd="new", enemies=[enemy], seed=seed)
+        session = response["session"]
+        state = response["state"]["state"]
+        for _ in range(DEFAULT_MAX_TURNS * 10):
+            if state not in ("玩家回合", "敌人回合"):
+                break
+            response = await self.request(cmd="play", session=session, card=0)
+            if not response["ok"]:
+                response = await self.request(cmd="end_turn", session=session)
+            state = response.get("diff", {}).get("state", state)
+        await self.request(cmd="close", session=session)
+        return state == "胜利"
+
+    async def close(self):
+        """关闭连接"""
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _open(host, port, unix_path):
+    """建立连接"""
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def run_load(host="127.0.0.1", port=DEFAULT_PORT, unix_path=None, connections=32,
+                   sessions=1000, duration=None, enemies=None, seed=0):
+    """
+    压测战斗服务器
+
+    Args:
+        host: 服务器地址
+        port: 端口
+        unix_path: Unix套接字路径，指定时忽略host和port
+        connections: 并发连接数
+        sessions: 总会话数，duration不为None时忽略
+        duration: 压测时长（秒），为None时按会话数结束
+        enemies: 轮流挑战的敌人类型，默认全部
+        seed: 第一场战斗的种子，之后依次递增
+
+    Returns:
+        LoadStats: 压测统计
+    """
+    enemies = list(enemies or ENEMY_TYPES)
+    stats = LoadStats()
+    counter = itertools.count()
+    deadline = None if duration is None else time.perf_counter() + duration
+
+    async def worker():
+        connection = Connection(*await _open(host, port, unix_path), stats)
+        try:
+            while True:
+                index = next(counter)
+                if deadline is None and index >= sessions:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                try:
+                    won = await connection.play_session(enemies[index % len(enemies)], seed + index)
+                except (KeyError, ValueError):
+                    stats.errors += 1
+                    continue
+                stats.sessions += 1
+                stats.victories += won
+        finally:
+            await connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def _spawn_and_run(args):
+    """在本进程内启动服务器后压测"""
+    server = BattleServer()
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return await run_load("127.0.0.1", port, None, args.connections, args.sessions, args.duration, args.enemy)
+    finally:
+        listener.close()
+        server.stop()
+
+
+def format_report(stats):
+    """格式化压测报告"""
+    result = stats.to_dict()
+    return (
+        f"会话: {result['sessions']}（胜利 {result['victories']}，错误 {result['errors']}）  "
+        f"请求: {result['requests']}\n"
+        f"延迟: p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms\n"
+        f"吞吐: {result['sessions_per_sec']:,.1f} 会话/秒  {result['requests_per_sec']:,.0f} 请求/秒"
+    )
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="战斗服务器压测客户端")
+    parser.add_argument("--host", default="127.0.0.1", help="服务器地址")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="端口")
+    parser.add_argument("--unix", default=None, help="连接Unix套接字")
+    parser.add_argument("--spawn", action="store_true", help="在本进程内启动服务器")
+    parser.add_argument("-c", "--connections", type=int, default=32, help="并发连接数")
+    parser.add_argument("-n", "--sessions", type=int, default=1000, help="总会话数")
+    parser.add_argument("--duration", type=float, default=None, help="压测时长（秒），指定时忽略-n")
+    parser.add_argument("-e", "--enemy", action="append", choices=list(ENEMY_TYPES), help="敌人类型，可重复指定")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+
+    if args.spawn:
+        stats = asyncio.run(_spawn_and_run(args))
+    else:
+        stats = asyncio.run(run_load(args.host, args.port, args.unix, args.connections,
+                                     args.sessions, args.duration, args.enemy))
+    print(json.dumps(stats.to_dict(), indent=2) if args.json else format_report(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+模拟模块
+"""
+from .policies import Policy, GreedyPolicy, RandomPolicy, POLICIES
+from .batch_runner import BatchStats, ENEMY_TYPES, run_battle, run_batch
+from .vector_engine import VectorBattleEngine, run_vector_batch
+from .mcts import MCTSPolicy
+from .deck_sweep import enumerate_decks, run_sweep
+
+__all__ = [
+    'Policy', 'GreedyPolicy', 'RandomPolicy', 'POLICIES',
+    'BatchStats', 'ENEMY_TYPES', 'run_battle', 'run_batch',
+    'VectorBattleEngine', 'run_vector_batch',
+    'MCTSPolicy',
+    'enumerate_decks', 'run_sweep'
+]
@@ -0,0 +1,324 @@
+"""
+无界面批量战斗模拟
+不依赖pygame，使用进程池批量运行战斗并汇总胜率、回合数和剩余HP分布
+
+用法:
+    python simulation/batch_runner.py -n 10000 -p greedy
+"""
+import argparse
+import os
+import random
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_system import BattleSystem, BattleState
+from battle_metrics import BattleMetrics
+from characters import Warrior
+from enemies import GoblinWarrior, GoblinArcher, Slime, ExpectimaxAI
+from simulation.policies import POLICIES, GreedyPolicy
+
+# 可模拟的敌人类型
+ENEMY_TYPES = {
+    "goblin_warrior": GoblinWarrior,
+    "goblin_archer": GoblinArcher,
+    "slime": Slime,
+}
+
+# 单场战斗的回合上限，防止双方都无法击杀时死循环
+DEFAULT_MAX_TURNS = 100
+
+# 每个进程任务包含的战斗场数
+DEFAULT_CHUNK_SIZE = 250
+
+
+class BatchStats:
+    """批量战斗统计结果"""
+
+    def __init__(self, enemy_name=""):
+        """
+        初始化统计结果
+
+        Args:
+            enemy_name: 敌人名称
+        """
+        self.enemy_name = enemy_name
+        self.battles = 0
+        self.victories = 0
+        self.defeats = 0
+        self.timeouts = 0
+        self.total_turns = 0
+        self.turn_counts = Counter()  # 回合数 -> 场数
+        self.hp_remaining = Counter()  # 剩余HP -> 场数
+
+    def add(self, result):
+        """
+        记录一场战斗结果
+
+        Args:
+            result: run_battle返回的结果字典
+        """
+        if not self.enemy_name:
+            self.enemy_name = result["enemy"]
+        self.battles += 1
+        if result["outcome"] == "victory":
+            self.victories += 1
+        elif result["outcome"] == "defeat":
+            self.defeats += 1
+        else:
+            self.timeouts += 1
+        self.total_turns += result["turns"]
+        self.turn_counts[result["turns"]] += 1
+        self.hp_remaining[result["player_hp"]] += 1
+
+    def merge(self, other):
+        """
+        合并另一份统计结果
+
+        Args:
+            other: BatchStats对象
+        """
+        if not self.enemy_name:
+            self.enemy_name = other.enemy_name
+        self.battles += other.battles
+        self.victories += other.victories
+        self.defeats += other.defeats
+        self.timeouts += other.timeouts
+        self.total_turns += other.total_turns
+        self.turn_counts.update(other.turn_counts)
+        self.hp_remaining.update(other.hp_remaining)
+
+    @property
+    def win_rate(self):
+        """胜率"""
+        return self.victories / self.battles if self.battles else 0.0
+
+    @property
+    def average_turns(self):
+        """平均回合数"""
+        return self.total_turns / self.battles if self.battles else 0.0
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "enemy": self.enemy_name,
+            "battles": self.battles,
+            "victories": self.victories,
+            "defeats": self.defeats,
+            "timeouts": self.timeouts,
+            "win_rate": self.win_rate,
+            "average_turns": self.average_turns,
+            "turn_counts": dict(sorted(self.turn_counts.items())),
+            "hp_remaining": dict(sorted(self.hp_remaining.items())),
+        }
+
+
+def run_battle(enemy_cls, policy, max_turns=DEFAULT_MAX_TURNS, seed=None, deck=None, metrics=None):
+    """
+    运行一场完整的战斗
+
+    Args:
+        enemy_cls: 敌人类
+        policy: 出牌策略
+        max_turns: 回合上限
+        seed: 战斗随机种子
+        deck: 玩家牌组（卡牌ID列表），默认使用职业的初始卡组
+        metrics: 阶段计时统计对象，为None时不计时
+
+    Returns:
+        dict: 战斗结果
+    """
+    player = Warrior()
+    if deck is not None:
+        player.deck = array("H", deck)
+    enemy = enemy_cls()
+    battle = BattleSystem(player, enemy, seed=seed, record_events=False)
+    if metrics is not None:
+        battle.enable_metrics(metrics)
+    battle.start_player_turn()
+
+    while not battle.is_battle_over() and battle.turn_count <= max_turns:
+        card_index = policy.choose_action(battle)
+        # 策略选择结束回合或给出无效卡牌时都结束回合，避免死循环
+        if card_index is None or battle.play_card(card_index) is None:
+            battle.end_player_turn()
+            if battle.state == BattleState.ENEMY_TURN:
+                battle.execute_enemy_action()
+
+    if battle.state == BattleState.VICTORY:
+        outcome = "victory"
+    elif battle.state == BattleState.DEFEAT:
+        outcome = "defeat"
+    else:
+        outcome = "timeout"
+
+    return {
+        "enemy": enemy.name,
+        "seed": battle.seed,
+        "outcome": outcome,
+        "turns": battle.turn_count,
+        "player_hp": player.hp,
+        "enemy_hp": enemy.hp,
+    }
+
+
+def _run_chunk(enemy_key, policy, count, seed, max_turns, enemy_ai=None, collect_metrics=False):
+    """
+    在工作进程中运行一批战斗
+
+    Args:
+        enemy_key: 敌人类型名称
+        policy: 出牌策略
+        count: 战斗场数
+        seed: 随机种子
+        max_turns: 回合上限
+        enemy_ai: 敌人AI，为None时使用敌人类自身的设置
+        collect_metrics: 是否统计阶段计时
+
+    Returns:
+        tuple: (敌人类型名称, BatchStats, BattleMetrics或None)
+    """
+    rng = random.Random(seed)
+    metrics = BattleMetrics() if collect_metrics else None
+    policy.seed(seed)
+    enemy_cls = ENEMY_TYPES[enemy_key]
+    previous_ai = enemy_cls.AI
+    if enemy_ai is not None:
+        enemy_cls.AI = enemy_ai
+    stats = BatchStats()
+    try:
+        for _ in range(count):
+            stats.add(run_battle(enemy_cls, policy, max_turns, seed=rng.getrandbits(32), metrics=metrics))
+    finally:
+        enemy_cls.AI = previous_ai
+    return enemy_key, stats, metrics
+
+
+def run_batch(battles=1000, enemies=None, policy=None, workers=None, seed=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, max_turns=DEFAULT_MAX_TURNS, enemy_ai=None, metrics=None):
+    """
+    批量运行战斗
+
+    Args:
+        battles: 每种敌人的战斗场数
+        enemies: 敌人类型名称列表，默认全部
+        policy: 出牌策略，默认贪心策略
+        workers: 进程数，为1时在当前进程运行，默认使用全部CPU
+        seed: 随机种子
+        chunk_size: 每个进程任务包含的战斗场数
+        max_turns: 单场战斗回合上限
+        enemy_ai: 敌人AI，默认使用各敌人类自身的设置
+        metrics: 阶段计时统计对象，各进程的统计合并到其中，为None时不计时
+
+    Returns:
+        dict: 敌人类型名称 -> BatchStats
+    """
+    if enemies is None:
+        enemies = list(ENEMY_TYPES)
+    if policy is None:
+        policy = GreedyPolicy()
+
+    # 为每个任务分配独立的种子，保证结果与进程数无关
+    seed_rng = random.Random(seed)
+    tasks = []
+    for enemy_key in enemies:
+        if enemy_key not in ENEMY_TYPES:
+            raise ValueError(f"未知的敌人类型: {enemy_key}")
+        remaining = battles
+        while remaining > 0:
+            count = min(chunk_size, remaining)
+            tasks.append((enemy_key, policy, count, seed_rng.getrandbits(32), max_turns, enemy_ai,
+                          metrics is not None))
+            remaining -= count
+
+    results = {enemy_key: BatchStats() for enemy_key in enemies}
+    if workers == 1:
+        for task in tasks:
+            enemy_key, stats, chunk_metrics = _run_chunk(*task)
+            results[enemy_key].merge(stats)
+            if chunk_metrics is not None:
+                metrics.merge(chunk_metrics)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chunk, *task) for task in tasks]
+            for future in futures:
+                enemy_key, stats, chunk_metrics = future.result()
+                results[enemy_key].merge(stats)
+                if chunk_metrics is not None:
+                    metrics.merge(chunk_metrics)
+
+    return results
+
+
+def format_report(results):
+    """
+    格式化统计报告
+
+    Args:
+        results: run_batch返回的结果
+
+    Returns:
+        str: 报告文本
+    """
+    lines = ["=" * 60]
+    for stats in results.values():
+        lines.append(f"{stats.enemy_name}: {stats.battles}场")
+        lines.append(f"  胜率: {stats.win_rate:.2%}  (胜{stats.victories} / 负{stats.defeats} / 超时{stats.timeouts})")
+        lines.append(f"  平均回合数: {stats.average_turns:.2f}")
+        turns = " ".join(f"{turn}:{count}" for turn, count in sorted(stats.turn_counts.items()))
+        lines.append(f"  回合数分布: {turns}")
+        hp = " ".join(f"{value}:{count}" for value, count in sorted(stats.hp_remaining.items()))
+        lines.append(f"  剩余HP分布: {hp}")
+        lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="卡牌Roguelike无界面批量战斗模拟")
+    parser.add_argument("-n", "--battles", type=int, default=1000, help="每种敌人的战斗场数")
+    parser.add_argument("-e", "--enemy", action="append", choices=sorted(ENEMY_TYPES), help="敌人类型，可重复指定")
+    parser.add_argument("-p", "--policy", default="greedy", choices=sorted(POLICIES), help="出牌策略")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="进程数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="单场战斗回合上限")
+    parser.add_argument("--enemy-ai", default=None, choices=["expectimax"],
+                        help="敌人AI，expectimax按固定深度搜索（不限时，结果可复现）")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="统计各阶段和每种卡牌的耗时，输出报告并写入JSON文件")
+    parser.add_argument("--engine", default="scalar", choices=["scalar", "vector"],
+                        help="模拟引擎，vector使用NumPy向量化引擎（仅支持greedy策略）")
+    args = parser.parse_args(argv)
+
+    if args.engine == "vector":
+        from simulation.vector_engine import run_vector_batch
+        if args.policy != "greedy" or args.enemy_ai:
+            parser.error("向量化引擎仅支持greedy策略和固定行动模式的敌人")
+        if args.metrics:
+            parser.error("向量化引擎不支持阶段计时")
+        results = run_vector_batch(battles=args.battles, enemies=args.enemy, seed=args.seed, max_turns=args.max_turns)
+        print(format_report(results))
+        return
+
+    metrics = BattleMetrics() if args.metrics else None
+    results = run_batch(
+        battles=args.battles,
+        enemies=args.enemy,
+        policy=POLICIES[args.policy](),
+        workers=args.workers,
+        seed=args.seed,
+        max_turns=args.max_turns,
+        enemy_ai=ExpectimaxAI(time_budget=None) if args.enemy_ai == "expectimax" else None,
+        metrics=metrics,
+    )
+    print(format_report(results))
+    if metrics is not None:
+        print(metrics.format_report())
+        metrics.dump(args.metrics)
+        print(f"阶段计时已写入 {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
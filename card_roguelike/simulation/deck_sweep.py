@@ -0,0 +1,372 @@
+"""
+卡组构成扫描
+在约束范围内枚举玩家卡组的构成，用进程池对每种构成与每种敌人批量模拟，输出胜率和平均回合数表。
+
+每个 (卡组构成, 敌人) 组合的结果按内容哈希缓存在磁盘上，哈希包含卡组中卡牌的数值、
+敌人的属性与行动模式、规则版本以及模拟参数。修改约束、敌人列表或卡牌数值后重新扫描，
+只会模拟发生变化的组合。
+
+用法:
+    python simulation/deck_sweep.py --card strike:3:7 --card defend:2:6 --card heavy_attack:0:2 \\
+        --size 10 12 -n 500 -o sweep.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cards import get_card
+from characters import Warrior
+from simulation.batch_runner import ENEMY_TYPES, DEFAULT_MAX_TURNS, BatchStats, run_battle
+from simulation.policies import POLICIES
+
+# 规则版本，修改战斗规则（结算顺序、状态效果、抽牌等）后递增，使已有缓存失效
+RULESET_VERSION = 1
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = ".sweep_cache"
+
+# 默认扫描范围：卡牌键 -> (最少张数, 最多张数)，围绕战士初始卡组
+DEFAULT_CONSTRAINTS = {
+    "strike": (3, 7),
+    "defend": (2, 6),
+    "heavy_attack": (0, 2),
+    "iron_wave": (0, 2),
+}
+DEFAULT_DECK_SIZE = (10, 12)
+
+
+def enumerate_decks(constraints, min_size, max_size):
+    """
+    枚举满足约束的卡组构成
+
+    Args:
+        constraints: 卡牌键 -> (最少张数, 最多张数)
+        min_size: 卡组最少张数
+        max_size: 卡组最多张数
+
+    Returns:
+        list: 卡组构成列表，每个构成为 ((卡牌键, 张数), ...)，不含张数为0的卡牌
+    """
+    keys = list(constraints)
+    # 后缀中各卡牌的最少/最多张数之和，用于剪枝
+    min_rest = [0] * (len(keys) + 1)
+    max_rest = [0] * (len(keys) + 1)
+    for i in range(len(keys) - 1, -1, -1):
+        low, high = constraints[keys[i]]
+        min_rest[i] = min_rest[i + 1] + low
+        max_rest[i] = max_rest[i + 1] + high
+
+    decks = []
+    counts = []
+
+    def expand(index, size):
+        if index == len(keys):
+            decks.append(tuple((key, count) for key, count in zip(keys, counts) if count))
+            return
+        low, high = constraints[keys[index]]
+        for count in range(low, high + 1):
+            total = size + count
+            if total + max_rest[index + 1] < min_size:
+                continue
+            if total + min_rest[index + 1] > max_size:
+                break
+            counts.append(count)
+            expand(index + 1, total)
+            counts.pop()
+
+    expand(0, 0)
+    return decks
+
+
+def deck_ids(composition):
+    """
+    卡组构成转换为卡牌ID列表
+
+    Args:
+        composition: ((卡牌键, 张数), ...)
+    """
+    return [get_card(key).card_id for key, count in composition for _ in range(count)]
+
+
+def format_deck(composition):
+    """卡组构成的文本表示，如 strike×5 defend×4"""
+    return " ".join(f"{key}×{count}" for key, count in composition)
+
+
+def cache_key(composition, enemy_key, policy_name, battles, seed, max_turns):
+    """
+    计算 (卡组构成, 敌人) 组合的缓存键
+
+    Args:
+        composition: 卡组构成
+        enemy_key: 敌人类型名称
+        policy_name: 出牌策略名称
+        battles: 战斗场数
+        seed: 随机种子
+        max_turns: 回合上限
+
+    Returns:
+        str: 十六进制哈希
+    """
+    cards = []
+    for key, count in composition:
+        card = get_card(key)
+        cards.append([key, count, card.card_type.name, card.cost, card.damage, card.armor,
+                      card.target_all, card.enemy_status, card.self_status])
+    enemy = ENEMY_TYPES[enemy_key]()
+    actions = [[action["type"].name, action["value"]] for action in enemy.actions]
+    player = Warrior()
+    payload = {
+        "ruleset": RULESET_VERSION,
+        "deck": cards,
+        "enemy": [enemy_key, type(enemy).__name__, enemy.max_hp, actions],
+        "player": [type(player).__name__, player.max_hp, player.max_energy],
+        "policy": policy_name,
+        "battles": battles,
+        "seed": seed,
+        "max_turns": max_turns,
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _enemy_seed(seed, enemy_key):
+    """
+    敌人的战斗种子，与卡组无关
+
+    所有卡组对同一敌人使用相同的种子序列，减少卡组之间比较的方差
+    """
+    digest = hashlib.sha256(f"{seed}:{enemy_key}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def _simulate(deck, enemy_key, policy_name, battles, seed, max_turns):
+    """
+    在工作进程中模拟一个 (卡组构成, 敌人) 组合
+
+    Returns:
+        dict: BatchStats.to_dict()，分布的键转换为字符串，与从缓存读取的结果一致
+    """
+    policy = POLICIES[policy_name]()
+    policy.seed(seed)
+    rng = random.Random(seed)
+    enemy_cls = ENEMY_TYPES[enemy_key]
+    stats = BatchStats()
+    for _ in range(battles):
+        stats.add(run_battle(enemy_cls, policy, max_turns, seed=rng.getrandbits(32), deck=deck))
+    result = stats.to_dict()
+    for field in ("turn_counts", "hp_remaining"):
+        result[field] = {str(value): count for value, count in result[field].items()}
+    return result
+
+
+def _load_cached(cache_dir, key):
+    """读取缓存结果，不存在或损坏时返回None"""
+    try:
+        with open(os.path.join(cache_dir, f"{key}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached(cache_dir, key, result):
+    """写入缓存结果"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def run_sweep(constraints=None, min_size=DEFAULT_DECK_SIZE[0], max_size=DEFAULT_DECK_SIZE[1], enemies=None,
+              battles=200, policy_name="greedy", workers=None, seed=0, max_turns=DEFAULT_MAX_TURNS,
+              cache_dir=DEFAULT_CACHE_DIR):
+    """
+    扫描卡组构成
+
+    Args:
+        constraints: 卡牌键 -> (最少张数, 最多张数)，默认DEFAULT_CONSTRAINTS
+        min_size: 卡组最少张数
+        max_size: 卡组最多张数
+        enemies: 敌人类型名称列表，默认全部
+        battles: 每个组合的战斗场数
+        policy_name: 出牌策略名称
+        workers: 进程数，为1时在当前进程运行，默认使用全部CPU
+        seed: 随机种子
+        max_turns: 单场战斗回合上限
+        cache_dir: 缓存目录，为None时不使用缓存
+
+    Returns:
+        tuple: (结果列表 [(卡组构成, {敌人类型名称: 统计字典})], 本次实际模拟的组合数)
+    """
+    if constraints is None:
+        constraints = DEFAULT_CONSTRAINTS
+    if enemies is None:
+        enemies = list(ENEMY_TYPES)
+    for key in constraints:
+        get_card(key)
+    for enemy_key in enemies:
+        if enemy_key not in ENEMY_TYPES:
+            raise ValueError(f"未知的敌人类型: {enemy_key}")
+    if policy_name not in POLICIES:
+        raise ValueError(f"未知的出牌策略: {policy_name}")
+
+    decks = enumerate_decks(constraints, min_size, max_size)
+    results = [(composition, {}) for composition in decks]
+    pending = []  # (结果索引, 敌人类型名称, 缓存键)
+    for index, composition in enumerate(decks):
+        for enemy_key in enemies:
+            key = cache_key(composition, enemy_key, policy_name, battles, seed, max_turns)
+            cached = _load_cached(cache_dir, key) if cache_dir is not None else None
+            if cached is None:
+                pending.append((index, enemy_key, key))
+            else:
+                results[index][1][enemy_key] = cached
+
+    tasks = [
+        (deck_ids(decks[index]), enemy_key, policy_name, battles, _enemy_seed(seed, enemy_key), max_turns)
+        for index, enemy_key, _ in pending
+    ]
+    if workers == 1:
+        outputs = [_simulate(*task) for task in tasks]
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_simulate, *zip(*tasks)))
+    else:
+        outputs = []
+
+    for (index, enemy_key, key), result in zip(pending, outputs):
+        results[index][1][enemy_key] = result
+        if cache_dir is not None:
+            _save_cached(cache_dir, key, result)
+
+    return results, len(pending)
+
+
+def _summary(stats_by_enemy, enemies):
+    """所有敌人的平均胜率和平均回合数"""
+    win_rate = sum(stats_by_enemy[enemy_key]["win_rate"] for enemy_key in enemies) / len(enemies)
+    turns = sum(stats_by_enemy[enemy_key]["average_turns"] for enemy_key in enemies) / len(enemies)
+    return win_rate, turns
+
+
+def rank_results(results, enemies):
+    """按平均胜率从高到低、平均回合数从低到高排序"""
+    def sort_key(item):
+        win_rate, turns = _summary(item[1], enemies)
+        return -win_rate, turns
+    return sorted(results, key=sort_key)
+
+
+def write_tables(results, enemies, path):
+    """
+    把胜率和平均回合数表写入CSV文件
+
+    Args:
+        results: run_sweep返回的结果列表
+        enemies: 敌人类型名称列表
+        path: 输出路径
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        header = ["deck", "size"]
+        for enemy_key in enemies:
+            header += [f"{enemy_key}_win_rate", f"{enemy_key}_average_turns"]
+        writer.writerow(header + ["mean_win_rate", "mean_average_turns"])
+        for composition, stats_by_enemy in rank_results(results, enemies):
+            row = [format_deck(composition), sum(count for _, count in composition)]
+            for enemy_key in enemies:
+                stats = stats_by_enemy[enemy_key]
+                row += [f"{stats['win_rate']:.4f}", f"{stats['average_turns']:.2f}"]
+            win_rate, turns = _summary(stats_by_enemy, enemies)
+            writer.writerow(row + [f"{win_rate:.4f}", f"{turns:.2f}"])
+
+
+def format_table(results, enemies, top=10):
+    """
+    格式化排名前列的卡组
+
+    Args:
+        results: run_sweep返回的结果列表
+        enemies: 敌人类型名称列表
+        top: 显示的卡组数
+
+    Returns:
+        str: 表格文本
+    """
+    lines = [f"{'卡组':<48} " + " ".join(f"{enemy_key:>22}" for enemy_key in enemies) + f" {'平均':>14}"]
+    for composition, stats_by_enemy in rank_results(results, enemies)[:top]:
+        cells = [
+            f"{stats_by_enemy[enemy_key]['win_rate']:>13.1%} {stats_by_enemy[enemy_key]['average_turns']:>7.2f}回合"
+            for enemy_key in enemies
+        ]
+        win_rate, turns = _summary(stats_by_enemy, enemies)
+        lines.append(f"{format_deck(composition):<48} " + " ".join(cells) + f" {win_rate:>7.1%} {turns:>5.2f}")
+    return "\n".join(lines)
+
+
+def _parse_constraint(text):
+    """解析 卡牌键:最少:最多 格式的约束"""
+    try:
+        key, low, high = text.split(":")
+        low, high = int(low), int(high)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"约束格式应为 卡牌键:最少:最多，得到 {text}") from None
+    if not 0 <= low <= high:
+        raise argparse.ArgumentTypeError(f"张数范围无效: {text}")
+    return key, (low, high)
+
+
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="卡组构成扫描")
+    parser.add_argument("-c", "--card", action="append", type=_parse_constraint,
+                        help="卡牌张数约束 卡牌键:最少:最多，可重复指定，默认围绕战士初始卡组")
+    parser.add_argument("--size", type=int, nargs=2, default=list(DEFAULT_DECK_SIZE), metavar=("MIN", "MAX"),
+                        help="卡组张数范围")
+    parser.add_argument("-e", "--enemy", action="append", choices=sorted(ENEMY_TYPES), help="敌人类型，可重复指定")
+    parser.add_argument("-n", "--battles", type=int, default=200, help="每个组合的战斗场数")
+    parser.add_argument("-p", "--policy", default="greedy", choices=sorted(POLICIES), help="出牌策略")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="进程数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="单场战斗回合上限")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="结果缓存目录")
+    parser.add_argument("--no-cache", action="store_true", help="不读写缓存")
+    parser.add_argument("-o", "--output", default="deck_sweep.csv", help="结果表输出路径（CSV）")
+    parser.add_argument("--top", type=int, default=10, help="显示排名前列的卡组数")
+    args = parser.parse_args(argv)
+
+    constraints = dict(args.card) if args.card else DEFAULT_CONSTRAINTS
+    enemies = args.enemy or list(ENEMY_TYPES)
+    try:
+        results, simulated = run_sweep(
+            constraints=constraints,
+            min_size=args.size[0],
+            max_size=args.size[1],
+            enemies=enemies,
+            battles=args.battles,
+            policy_name=args.policy,
+            workers=args.workers,
+            seed=args.seed,
+            max_turns=args.max_turns,
+            cache_dir=None if args.no_cache else args.cache_dir,
+        )
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    total = len(results) * len(enemies)
+    print(f"{len(results)}种卡组 × {len(enemies)}种敌人：模拟{simulated}个组合，缓存命中{total - simulated}个")
+    print(format_table(results, enemies, args.top))
+    write_tables(results, enemies, args.output)
+    print(f"结果表已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+蒙特卡洛树搜索出牌策略
+通过BattleSystem接口推演战斗副本，用于自动战斗、出牌提示和平衡性模拟的参考策略
+
+树的动作以卡牌ID表示（相同的卡牌只展开一次），结束回合为END_TURN。
+每次推演先复制战斗并重新洗乱抽牌堆（玩家不知道抽牌顺序），沿树用UCB选择动作，
+展开一个新节点后用随机出牌推演到战斗结束或回合上限。
+做出决策后保留所选子树，下一次决策时如果战斗正好执行了该动作就从子树继续搜索。
+
+抽牌概率（draw_odds）不参与动作选择：目前没有抽牌、消耗或保留手牌的卡牌，本回合的手牌
+在回合结束时全部进入弃牌堆，打出哪张牌都不改变之后的牌堆构成，各动作的抽牌概率相同；
+推演前重新洗乱抽牌堆已经按同一分布采样了抽牌。加入这类卡牌后再用它给动作或推演排序。
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_system import BattleState, ACTION_END_TURN
+from cards import card_id
+from simulation.policies import Policy, POLICIES
+
+# 树中的结束回合动作
+END_TURN = -1
+
+
+class MCTSNode:
+    """搜索树节点"""
+
+    __slots__ = ("children", "visits", "value")
+
+    def __init__(self):
+        """初始化节点"""
+        self.children = {}  # 动作 -> 子节点
+        self.visits = 0
+        self.value = 0.0
+
+
+def _legal_actions(battle):
+    """当前可执行的动作：能量足够的各种卡牌ID与结束回合"""
+    player = battle.player
+    actions = []
+    for card in player.hand:
+        if card.cost <= player.energy:
+            action = card_id(card)
+            if action not in actions:
+                actions.append(action)
+    actions.append(END_TURN)
+    return actions
+
+
+def _card_index(player, action):
+    """卡牌ID对应的第一张手牌索引"""
+    for i, card in enumerate(player.hand):
+        if card_id(card) == action:
+            return i
+    return None
+
+
+def _apply(battle, action):
+    """在战斗副本上执行动作，结束回合后与界面一样自动执行敌人行动"""
+    if action == END_TURN:
+        battle.end_player_turn()
+        if battle.state == BattleState.ENEMY_TURN:
+            battle.execute_enemy_action()
+    else:
+        battle.play_card(_card_index(battle.player, action))
+
+
+def _evaluate(battle):
+    """
+    推演结果评分，范围[0, 1]
+
+    胜利在[0.5, 1]之间按剩余HP比例，失败在[0, 0.25]之间按敌人损失的HP比例，
+    到达回合上限时在[0, 0.5]之间按双方HP比例差
+    """
+    player = battle.player
+    if battle.state == BattleState.VICTORY:
+        return 0.5 + 0.5 * player.hp / player.max_hp
+    enemy_hp = enemy_max_hp = 0
+    for enemy in battle.enemies:
+        enemy_hp += enemy.hp
+        enemy_max_hp += enemy.max_hp
+    if battle.state == BattleState.DEFEAT:
+        return 0.25 * (1 - enemy_hp / enemy_max_hp)
+    return 0.25 + 0.25 * (player.hp / player.max_hp - enemy_hp / enemy_max_hp)
+
+
+class MCTSPolicy(Policy):
+    """蒙特卡洛树搜索策略"""
+
+    def __init__(self, playouts=200, time_budget=None, exploration=0.7, rollout_turns=20,
+                 reuse_tree=True, seed=None):
+        """
+        初始化MCTS策略
+
+        Args:
+            playouts: 每次决策的推演次数上限，为None时只受时间预算限制
+            time_budget: 每次决策的时间预算（秒），为None时只受推演次数限制
+            exploration: UCB探索系数
+            rollout_turns: 推演的回合数上限
+            reuse_tree: 是否在决策之间复用子树
+            seed: 随机种子
+        """
+        if playouts is None and time_budget is None:
+            raise ValueError("playouts和time_budget至少需要设置一个")
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.reuse_tree = reuse_tree
+        self.rng = random.Random(seed)
+        self.root = None
+        self.last_playouts = 0  # 上一次决策的推演次数
+        self._battle = None
+        self._history_len = 0
+        self._expected_action = None
+
+    def seed(self, seed):
+        """重新设置随机种子，同时丢弃搜索树"""
+        self.rng.seed(seed)
+        self.root = None
+
+    def choose_action(self, battle_system):
+        """
+        搜索并选择下一步行动
+
+        Args:
+            battle_system: 战斗系统对象
+
+        Returns:
+            int: 要使用的手牌索引，返回None表示结束回合
+        """
+        root = self._reuse_root(battle_system)
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        turn_limit = battle_system.turn_count + self.rollout_turns
+
+        playouts = 0
+        while self.playouts is None or playouts < self.playouts:
+            if deadline is not None and playouts and time.perf_counter() > deadline:
+                break
+            battle = battle_system.clone(seed=self.rng.getrandbits(32))
+            self.rng.shuffle(battle.player.draw_pile)
+            self._playout(root, battle, turn_limit)
+            playouts += 1
+        self.last_playouts = playouts
+
+        best = max(_legal_actions(battle_system),
+                   key=lambda action: root.children[action].visits if action in root.children else -1)
+
+        # 记录决策，下一次决策时确认战斗执行了该动作再复用子树
+        card_index = None if best == END_TURN else _card_index(battle_system.player, best)
+        self.root = root.children.get(best) if self.reuse_tree else None
+        self._battle = battle_system
+        self._history_len = len(battle_system.action_history)
+        self._expected_action = ACTION_END_TURN if card_index is None else card_index + 1
+        return card_index
+
+    def _reuse_root(self, battle_system):
+        """上一次的决策已被执行时返回对应的子树，否则返回新的根节点"""
+        history = battle_system.action_history
+        if (self.root is not None and battle_system is self._battle
+                and len(history) == self._history_len + 1
+                and history[-1] == self._expected_action):
+            return self.root
+        return MCTSNode()
+
+    def _playout(self, root, battle, turn_limit):
+        """一次推演：选择、展开、随机推演、回传"""
+        node = root
+        path = [root]
+        while not battle.is_battle_over() and battle.turn_count <= turn_limit:
+            actions = _legal_actions(battle)
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = self.rng.choice(untried)
+                node.children[action] = MCTSNode()
+                node = node.children[action]
+                path.append(node)
+                _apply(battle, action)
+                break
+            action = self._select(node, actions)
+            node = node.children[action]
+            path.append(node)
+            _apply(battle, action)
+
+        self._rollout(battle, turn_limit)
+        value = _evaluate(battle)
+        for visited in path:
+            visited.visits += 1
+            visited.value += value
+
+    def _select(self, node, actions):
+        """按UCB在当前可执行的动作中选择动作"""
+        log_visits = math.log(node.visits + 1)
+        best_score = -1.0
+        best_action = None
+        for action in actions:
+            child = node.children[action]
+            score = child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_action = action
+        return best_action
+
+    def _rollout(self, battle, turn_limit):
+        """随机出牌推演，能量足够时随机使用一张卡牌，否则结束回合"""
+        rng = self.rng
+        while not battle.is_battle_over() and battle.turn_count <= turn_limit:
+            player = battle.player
+            playable = [i for i, card in enumerate(player.hand) if card.cost <= player.energy]
+            if playable:
+                battle.play_card(rng.choice(playable))
+            else:
+                battle.end_player_turn()
+                if battle.state == BattleState.ENEMY_TURN:
+                    battle.execute_enemy_action()
+
+
+POLICIES["mcts"] = MCTSPolicy
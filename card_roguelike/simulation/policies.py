@@ -0,0 +1,74 @@
+"""
+出牌策略
+无界面模拟时代替玩家按键做出决策
+"""
+import random
+
+
+class Policy:
+    """出牌策略基类"""
+
+    def seed(self, seed):
+        """
+        重新设置随机种子
+
+        Args:
+            seed: 随机种子
+        """
+        pass
+
+    def choose_action(self, battle_system):
+        """
+        选择下一步行动
+
+        Args:
+            battle_system: 战斗系统对象
+
+        Returns:
+            int: 要使用的手牌索引，返回None表示结束回合
+        """
+        raise NotImplementedError("子类必须实现choose_action方法")
+
+
+class GreedyPolicy(Policy):
+    """贪心策略 - 按手牌顺序使用第一张能量足够的卡牌"""
+
+    def choose_action(self, battle_system):
+        """选择第一张可用的卡牌"""
+        player = battle_system.player
+        for i, card in enumerate(player.hand):
+            if card.cost <= player.energy:
+                return i
+        return None
+
+
+class RandomPolicy(Policy):
+    """随机策略 - 在能量足够的卡牌中随机选择"""
+
+    def __init__(self, seed=None):
+        """
+        初始化随机策略
+
+        Args:
+            seed: 随机种子
+        """
+        self.rng = random.Random(seed)
+
+    def seed(self, seed):
+        """重新设置随机种子"""
+        self.rng.seed(seed)
+
+    def choose_action(self, battle_system):
+        """随机选择一张可用的卡牌"""
+        player = battle_system.player
+        playable = [i for i, card in enumerate(player.hand) if card.cost <= player.energy]
+        if not playable:
+            return None
+        return self.rng.choice(playable)
+
+
+# 策略注册表，命令行按名称选择
+POLICIES = {
+    "greedy": GreedyPolicy,
+    "random": RandomPolicy,
+}
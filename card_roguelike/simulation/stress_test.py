@@ -0,0 +1,106 @@
+"""
+多敌人压力测试
+用上百个敌人的遭遇战测量敌人回合结算、意图规划和群体伤害的耗时，
+按敌人数量给出单个敌人的平均耗时，用于确认各阶段随敌人数量线性增长
+
+用法:
+    python simulation/stress_test.py --sizes 1 10 100 200 400
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_system import BattleSystem, BattleState
+from cards import get_card
+from characters import Warrior
+from enemies import GoblinWarrior, GoblinArcher, Slime
+
+DEFAULT_SIZES = (1, 10, 100, 200, 400)
+
+# 压力测试中玩家的HP，保证敌人再多也不会提前结束战斗
+STRESS_PLAYER_HP = 10 ** 9
+
+ENEMY_CYCLE = (GoblinWarrior, GoblinArcher, Slime)
+
+
+def create_stress_battle(count, seed=0):
+    """
+    创建有大量敌人的遭遇战
+
+    Args:
+        count: 敌人数量
+        seed: 战斗随机种子
+
+    Returns:
+        BattleSystem: 已开始第一回合的战斗系统对象
+    """
+    player = Warrior()
+    player.set_hp(STRESS_PLAYER_HP, STRESS_PLAYER_HP)
+    enemies = [ENEMY_CYCLE[i % len(ENEMY_CYCLE)]() for i in range(count)]
+    for enemy in enemies:
+        enemy.set_hp(STRESS_PLAYER_HP, STRESS_PLAYER_HP)
+    battle = BattleSystem(player, enemies, seed=seed, record_events=False)
+    battle.start_player_turn()
+    return battle
+
+
+def measure(count, rounds=50):
+    """
+    测量各阶段处理单个敌人的平均耗时
+
+    Args:
+        count: 敌人数量
+        rounds: 重复轮数
+
+    Returns:
+        dict: 阶段名称 -> 每个敌人的平均耗时（微秒）
+    """
+    battle = create_stress_battle(count)
+    whirlwind = get_card("whirlwind")
+    totals = {"plan": 0.0, "execute": 0.0, "end_turn": 0.0, "aoe": 0.0}
+    timer = time.perf_counter
+
+    for _ in range(rounds):
+        start = timer()
+        whirlwind.play(battle.player, battle.enemy)
+        totals["aoe"] += timer() - start
+
+        battle.player.discard_all()
+        start = timer()
+        battle.start_enemy_turn()
+        totals["plan"] += timer() - start
+
+        # 执行行动，不进入回合结束
+        start = timer()
+        for enemy in battle.enemies:
+            enemy.execute_action(battle.player)
+        totals["execute"] += timer() - start
+
+        start = timer()
+        battle.end_enemy_turn()
+        totals["end_turn"] += timer() - start
+        if battle.state != BattleState.PLAYER_TURN:
+            raise RuntimeError("压力测试战斗意外结束")
+
+    scale = 1e6 / (rounds * count)
+    return {phase: total * scale for phase, total in totals.items()}
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="多敌人遭遇战压力测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="敌人数量")
+    parser.add_argument("--rounds", type=int, default=50, help="每种数量重复的回合数")
+    args = parser.parse_args()
+
+    print(f"{'敌人数':>6} {'意图规划':>10} {'执行行动':>10} {'回合结束':>10} {'群体伤害':>10}  (微秒/敌人)")
+    for count in args.sizes:
+        result = measure(count, args.rounds)
+        print(f"{count:>6} {result['plan']:>10.2f} {result['execute']:>10.2f} "
+              f"{result['end_turn']:>10.2f} {result['aoe']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+向量化战斗引擎
+用NumPy结构化数组同时推进N场战斗，规则与BattleSystem保持一致，用于大规模蒙特卡洛模拟
+
+每场战斗的状态按字段存放在并行数组中（玩家HP/护甲/能量、敌人HP/护甲/状态、
+敌人行动索引、以卡牌ID数组表示的抽牌堆/手牌/弃牌堆），每次调用推进所有战斗的一个阶段。
+"""
+import os
+import sys
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from battle_system import BattleState
+from cards import CARD_DEFINITIONS, card_effects, card_id
+from characters import Warrior
+from enemies.enemy import IntentType
+from simulation.batch_runner import ENEMY_TYPES, DEFAULT_MAX_TURNS, BatchStats
+
+# 意图编码
+INTENT_NONE = -1
+INTENT_CODES = {
+    IntentType.ATTACK: 0,
+    IntentType.DEFEND: 1,
+    IntentType.BUFF: 2,
+    IntentType.DEBUFF: 3,
+}
+
+# 战斗状态编码
+STATE_PLAYER_TURN = 0
+STATE_ENEMY_TURN = 1
+STATE_VICTORY = 2
+STATE_DEFEAT = 3
+STATE_CODES = {
+    BattleState.PLAYER_TURN: STATE_PLAYER_TURN,
+    BattleState.ENEMY_TURN: STATE_ENEMY_TURN,
+    BattleState.VICTORY: STATE_VICTORY,
+    BattleState.DEFEAT: STATE_DEFEAT,
+}
+
+# 每回合抽牌数，与BattleSystem.start_player_turn一致
+DRAW_PER_TURN = 5
+
+# 牌堆中的空位；牌堆用int16保存卡牌ID，卡牌目录最多CARD_ID_LIMIT个卡牌ID（基础版和升级版各占一个）
+EMPTY = -1
+CARD_ID_LIMIT = 2 ** 15
+
+
+def _build_card_tables():
+    """按卡牌ID构建费用和效果查找表"""
+    if len(CARD_DEFINITIONS) > CARD_ID_LIMIT:
+        raise ValueError(f"向量化战斗引擎最多支持{CARD_ID_LIMIT}个卡牌ID，卡牌目录有{len(CARD_DEFINITIONS)}个")
+    rows = [(card.cost,) + card_effects(card) for card in CARD_DEFINITIONS]
+    table = np.array(rows, dtype=np.int32)
+    return table[:, 0], table[:, 1], table[:, 2], table[:, 3], table[:, 4]
+
+
+class VectorBattleEngine:
+    """向量化战斗引擎 - 同一玩家职业与敌人类型的N场并行战斗"""
+
+    def __init__(self, n, enemy_cls, player_cls=Warrior, seed=None, shuffle=True):
+        """
+        初始化N场战斗并开始第一回合
+
+        Args:
+            n: 战斗场数
+            enemy_cls: 敌人类
+            player_cls: 玩家职业类
+            seed: 随机种子
+            shuffle: 是否洗牌，关闭时弃牌堆按原顺序回填抽牌堆，便于与BattleSystem逐步对照
+        """
+        player = player_cls()
+        enemy = enemy_cls()
+        self._setup(n, player, enemy, seed, shuffle)
+
+        self.draw[:, :self.deck_size] = player.deck
+        self.draw_count[:] = self.deck_size
+        if self.shuffle:
+            self._shuffle_draw_piles(np.arange(n))
+
+        self.start_player_turn()
+
+    @classmethod
+    def from_battles(cls, battles, seed=None, shuffle=True):
+        """
+        从多个BattleSystem的当前状态构建引擎
+
+        所有战斗的敌人需要属于同一类型，玩家牌组大小需要相同。
+
+        Args:
+            battles: BattleSystem对象列表
+            seed: 随机种子
+            shuffle: 是否洗牌
+        """
+        if any(len(battle.enemies) > 1 for battle in battles):
+            raise ValueError("向量化战斗引擎只支持单个敌人的战斗")
+        engine = cls.__new__(cls)
+        first = battles[0]
+        engine._setup(len(battles), first.player, first.enemy, seed, shuffle)
+
+        for i, battle in enumerate(battles):
+            player = battle.player
+            enemy = battle.enemy
+            engine.state[i] = STATE_CODES[battle.state]
+            engine.turn[i] = battle.turn_count
+            engine.player_hp[i] = player.hp
+            engine.player_armor[i] = player.armor
+            engine.player_energy[i] = player.energy
+            engine.player_strength[i] = player.get_status("strength")
+            engine.player_demon_form[i] = player.get_status("demon_form")
+            engine.player_poison[i] = player.get_status("poison")
+            engine.enemy_hp[i] = enemy.hp
+            engine.enemy_armor[i] = enemy.armor
+            engine.enemy_strength[i] = enemy.get_status("strength")
+            engine.enemy_poison[i] = enemy.get_status("poison")
+            engine.enemy_burning[i] = enemy.get_status("burning")
+            engine.enemy_action_index[i] = enemy.action_index
+            engine.enemy_intent[i] = INTENT_CODES.get(enemy.intent, INTENT_NONE)
+            engine.enemy_intent_value[i] = enemy.intent_value
+            for pile, count, cards in (
+                (engine.draw, engine.draw_count, player.draw_pile),
+                (engine.hand, engine.hand_count, player.hand),
+                (engine.discard, engine.discard_count, player.discard_pile),
+            ):
+                pile[i, :len(cards)] = [card_id(card) for card in cards]
+                count[i] = len(cards)
+
+        return engine
+
+    def _setup(self, n, player, enemy, seed, shuffle):
+        """分配状态数组"""
+        if not NUMPY_AVAILABLE:
+            raise ImportError("向量化战斗引擎需要安装numpy")
+        if enemy.AI is not None:
+            raise ValueError(f"向量化战斗引擎只支持固定行动模式，{type(enemy).__name__}设置了敌人AI")
+
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.shuffle = shuffle
+        (self.card_cost, self.card_damage, self.card_armor,
+         self.card_burning, self.card_demon_form) = _build_card_tables()
+
+        # 玩家
+        self.player_max_hp = player.max_hp
+        self.player_max_energy = player.max_energy
+        self.player_hp = np.full(n, player.hp, dtype=np.int32)
+        self.player_armor = np.zeros(n, dtype=np.int32)
+        self.player_energy = np.zeros(n, dtype=np.int32)
+        self.player_strength = np.zeros(n, dtype=np.int32)
+        self.player_demon_form = np.zeros(n, dtype=np.int32)
+        self.player_poison = np.zeros(n, dtype=np.int32)
+
+        # 敌人
+        self.enemy_name = enemy.name
+        self.enemy_max_hp = enemy.max_hp
+        self.action_types = np.array([INTENT_CODES[action["type"]] for action in enemy.actions], dtype=np.int32)
+        self.action_values = np.array([action["value"] for action in enemy.actions], dtype=np.int32)
+        self.enemy_hp = np.full(n, enemy.hp, dtype=np.int32)
+        self.enemy_armor = np.full(n, enemy.armor, dtype=np.int32)
+        self.enemy_strength = np.full(n, enemy.get_status("strength"), dtype=np.int32)
+        self.enemy_poison = np.full(n, enemy.get_status("poison"), dtype=np.int32)
+        self.enemy_burning = np.full(n, enemy.get_status("burning"), dtype=np.int32)
+        self.enemy_action_index = np.full(n, enemy.action_index, dtype=np.int32)
+        self.enemy_intent = np.full(n, INTENT_CODES.get(enemy.intent, INTENT_NONE), dtype=np.int32)
+        self.enemy_intent_value = np.full(n, enemy.intent_value, dtype=np.int32)
+
+        # 牌堆，空位为EMPTY，抽牌堆顶部在末尾
+        self.deck_size = len(player.deck)
+        self.draw = np.full((n, self.deck_size), EMPTY, dtype=np.int16)
+        self.hand = np.full((n, self.deck_size), EMPTY, dtype=np.int16)
+        self.discard = np.full((n, self.deck_size), EMPTY, dtype=np.int16)
+        self.draw_count = np.zeros(n, dtype=np.int32)
+        self.hand_count = np.zeros(n, dtype=np.int32)
+        self.discard_count = np.zeros(n, dtype=np.int32)
+
+        self.state = np.full(n, STATE_PLAYER_TURN, dtype=np.int8)
+        self.turn = np.zeros(n, dtype=np.int32)
+
+    def _rows(self, state, mask):
+        """获取处于指定状态且被选中的战斗索引"""
+        selected = self.state == state
+        if mask is not None:
+            selected &= mask
+        return np.nonzero(selected)[0]
+
+    @staticmethod
+    def _take_damage(hp, armor, rows, damage):
+        """批量受到伤害，规则同Character.take_damage"""
+        current = armor[rows]
+        blocked = np.minimum(current, damage)
+        armor[rows] = current - blocked
+        hp[rows] = np.maximum(hp[rows] - (damage - blocked), 0)
+
+    def _shuffle_draw_piles(self, rows):
+        """打乱指定战斗的抽牌堆"""
+        piles = self.draw[rows]
+        keys = self.rng.random(piles.shape)
+        keys[piles == EMPTY] = 2.0  # 空位排在最后
+        order = np.argsort(keys, axis=1)
+        self.draw[rows] = np.take_along_axis(piles, order, axis=1)
+
+    def _draw_cards(self, rows, num):
+        """批量抽牌，规则同Character.draw_cards"""
+        for _ in range(num):
+            empty = rows[self.draw_count[rows] == 0]
+            if empty.size:
+                # 抽牌堆为空，弃牌堆洗回抽牌堆
+                self.draw[empty] = self.discard[empty]
+                self.draw_count[empty] = self.discard_count[empty]
+                self.discard[empty] = EMPTY
+                self.discard_count[empty] = 0
+                if self.shuffle:
+                    self._shuffle_draw_piles(empty)
+
+            rows = rows[self.draw_count[rows] > 0]
+            if not rows.size:
+                return
+            top = self.draw_count[rows] - 1
+            self.hand[rows, self.hand_count[rows]] = self.draw[rows, top]
+            self.draw[rows, top] = EMPTY
+            self.draw_count[rows] = top
+            self.hand_count[rows] += 1
+
+    def start_player_turn(self, rows=None):
+        """
+        开始玩家回合
+
+        Args:
+            rows: 战斗索引数组，默认全部
+        """
+        if rows is None:
+            rows = np.arange(self.n)
+        self.state[rows] = STATE_PLAYER_TURN
+        self.turn[rows] += 1
+        self.player_energy[rows] = self.player_max_energy
+        self.player_armor[rows] = 0
+        self.player_strength[rows] += self.player_demon_form[rows]
+        self._draw_cards(rows, DRAW_PER_TURN)
+
+    def playable_mask(self):
+        """
+        获取可用卡牌掩码
+
+        Returns:
+            ndarray: (n, 牌组大小)的布尔数组，玩家回合中能量足够的手牌为True
+        """
+        cols = np.arange(self.deck_size)
+        in_hand = cols < self.hand_count[:, None]
+        cost = self.card_cost[np.where(in_hand, self.hand, 0)]
+        return in_hand & (cost <= self.player_energy[:, None]) & (self.state == STATE_PLAYER_TURN)[:, None]
+
+    def greedy_actions(self):
+        """
+        贪心策略，与GreedyPolicy一致：使用第一张能量足够的手牌
+
+        Returns:
+            ndarray: 每场战斗的手牌索引，-1表示结束回合
+        """
+        playable = self.playable_mask()
+        return np.where(playable.any(axis=1), playable.argmax(axis=1), -1)
+
+    def play_cards(self, hand_index):
+        """
+        玩家使用卡牌
+
+        Args:
+            hand_index: 每场战斗的手牌索引，-1表示不出牌
+
+        Returns:
+            ndarray: 成功使用卡牌的战斗掩码
+        """
+        hand_index = np.asarray(hand_index)
+        rows = np.nonzero(
+            (self.state == STATE_PLAYER_TURN) & (hand_index >= 0) & (hand_index < self.hand_count)
+        )[0]
+        index = hand_index[rows]
+        cards = self.hand[rows, index].astype(np.intp)
+        affordable = self.card_cost[cards] <= self.player_energy[rows]
+        rows, index, cards = rows[affordable], index[affordable], cards[affordable]
+
+        self.player_energy[rows] -= self.card_cost[cards]
+        self._take_damage(self.enemy_hp, self.enemy_armor, rows, self.card_damage[cards])
+        self.player_armor[rows] += self.card_armor[cards]
+        self.enemy_burning[rows] += self.card_burning[cards]
+        self.player_demon_form[rows] += self.card_demon_form[cards]
+
+        # 从手牌中移除，后面的卡牌依次前移
+        cols = np.arange(self.deck_size)
+        source = np.minimum(cols + (cols >= index[:, None]), self.deck_size - 1)
+        hands = np.take_along_axis(self.hand[rows], source, axis=1)
+        hands[cols >= (self.hand_count[rows] - 1)[:, None]] = EMPTY
+        self.hand[rows] = hands
+        self.hand_count[rows] -= 1
+
+        self.discard[rows, self.discard_count[rows]] = cards
+        self.discard_count[rows] += 1
+
+        self.state[rows[self.enemy_hp[rows] <= 0]] = STATE_VICTORY
+
+        played = np.zeros(self.n, dtype=bool)
+        played[rows] = True
+        return played
+
+    def end_player_turn(self, mask=None):
+        """
+        结束玩家回合并开始敌人回合
+
+        Args:
+            mask: 要结束回合的战斗掩码，默认全部
+        """
+        rows = self._rows(STATE_PLAYER_TURN, mask)
+
+        # 弃掉所有手牌
+        cols = np.arange(self.deck_size)
+        in_hand = cols < self.hand_count[rows][:, None]
+        target = self.discard_count[rows][:, None] + cols
+        owner = np.broadcast_to(rows[:, None], in_hand.shape)
+        self.discard[owner[in_hand], target[in_hand]] = self.hand[rows][in_hand]
+        self.discard_count[rows] += self.hand_count[rows]
+        self.hand[rows] = EMPTY
+        self.hand_count[rows] = 0
+
+        # 玩家回合结束，规则同Character.end_turn：清除护甲，毒只记录层数
+        self.player_armor[rows] = 0
+
+        # 敌人计划下一个行动
+        self.state[rows] = STATE_ENEMY_TURN
+        action = self.enemy_action_index[rows] % len(self.action_types)
+        self.enemy_intent[rows] = self.action_types[action]
+        self.enemy_intent_value[rows] = self.action_values[action]
+        self.enemy_action_index[rows] += 1
+
+    def execute_enemy_action(self, mask=None):
+        """
+        执行敌人行动、结算敌人回合结束并开始下一个玩家回合
+
+        Args:
+            mask: 要执行的战斗掩码，默认全部
+        """
+        rows = self._rows(STATE_ENEMY_TURN, mask)
+        intent = self.enemy_intent[rows]
+        value = self.enemy_intent_value[rows]
+
+        attack = intent == INTENT_CODES[IntentType.ATTACK]
+        attackers = rows[attack]
+        self._take_damage(self.player_hp, self.player_armor, attackers,
+                          value[attack] + self.enemy_strength[attackers])
+
+        defend = intent == INTENT_CODES[IntentType.DEFEND]
+        self.enemy_armor[rows[defend]] += value[defend]
+
+        buff = intent == INTENT_CODES[IntentType.BUFF]
+        self.enemy_strength[rows[buff]] += value[buff]
+
+        debuff = intent == INTENT_CODES[IntentType.DEBUFF]
+        self.player_poison[rows[debuff]] += value[debuff]
+
+        dead = self.player_hp[rows] <= 0
+        self.state[rows[dead]] = STATE_DEFEAT
+        rows = rows[~dead]
+
+        # 敌人回合结束，规则同Enemy.end_turn：清除护甲后一次结算燃烧和毒
+        self.enemy_armor[rows] = 0
+        self.enemy_hp[rows] = np.maximum(self.enemy_hp[rows] - self.enemy_burning[rows] - self.enemy_poison[rows], 0)
+
+        dead = self.enemy_hp[rows] <= 0
+        self.state[rows[dead]] = STATE_VICTORY
+        rows = rows[~dead]
+
+        self.enemy_armor[rows] = 0
+        self.start_player_turn(rows)
+
+    def step(self, hand_index, mask=None):
+        """
+        推进一步：给出手牌索引的战斗出牌，其余玩家回合中的战斗结束回合并执行敌人行动
+
+        Args:
+            hand_index: 每场战斗的手牌索引，-1表示结束回合
+            mask: 要推进的战斗掩码，默认全部；未选中的战斗保持原状
+        """
+        played = self.play_cards(hand_index)
+        end_turn = ~played & (self.state == STATE_PLAYER_TURN)
+        if mask is not None:
+            end_turn &= mask
+        self.end_player_turn(end_turn)
+        self.execute_enemy_action(end_turn)
+
+    def run(self, max_turns=DEFAULT_MAX_TURNS, policy=None):
+        """
+        运行所有战斗直到结束或达到回合上限
+
+        Args:
+            max_turns: 回合上限
+            policy: 向量化策略，接收引擎返回手牌索引数组，默认贪心策略
+        """
+        if policy is None:
+            policy = VectorBattleEngine.greedy_actions
+        while True:
+            active = (self.state == STATE_PLAYER_TURN) & (self.turn <= max_turns)
+            if not active.any():
+                return
+            # 超过回合上限的战斗停在当前回合，与run_battle一样记为超时
+            self.step(np.where(active, policy(self), -1), active)
+
+    def is_battle_over(self):
+        """获取已结束战斗的掩码"""
+        return (self.state == STATE_VICTORY) | (self.state == STATE_DEFEAT)
+
+    def to_stats(self):
+        """
+        汇总为批量统计结果
+
+        Returns:
+            BatchStats: 统计结果
+        """
+        stats = BatchStats(self.enemy_name)
+        stats.battles = self.n
+        stats.victories = int(np.count_nonzero(self.state == STATE_VICTORY))
+        stats.defeats = int(np.count_nonzero(self.state == STATE_DEFEAT))
+        stats.timeouts = self.n - stats.victories - stats.defeats
+        stats.total_turns = int(self.turn.sum())
+        for field, values in ((stats.turn_counts, self.turn), (stats.hp_remaining, self.player_hp)):
+            unique, counts = np.unique(values, return_counts=True)
+            field.update(dict(zip(unique.tolist(), counts.tolist())))
+        return stats
+
+
+def run_vector_batch(battles=1000, enemies=None, seed=None, chunk_size=100000, max_turns=DEFAULT_MAX_TURNS):
+    """
+    使用向量化引擎批量运行贪心策略战斗
+
+    Args:
+        battles: 每种敌人的战斗场数
+        enemies: 敌人类型名称列表，默认全部
+        seed: 随机种子
+        chunk_size: 每次并行推进的战斗场数
+        max_turns: 单场战斗回合上限
+
+    Returns:
+        dict: 敌人类型名称 -> BatchStats
+    """
+    if enemies is None:
+        enemies = list(ENEMY_TYPES)
+
+    seeds = np.random.SeedSequence(seed)
+    results = {}
+    for enemy_key in enemies:
+        if enemy_key not in ENEMY_TYPES:
+            raise ValueError(f"未知的敌人类型: {enemy_key}")
+        stats = BatchStats()
+        remaining = battles
+        while remaining > 0:
+            count = min(chunk_size, remaining)
+            engine = VectorBattleEngine(count, ENEMY_TYPES[enemy_key], seed=seeds.spawn(1)[0])
+            engine.run(max_turns)
+            stats.merge(engine.to_stats())
+            remaining -= count
+        results[enemy_key] = stats
+    return results
@@ -0,0 +1,156 @@
+"""
+状态效果
+状态效果注册表：每种状态有整数ID，按触发时机登记钩子函数。
+角色和敌人以 状态ID -> 层数 的字典保存身上的状态，并维护一个触发掩码，
+记录身上的状态在哪些时机有钩子。触发时先检查掩码，再按分发表一次遍历身上已有的状态，
+没有出现的状态类型不产生任何开销。
+
+添加新状态只需注册:
+
+    THORNS = STATUSES.register("thorns", "荆棘", on_damaged=thorns_hook)
+"""
+
+# 触发时机（位掩码）
+TURN_START = 1  # 回合开始，钩子(owner, stacks)
+TURN_END = 2  # 回合结束，钩子(owner, stacks)
+ON_ATTACK = 4  # 发起攻击，钩子(owner, stacks, damage) -> 修正后的伤害
+ON_DAMAGED = 8  # 受到伤害后，钩子(owner, stacks, hp_lost, source)
+
+TRIGGERS = (TURN_START, TURN_END, ON_ATTACK, ON_DAMAGED)
+
+
+class StatusRegistry:
+    """状态效果注册表"""
+
+    def __init__(self):
+        """初始化注册表"""
+        self.names = []  # 状态ID -> 状态名称
+        self.display_names = []  # 状态ID -> 显示名称
+        self.ids = {}  # 状态名称 -> 状态ID
+        self.masks = []  # 状态ID -> 触发掩码
+        self.tables = {trigger: [] for trigger in TRIGGERS}  # 触发时机 -> 按状态ID索引的钩子表
+
+    def register(self, name, display_name, turn_start=None, turn_end=None, on_attack=None, on_damaged=None):
+        """
+        注册状态效果
+
+        Args:
+            name: 状态名称
+            display_name: 显示名称
+            turn_start: 回合开始钩子
+            turn_end: 回合结束钩子
+            on_attack: 发起攻击钩子
+            on_damaged: 受到伤害钩子
+
+        Returns:
+            int: 状态ID
+        """
+        if name in self.ids:
+            raise ValueError(f"状态效果已注册: {name}")
+        status_id = len(self.names)
+        self.names.append(name)
+        self.display_names.append(display_name)
+        self.ids[name] = status_id
+
+        mask = 0
+        for trigger, hook in zip(TRIGGERS, (turn_start, turn_end, on_attack, on_damaged)):
+            self.tables[trigger].append(hook)
+            if hook is not None:
+                mask |= trigger
+        self.masks.append(mask)
+        return status_id
+
+    def display_name(self, name):
+        """获取状态名称对应的显示名称，未注册时返回原名称"""
+        status_id = self.ids.get(name)
+        return name if status_id is None else self.display_names[status_id]
+
+    def trigger_mask(self, status_effects):
+        """
+        计算一组状态的触发掩码
+
+        Args:
+            status_effects: 状态ID -> 层数
+        """
+        mask = 0
+        for status_id in status_effects:
+            mask |= self.masks[status_id]
+        return mask
+
+    def dispatch(self, trigger, owner):
+        """
+        一次处理身上所有状态的回合开始/回合结束钩子
+
+        Args:
+            trigger: TURN_START或TURN_END
+            owner: 角色或敌人
+        """
+        table = self.tables[trigger]
+        # 钩子可能添加新状态（如恶魔形态增加力量），遍历开始时的状态
+        for status_id, stacks in tuple(owner.status_effects.items()):
+            hook = table[status_id]
+            if hook is not None:
+                hook(owner, stacks)
+
+    def modify_attack(self, owner, damage):
+        """
+        按身上的状态修正攻击伤害
+
+        Args:
+            owner: 攻击方
+            damage: 基础伤害
+
+        Returns:
+            int: 修正后的伤害
+        """
+        table = self.tables[ON_ATTACK]
+        for status_id, stacks in owner.status_effects.items():
+            hook = table[status_id]
+            if hook is not None:
+                damage = hook(owner, stacks, damage)
+        return damage
+
+    def on_damaged(self, owner, hp_lost, source):
+        """
+        处理受到伤害钩子
+
+        Args:
+            owner: 受伤方
+            hp_lost: 实际损失的HP
+            source: 伤害来源名称
+        """
+        table = self.tables[ON_DAMAGED]
+        for status_id, stacks in tuple(owner.status_effects.items()):
+            hook = table[status_id]
+            if hook is not None:
+                hook(owner, stacks, hp_lost, source)
+
+
+# 全局状态效果注册表
+STATUSES = StatusRegistry()
+
+
+def _poison_tick(owner, stacks):
+    """毒：回合结束时受到等同层数的伤害"""
+    owner.take_damage(stacks, "毒")
+
+
+def _burning_tick(owner, stacks):
+    """燃烧：回合结束时受到等同层数的火伤"""
+    owner.take_damage(stacks, "燃烧")
+
+
+def _strength_attack(owner, stacks, damage):
+    """力量：攻击伤害增加层数"""
+    return damage + stacks
+
+
+def _demon_form_start(owner, stacks):
+    """恶魔形态：回合开始时获得层数的力量"""
+    owner.add_status("strength", stacks)
+
+
+POISON = STATUSES.register("poison", "毒", turn_end=_poison_tick)
+BURNING = STATUSES.register("burning", "燃烧", turn_end=_burning_tick)
+STRENGTH = STATUSES.register("strength", "力量", on_attack=_strength_attack)
+DEMON_FORM = STATUSES.register("demon_form", "恶魔形态", turn_start=_demon_form_start)
@@ -1,7 +1,8 @@
 """
 UI模块
 """
-from .font_manager import FontManager
+from .font_manager import FontManager, TextCache
+from .card_atlas import CardAtlas
 from .battle_ui import BattleUI
 
-__all__ = ['FontManager', 'BattleUI']
+__all__ = ['FontManager', 'TextCache', 'CardAtlas', 'BattleUI']
@@ -5,8 +5,46 @@ import pygame
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from ui.font_manager import FontManager
+from ui.card_atlas import CardAtlas
+from ui.font_manager import FontManager, TITLE_SIZE, LARGE_SIZE, MEDIUM_SIZE, SMALL_SIZE, CARD_SIZE
 from battle_system import BattleState
+from cards import get_card
+from draw_odds import next_turn_odds
+
+# 各区域的位置和大小（x, y, 宽, 高）
+PLAYER_PANEL = (50, 50, 250, 150)
+ENEMY_PANEL = (900, 50, 250, 150)
+LOG_PANEL = (50, 220, 830, 300)
+DECK_PANEL = (900, 550, 250, 200)
+
+# 手牌布局
+CARD_WIDTH = 120
+CARD_HEIGHT = 160
+CARD_SPACING = 130
+HAND_X = 50
+HAND_Y = 550
+
+# 操作按钮布局
+BUTTON_WIDTH = 150
+BUTTON_HEIGHT = 50
+BUTTON_SPACING = 20
+BUTTON_X = 900
+BUTTON_Y = 760
+
+# 提示高亮框超出卡牌或按钮的宽度
+HINT_MARGIN = 4
+
+# 空区域
+EMPTY_RECT = pygame.Rect(0, 0, 0, 0)
+
+
+def _union(a, b):
+    """合并两个矩形，空矩形不参与合并"""
+    if not a.width or not a.height:
+        return b
+    if not b.width or not b.height:
+        return a
+    return a.union(b)
 
 
 class BattleUI:
@@ -41,6 +79,29 @@ class BattleUI:
         self.CARD_SKILL = (50, 100, 200)
         self.CARD_ABILITY = (150, 50, 150)
         self.CARD_CURSE = (100, 100, 100)
+        
+        # 卡牌牌面图集，每种牌面只绘制一次；手牌画在背景上，图集用背景色填充圆角外的部分
+        self.card_atlas = CardAtlas(self._draw_card_face, CARD_WIDTH, CARD_HEIGHT, background=self.DARK_GRAY)
+        
+        # 出牌提示：手牌索引，-1表示结束回合，None表示没有提示
+        self.hint = None
+        
+        # 商店出售的卡牌，None表示不在商店
+        self.shop_cards = None
+        
+        # 下一层可选节点的说明文字，None表示不在选择路线
+        self.map_choices = None
+        
+        # 下回合抽牌概率文本，玩家状态版本变化时重新计算
+        self._odds_text = ""
+        self._odds_version = None
+        
+        # 局部重绘：每个区域上次绘制时的输入和占用的矩形，以及本帧需要推送到屏幕的矩形
+        self._panel_keys = {}
+        self._panel_regions = {}
+        self._dirty_rects = []
+        self._full_redraw = True
+        self._battle = None
     
     def init(self):
         """初始化pygame"""
@@ -48,223 +109,326 @@ class BattleUI:
         self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption("卡牌Roguelike")
         self.clock = pygame.time.Clock()
+        self.invalidate()
+    
+    def invalidate(self):
+        """标记整个画面需要重绘，例如屏幕被其他界面覆盖之后"""
+        self._full_redraw = True
     
     def draw_battle(self, battle_system):
         """
         绘制战斗界面
 
+        每个区域记录上次绘制时的输入，只重绘输入发生变化的区域：先用背景色清除该区域，
+        与被清除部分重叠的其他区域也一起按原顺序重绘。画面没有变化时不绘制任何内容。
+        需要推送到屏幕的矩形由flip()统一提交
+
         Args:
             battle_system: 战斗系统对象
         """
-        self.screen.fill(self.DARK_GRAY)
-
         # 获取战斗状态
         status = battle_system.get_battle_status()
-
+        player = battle_system.player
+        enemy_name = battle_system.enemy.name
+        hint = self.hint
+        self._update_odds(player)
+        
+        # 各区域按绘制顺序排列：(名称, 输入, 占用的矩形, 绘制函数)
+        # 战斗结果区域的大小在绘制后才知道，它绘制在最上层，只需要清除上次占用的矩形
+        panels = (
+            ("player", (player.name, status['player_hp'], status['player_max_hp'], status['player_energy'],
+                        status['player_max_energy'], status['player_armor']),
+             pygame.Rect(PLAYER_PANEL), lambda: self._draw_player_info(status, player.name)),
+            ("enemy", (enemy_name, status['enemy_count'], status['enemy_hp'], status['enemy_max_hp'],
+                       status['enemy_armor'], status['enemy_intent']),
+             self._enemy_region(status), lambda: self._draw_enemy_info(status, enemy_name)),
+            ("hand", (tuple(map(CardAtlas.face_key, player.hand)), hint if hint != -1 else None),
+             self._hand_region(len(player.hand)), lambda: self._draw_hand_cards(player)),
+            ("deck", (status['deck_size'], status['discard_size'], status['hand_size'], status['turn'],
+                      self._odds_text),
+             pygame.Rect(DECK_PANEL[0], DECK_PANEL[1], self.width - DECK_PANEL[0], DECK_PANEL[3]),
+             lambda: self._draw_deck_info(status)),
+            ("log", tuple(status['log']),
+             pygame.Rect(LOG_PANEL[0], LOG_PANEL[1], BUTTON_X - LOG_PANEL[0], LOG_PANEL[3]),
+             lambda: self._draw_battle_log(status)),
+            ("buttons", hint == -1,
+             pygame.Rect(BUTTON_X - HINT_MARGIN, BUTTON_Y - HINT_MARGIN, self.width, self.height),
+             lambda: self._draw_action_buttons(status)),
+            ("state", (status['state'], tuple(self.shop_cards or ()), tuple(self.map_choices or ())),
+             self._panel_regions.get("state", EMPTY_RECT), lambda: self._draw_battle_state(status)),
+        )
+        
+        screen_rect = self.screen.get_rect()
+        if self._full_redraw or battle_system is not self._battle:
+            # 整个画面重绘
+            self._full_redraw = False
+            self._battle = battle_system
+            self.screen.fill(self.DARK_GRAY)
+            self._dirty_rects = [screen_rect]
+            dirty = {name for name, _, _, _ in panels}
+        else:
+            dirty, cleared = self._find_dirty_panels(panels)
+            for rect in cleared:
+                self.screen.fill(self.DARK_GRAY, rect)
+            self._dirty_rects.extend(rect.clip(screen_rect) for rect in cleared)
+        
         # 绘制各个区域
-        self._draw_player_info(status, battle_system.player.name)
-        self._draw_enemy_info(status, battle_system.enemy.name)
-        self._draw_hand_cards(battle_system.player)
-        self._draw_deck_info(status)
-        self._draw_battle_log(status)
-        self._draw_action_buttons(status)
-        self._draw_battle_state(status)
+        for name, key, region, draw in panels:
+            if name in dirty:
+                drawn = draw()
+                self._panel_keys[name] = key
+                self._panel_regions[name] = drawn if drawn is not None else region
+                if drawn:
+                    self._dirty_rects.append(drawn.clip(screen_rect))
+    
+    def _find_dirty_panels(self, panels):
+        """
+        找出需要重绘的区域
+
+        输入变化的区域需要重绘，它新旧两个矩形都要清除；与被清除的矩形重叠的区域也要重绘，直到不再扩大
+
+        Args:
+            panels: draw_battle中的区域列表
+
+        Returns:
+            tuple: (需要重绘的区域名称集合, 需要清除的矩形列表)
+        """
+        keys = self._panel_keys
+        regions = self._panel_regions
+        dirty = set()
+        cleared = []
+        for name, key, region, _ in panels:
+            if keys.get(name) != key:
+                dirty.add(name)
+                cleared.append(_union(region, regions.get(name, EMPTY_RECT)))
+        
+        changed = bool(cleared)
+        while changed:
+            changed = False
+            for name, _, region, _ in panels:
+                if name in dirty:
+                    continue
+                old = regions.get(name, EMPTY_RECT)
+                if region.collidelist(cleared) != -1 or old.collidelist(cleared) != -1:
+                    dirty.add(name)
+                    cleared.append(_union(region, old))
+                    changed = True
+        return dirty, cleared
+    
+    def _enemy_region(self, status):
+        """敌人信息区域占用的矩形，意图行数较多时超出背景框"""
+        x, y, width, height = ENEMY_PANEL
+        lines = len(status['enemy_intent'].split(' '))
+        return pygame.Rect(x, y, self.width - x, max(height, 110 + lines * 20 + 10))
+    
+    def _hand_region(self, count):
+        """手牌区域占用的矩形，包括提示高亮框"""
+        if not count:
+            return EMPTY_RECT
+        return pygame.Rect(HAND_X - HINT_MARGIN, HAND_Y - HINT_MARGIN,
+                           (count - 1) * CARD_SPACING + CARD_WIDTH + 2 * HINT_MARGIN,
+                           CARD_HEIGHT + 2 * HINT_MARGIN)
     
     def _draw_player_info(self, status, player_name):
         """绘制玩家信息"""
-        x, y = 50, 50
-        width, height = 250, 150
+        render = self.font_manager.render
+        x, y, width, height = PLAYER_PANEL
 
         # 背景框
         pygame.draw.rect(self.screen, (50, 50, 50), (x, y, width, height), border_radius=10)
         pygame.draw.rect(self.screen, self.WHITE, (x, y, width, height), 2, border_radius=10)
 
         # 名称
-        font = self.font_manager.get_large_font()
-        name_text = font.render(f"{player_name}", True, self.WHITE)
+        name_text = render(f"{player_name}", LARGE_SIZE, self.WHITE)
         self.screen.blit(name_text, (x + 10, y + 10))
         
         # 生命值
-        font = self.font_manager.get_medium_font()
-        hp_text = font.render(f"HP: {status['player_hp']}/{status['player_max_hp']}", True, self.RED)
+        hp_text = render(f"HP: {status['player_hp']}/{status['player_max_hp']}", MEDIUM_SIZE, self.RED)
         self.screen.blit(hp_text, (x + 10, y + 50))
         
         # 能量
-        energy_text = font.render(f"能量: {status['player_energy']}/{status['player_max_energy']}", True, self.YELLOW)
+        energy_text = render(f"能量: {status['player_energy']}/{status['player_max_energy']}", MEDIUM_SIZE, self.YELLOW)
         self.screen.blit(energy_text, (x + 10, y + 80))
         
         # 护甲
-        armor_text = font.render(f"护甲: {status['player_armor']}", True, self.BLUE)
+        armor_text = render(f"护甲: {status['player_armor']}", MEDIUM_SIZE, self.BLUE)
         self.screen.blit(armor_text, (x + 10, y + 110))
     
     def _draw_enemy_info(self, status, enemy_name):
         """绘制敌人信息"""
-        x, y = 900, 50
-        width, height = 250, 150
+        render = self.font_manager.render
+        x, y, width, height = ENEMY_PANEL
 
         # 背景框
         pygame.draw.rect(self.screen, (50, 50, 50), (x, y, width, height), border_radius=10)
         pygame.draw.rect(self.screen, self.WHITE, (x, y, width, height), 2, border_radius=10)
 
         # 名称
-        font = self.font_manager.get_large_font()
-        name_text = font.render(f"{enemy_name}", True, self.WHITE)
+        if status['enemy_count'] > 1:
+            enemy_name = f"{enemy_name} (剩余{status['enemy_count']}个)"
+        name_text = render(f"{enemy_name}", LARGE_SIZE, self.WHITE)
         self.screen.blit(name_text, (x + 10, y + 10))
         
         # 生命值
-        font = self.font_manager.get_medium_font()
-        hp_text = font.render(f"HP: {status['enemy_hp']}/{status['enemy_max_hp']}", True, self.RED)
+        hp_text = render(f"HP: {status['enemy_hp']}/{status['enemy_max_hp']}", MEDIUM_SIZE, self.RED)
         self.screen.blit(hp_text, (x + 10, y + 50))
         
         # 护甲
-        armor_text = font.render(f"护甲: {status['enemy_armor']}", True, self.BLUE)
+        armor_text = render(f"护甲: {status['enemy_armor']}", MEDIUM_SIZE, self.BLUE)
         self.screen.blit(armor_text, (x + 10, y + 80))
         
         # 意图
-        font = self.font_manager.get_small_font()
-        intent_text = font.render(status['enemy_intent'], True, self.ORANGE)
         # 多行显示
         lines = status['enemy_intent'].split(' ')
         for i, line in enumerate(lines):
-            line_text = font.render(line, True, self.ORANGE)
+            line_text = render(line, SMALL_SIZE, self.ORANGE)
             self.screen.blit(line_text, (x + 10, y + 110 + i * 20))
     
     def _draw_hand_cards(self, player):
-        """绘制手牌"""
-        card_width = 120
-        card_height = 160
-        spacing = 130
-        start_x = 50
-        y = 550
-        
-        font = self.font_manager.get_card_font()
+        """绘制手牌：牌面从图集中blit，再绘制提示高亮框和编号"""
+        render = self.font_manager.render
+        card_width = CARD_WIDTH
+        card_height = CARD_HEIGHT
+        spacing = CARD_SPACING
+        start_x = HAND_X
+        y = HAND_Y
         
         for i, card in enumerate(player.hand):
             x = start_x + i * spacing
+            self.card_atlas.blit(self.screen, card, (x, y))
             
-            # 根据卡牌类型选择颜色
-            if card.card_type.value == "攻击":
-                color = self.CARD_ATTACK
-            elif card.card_type.value == "技能":
-                color = self.CARD_SKILL
-            elif card.card_type.value == "能力":
-                color = self.CARD_ABILITY
-            else:
-                color = self.CARD_CURSE
-            
-            # 卡牌背景
-            pygame.draw.rect(self.screen, color, (x, y, card_width, card_height), border_radius=8)
-            pygame.draw.rect(self.screen, self.WHITE, (x, y, card_width, card_height), 2, border_radius=8)
-            
-            # 卡牌名称
-            name_text = font.render(card.name, True, self.WHITE)
-            name_rect = name_text.get_rect(center=(x + card_width // 2, y + 30))
-            self.screen.blit(name_text, name_rect)
-            
-            # 能量消耗
-            cost_text = font.render(str(card.cost), True, self.YELLOW)
-            pygame.draw.circle(self.screen, self.BLACK, (x + 20, y + 20), 15)
-            cost_rect = cost_text.get_rect(center=(x + 20, y + 20))
-            self.screen.blit(cost_text, cost_rect)
-            
-            # 卡牌类型
-            type_text = font.render(card.card_type.value, True, self.LIGHT_GRAY)
-            type_rect = type_text.get_rect(center=(x + card_width // 2, y + 60))
-            self.screen.blit(type_text, type_rect)
-            
-            # 卡牌描述
-            desc_font = self.font_manager.get_small_font()
-            desc_lines = self._wrap_text(card.description, desc_font, card_width - 20)
-            for j, line in enumerate(desc_lines):
-                line_text = desc_font.render(line, True, self.WHITE)
-                line_rect = line_text.get_rect(center=(x + card_width // 2, y + 90 + j * 18))
-                self.screen.blit(line_text, line_rect)
+            if self.hint == i:
+                pygame.draw.rect(self.screen, self.YELLOW, (x - 4, y - 4, card_width + 8, card_height + 8), 4,
+                                 border_radius=10)
             
             # 卡牌编号
-            num_text = font.render(str(i + 1), True, self.YELLOW)
+            num_text = render(str(i + 1), CARD_SIZE, self.YELLOW)
             num_rect = num_text.get_rect(center=(x + card_width // 2, y + card_height - 20))
             self.screen.blit(num_text, num_rect)
     
-    def _wrap_text(self, text, font, max_width):
-        """文本换行"""
-        words = list(text)
-        lines = []
-        current_line = ""
-        
-        for char in words:
-            test_line = current_line + char
-            if font.size(test_line)[0] > max_width:
-                lines.append(current_line)
-                current_line = char
-            else:
-                current_line = test_line
-        
-        if current_line:
-            lines.append(current_line)
-        
-        return lines
+    def _draw_card_face(self, surface, card, x, y):
+        """
+        绘制卡牌牌面（背景、边框、费用、名称、类型和描述），由牌面图集调用
+        
+        Args:
+            surface: 目标表面
+            card: 卡牌对象
+            x: 左上角x坐标
+            y: 左上角y坐标
+        """
+        render = self.font_manager.render
+        card_width = CARD_WIDTH
+        card_height = CARD_HEIGHT
+        
+        # 根据卡牌类型选择颜色
+        if card.card_type.value == "攻击":
+            color = self.CARD_ATTACK
+        elif card.card_type.value == "技能":
+            color = self.CARD_SKILL
+        elif card.card_type.value == "能力":
+            color = self.CARD_ABILITY
+        else:
+            color = self.CARD_CURSE
+        
+        # 卡牌背景
+        pygame.draw.rect(surface, color, (x, y, card_width, card_height), border_radius=8)
+        pygame.draw.rect(surface, self.WHITE, (x, y, card_width, card_height), 2, border_radius=8)
+        
+        # 卡牌名称
+        name_text = render(card.name, CARD_SIZE, self.WHITE)
+        name_rect = name_text.get_rect(center=(x + card_width // 2, y + 30))
+        surface.blit(name_text, name_rect)
+        
+        # 能量消耗
+        cost_text = render(str(card.cost), CARD_SIZE, self.YELLOW)
+        pygame.draw.circle(surface, self.BLACK, (x + 20, y + 20), 15)
+        cost_rect = cost_text.get_rect(center=(x + 20, y + 20))
+        surface.blit(cost_text, cost_rect)
+        
+        # 卡牌类型
+        type_text = render(card.card_type.value, CARD_SIZE, self.LIGHT_GRAY)
+        type_rect = type_text.get_rect(center=(x + card_width // 2, y + 60))
+        surface.blit(type_text, type_rect)
+        
+        # 卡牌描述
+        desc_lines = self.font_manager.wrap_text(card.description, SMALL_SIZE, card_width - 20)
+        for j, line in enumerate(desc_lines):
+            line_text = render(line, SMALL_SIZE, self.WHITE)
+            line_rect = line_text.get_rect(center=(x + card_width // 2, y + 90 + j * 18))
+            surface.blit(line_text, line_rect)
+    
+    def _update_odds(self, player):
+        """玩家状态变化时重新计算下回合抽到非基础卡牌的概率文本"""
+        if self._odds_version != player.version:
+            self._odds_version = player.version
+            odds = next_turn_odds(player)
+            self._odds_text = " ".join(
+                f"{get_card(key).name}{p:.0%}" for key, p in odds.items() if get_card(key).rarity != "basic"
+            )
     
     def _draw_deck_info(self, status):
         """绘制牌库信息"""
-        x, y = 900, 550
-        width, height = 250, 200
+        render = self.font_manager.render
+        x, y, width, height = DECK_PANEL
         
         # 背景框
         pygame.draw.rect(self.screen, (50, 50, 50), (x, y, width, height), border_radius=10)
         pygame.draw.rect(self.screen, self.WHITE, (x, y, width, height), 2, border_radius=10)
         
-        font = self.font_manager.get_medium_font()
-        
         # 牌库
-        deck_text = font.render(f"牌库: {status['deck_size']}张", True, self.WHITE)
+        deck_text = render(f"牌库: {status['deck_size']}张", MEDIUM_SIZE, self.WHITE)
         self.screen.blit(deck_text, (x + 10, y + 10))
         
         # 弃牌堆
-        discard_text = font.render(f"弃牌: {status['discard_size']}张", True, self.WHITE)
+        discard_text = render(f"弃牌: {status['discard_size']}张", MEDIUM_SIZE, self.WHITE)
         self.screen.blit(discard_text, (x + 10, y + 50))
         
         # 手牌数
-        hand_text = font.render(f"手牌: {status['hand_size']}张", True, self.WHITE)
+        hand_text = render(f"手牌: {status['hand_size']}张", MEDIUM_SIZE, self.WHITE)
         self.screen.blit(hand_text, (x + 10, y + 90))
         
         # 回合数
-        turn_text = font.render(f"回合: {status['turn']}", True, self.YELLOW)
+        turn_text = render(f"回合: {status['turn']}", MEDIUM_SIZE, self.YELLOW)
         self.screen.blit(turn_text, (x + 10, y + 130))
+        
+        # 下回合抽到非基础卡牌的概率
+        if self._odds_text:
+            odds_text = render(f"下回合: {self._odds_text}", SMALL_SIZE, self.LIGHT_GRAY)
+            self.screen.blit(odds_text, (x + 10, y + 170))
     
     def _draw_battle_log(self, status):
         """绘制战斗日志"""
-        x, y = 50, 220
-        width, height = 830, 300
+        render = self.font_manager.render
+        x, y, width, height = LOG_PANEL
         
         # 背景框
         pygame.draw.rect(self.screen, (30, 30, 30), (x, y, width, height), border_radius=10)
         pygame.draw.rect(self.screen, self.GRAY, (x, y, width, height), 2, border_radius=10)
         
-        font = self.font_manager.get_small_font()
-        
-        # 显示最近的日志
+        # 显示最近的日志，事件在这里才格式化为文本
         log_y = y + 10
-        for log in status['log'][-10:]:  # 只显示最近10条
-            log_text = font.render(log, True, self.WHITE)
+        for event in status['log']:
+            log_text = render(event.format(), SMALL_SIZE, self.WHITE)
             self.screen.blit(log_text, (x + 10, log_y))
             log_y += 25
     
     def _draw_action_buttons(self, status):
         """绘制操作按钮"""
-        button_width = 150
-        button_height = 50
-        spacing = 20
-        start_x = 900
-        y = 760
-        
-        font = self.font_manager.get_medium_font()
+        render = self.font_manager.render
+        button_width = BUTTON_WIDTH
+        button_height = BUTTON_HEIGHT
+        spacing = BUTTON_SPACING
+        start_x = BUTTON_X
+        y = BUTTON_Y
         
         # 结束回合按钮
         end_turn_rect = pygame.Rect(start_x, y, button_width, button_height)
         pygame.draw.rect(self.screen, self.RED, end_turn_rect, border_radius=8)
         pygame.draw.rect(self.screen, self.WHITE, end_turn_rect, 2, border_radius=8)
+        if self.hint == -1:
+            pygame.draw.rect(self.screen, self.YELLOW, end_turn_rect.inflate(8, 8), 4, border_radius=10)
         
-        end_turn_text = font.render("结束回合", True, self.WHITE)
+        end_turn_text = render("结束回合", MEDIUM_SIZE, self.WHITE)
         end_turn_text_rect = end_turn_text.get_rect(center=end_turn_rect.center)
         self.screen.blit(end_turn_text, end_turn_text_rect)
         
@@ -273,26 +437,64 @@ class BattleUI:
         pygame.draw.rect(self.screen, self.BLUE, view_deck_rect, border_radius=8)
         pygame.draw.rect(self.screen, self.WHITE, view_deck_rect, 2, border_radius=8)
         
-        view_deck_text = font.render("查看牌库", True, self.WHITE)
+        view_deck_text = render("查看牌库", MEDIUM_SIZE, self.WHITE)
         view_deck_text_rect = view_deck_text.get_rect(center=view_deck_rect.center)
         self.screen.blit(view_deck_text, view_deck_text_rect)
     
     def _draw_battle_state(self, status):
-        """绘制战斗状态"""
-        font = self.font_manager.get_title_font()
+        """
+        绘制战斗状态
+
+        Returns:
+            pygame.Rect: 绘制占用的矩形，没有绘制时为空矩形
+        """
+        render = self.font_manager.render
         
         if status['state'] == "胜利":
-            text = font.render("战斗胜利！", True, self.GREEN)
+            text = render("战斗胜利！", TITLE_SIZE, self.GREEN)
             text_rect = text.get_rect(center=(self.width // 2, self.height // 2))
             self.screen.blit(text, text_rect)
+            if self.map_choices:
+                return text_rect.union(self._draw_map_choices(text_rect.bottom + 20))
+            elif self.shop_cards:
+                return text_rect.union(self._draw_shop(text_rect.bottom + 20))
+            return text_rect
         elif status['state'] == "失败":
-            text = font.render("战斗失败...", True, self.RED)
+            text = render("战斗失败...", TITLE_SIZE, self.RED)
             text_rect = text.get_rect(center=(self.width // 2, self.height // 2))
             self.screen.blit(text, text_rect)
+            return text_rect
+        return EMPTY_RECT
+    
+    def _draw_shop(self, y):
+        """绘制商店的卡牌选项，返回占用的矩形"""
+        lines = [f"{i + 1}. {card.name} - {card.description}" for i, card in enumerate(self.shop_cards)]
+        lines.append("按数字键选择一张卡牌加入牌库，空格跳过")
+        return self._draw_lines(lines, y)
+    
+    def _draw_map_choices(self, y):
+        """绘制下一层的可选节点，返回占用的矩形"""
+        lines = [f"{i + 1}. {choice}" for i, choice in enumerate(self.map_choices)]
+        lines.append("按数字键选择下一个节点")
+        return self._draw_lines(lines, y)
+    
+    def _draw_lines(self, lines, y):
+        """从y开始逐行居中绘制选项文字，返回占用的矩形"""
+        render = self.font_manager.render
+        bounds = EMPTY_RECT
+        for line in lines:
+            text = render(line, MEDIUM_SIZE, self.YELLOW)
+            text_rect = text.get_rect(center=(self.width // 2, y))
+            self.screen.blit(text, text_rect)
+            bounds = _union(bounds, text_rect)
+            y += text_rect.height + 8
+        return bounds
     
     def flip(self):
-        """更新显示"""
-        pygame.display.flip()
+        """把本帧重绘过的矩形推送到屏幕，没有变化时不推送"""
+        if self._dirty_rects:
+            pygame.display.update(self._dirty_rects)
+            self._dirty_rects = []
     
     def tick(self, fps=60):
         """控制帧率"""
@@ -3,15 +3,109 @@
 """
 import pygame
 import os
+from collections import OrderedDict
+
+# 各种字体的大小
+TITLE_SIZE = 48
+LARGE_SIZE = 36
+MEDIUM_SIZE = 28
+SMALL_SIZE = 20
+CARD_SIZE = 24
+
+# 文字缓存默认最多保存的表面数
+DEFAULT_TEXT_CACHE_SIZE = 512
+
+# 换行结果缓存默认最多保存的文字数
+DEFAULT_WRAP_CACHE_SIZE = 1024
+
+
+class TextCache:
+    """文字渲染结果缓存（文字表面、换行结果） - 容量有限，按最近最少使用淘汰"""
+    
+    def __init__(self, capacity=DEFAULT_TEXT_CACHE_SIZE):
+        """
+        初始化文字缓存
+        
+        Args:
+            capacity: 最多保存的条目数
+        """
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """
+        查询缓存
+        
+        Args:
+            key: 缓存键，如文字表面的 (文字, 字体大小, 粗体, 颜色, 抗锯齿)
+            
+        Returns:
+            保存的值，不存在时返回None
+        """
+        surface = self._entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return surface
+    
+    def put(self, key, value):
+        """
+        保存到缓存，超出容量时淘汰最久未使用的条目
+        
+        Args:
+            key: 缓存键
+            value: 值
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        """清空缓存，计数保留"""
+        self._entries.clear()
+    
+    def get_stats(self):
+        """
+        获取缓存统计
+        
+        Returns:
+            dict: 命中、未命中、淘汰次数，当前大小和容量
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "capacity": self.capacity,
+        }
 
 
 class FontManager:
     """字体管理器"""
     
-    def __init__(self):
-        """初始化字体管理器"""
+    def __init__(self, text_cache_size=DEFAULT_TEXT_CACHE_SIZE, wrap_cache_size=DEFAULT_WRAP_CACHE_SIZE):
+        """
+        初始化字体管理器
+        
+        Args:
+            text_cache_size: 文字缓存最多保存的表面数
+            wrap_cache_size: 换行结果缓存最多保存的文字数
+        """
         self.fonts = {}
         self.chinese_font_path = self._find_chinese_font()
+        self.text_cache = TextCache(text_cache_size)
+        self.wrap_cache = TextCache(wrap_cache_size)
+        self.advances = {}  # (字体大小, 粗体) -> {字符: 前进宽度}
     
     def _find_chinese_font(self):
         """查找中文字体"""
@@ -45,22 +139,109 @@ class FontManager:
         
         return self.fonts[key]
     
+    def render(self, text, size, color, antialias=True, bold=False):
+        """
+        渲染文字，同样的文字、字体和颜色只渲染一次
+        
+        返回的表面由缓存共享，调用方只能读取或绘制它，不要修改
+        
+        Args:
+            text: 文字
+            size: 字体大小
+            color: 颜色元组
+            antialias: 是否抗锯齿
+            bold: 是否粗体
+            
+        Returns:
+            pygame.Surface: 渲染好的文字表面
+        """
+        key = (text, size, bold, color, antialias)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            surface = self.get_font(size, bold).render(text, antialias, color)
+            self.text_cache.put(key, surface)
+        return surface
+    
+    def glyph_advance(self, char, size, bold=False):
+        """
+        获取字符的前进宽度，每种字体的每个字符只测量一次
+        
+        Args:
+            char: 单个字符
+            size: 字体大小
+            bold: 是否粗体
+            
+        Returns:
+            int: 前进宽度（像素）
+        """
+        advances = self.advances.get((size, bold))
+        if advances is None:
+            advances = self.advances[(size, bold)] = {}
+        advance = advances.get(char)
+        if advance is None:
+            font = self.get_font(size, bold)
+            metrics = font.metrics(char)
+            if metrics and metrics[0] is not None:
+                advance = metrics[0][4]
+            else:
+                advance = font.size(char)[0]
+            advances[char] = advance
+        return advance
+    
+    def wrap_text(self, text, size, max_width, bold=False):
+        """
+        按字符换行，使每行宽度不超过max_width
+        
+        行宽由逐个字符的前进宽度累加得到，不需要反复测量整行；同样的文字、字体和宽度只计算一次。
+        单个字符超过max_width时独占一行
+        
+        Args:
+            text: 文字
+            size: 字体大小
+            max_width: 最大行宽（像素）
+            bold: 是否粗体
+            
+        Returns:
+            tuple: 各行文字
+        """
+        key = (text, size, bold, max_width)
+        lines = self.wrap_cache.get(key)
+        if lines is not None:
+            return lines
+        
+        lines = []
+        start = 0
+        width = 0
+        for i, char in enumerate(text):
+            advance = self.glyph_advance(char, size, bold)
+            if width + advance > max_width and i > start:
+                lines.append(text[start:i])
+                start = i
+                width = 0
+            width += advance
+        if start < len(text):
+            lines.append(text[start:])
+        
+        lines = tuple(lines)
+        self.wrap_cache.put(key, lines)
+        return lines
+    
     def get_title_font(self):
         """获取标题字体"""
-        return self.get_font(48)
+        return self.get_font(TITLE_SIZE)
     
     def get_large_font(self):
         """获取大字体"""
-        return self.get_font(36)
+        return self.get_font(LARGE_SIZE)
     
     def get_medium_font(self):
         """获取中等字体"""
-        return self.get_font(28)
+        return self.get_font(MEDIUM_SIZE)
     
     def get_small_font(self):
         """获取小字体"""
-        return self.get_font(20)
+        return self.get_font(SMALL_SIZE)
     
     def get_card_font(self):
         """获取卡牌字体"""
-        return self.get_font(24)
+        return self.get_font(CARD_SIZE)
@@ -23,6 +23,14 @@ Slime = None
 BattleSystem = None
 BattleState = None
 BattleUI = None
+RunMap = None
+NodeType = None
+
+# 一局游戏的幕数
+RUN_ACTS = 3
+
+# 画面空闲时每次阻塞等待事件的最长时间（毫秒）
+IDLE_WAIT_MS = 500
 
 try:
     # 添加路径到sys.path
@@ -56,6 +64,11 @@ try:
     sys.modules["card_roguelike.ui"] = ui_module
     spec_ui.loader.exec_module(ui_module)
 
+    spec_map = importlib.util.spec_from_file_location("card_roguelike.run_map", os.path.join(card_game_path, "run_map.py"))
+    run_map_module = importlib.util.module_from_spec(spec_map)
+    sys.modules["card_roguelike.run_map"] = run_map_module
+    spec_map.loader.exec_module(run_map_module)
+
     # 从模块中获取类
     Character = getattr(characters_module, 'Character')
     Warrior = getattr(characters_module, 'Warrior')
@@ -66,6 +79,8 @@ try:
     BattleSystem = getattr(battle_system_module, 'BattleSystem')
     BattleState = getattr(battle_system_module, 'BattleState')
     BattleUI = getattr(ui_module, 'BattleUI')
+    RunMap = getattr(run_map_module, 'RunMap')
+    NodeType = getattr(run_map_module, 'NodeType')
 
     CARD_GAME_AVAILABLE = True
     print(f"成功导入卡牌游戏模块，路径: {card_game_path}")
@@ -96,8 +111,7 @@ class CardRoguelikeGame(GameBase):
 
         # 游戏状态
         self.player = None
-        self.enemies = None
-        self.current_enemy_index = 0
+        self.run_map = None
         self.battle_system = None
         self.running = False
 
@@ -126,16 +140,10 @@ class CardRoguelikeGame(GameBase):
         # 创建玩家角色
         self.player = Warrior()
 
-        # 创建敌人列表
-        self.enemies = [GoblinWarrior(), GoblinArcher(), Slime()]
-        self.current_enemy_index = 0
-
-        # 创建战斗系统
-        self.enemy = self.enemies[self.current_enemy_index]
-        self.battle_system = BattleSystem(self.player, self.enemy)
-
-        # 开始第一回合
-        self.battle_system.start_player_turn()
+        # 按种子生成的路线地图，从起点的战斗开始
+        self.run_map = RunMap(acts=RUN_ACTS)
+        self.battle_system = None
+        self.enter_node(self.run_map.current)
 
         self.running = True
         self.return_to_menu = False
@@ -147,6 +155,9 @@ class CardRoguelikeGame(GameBase):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            elif event.type == pygame.VIDEOEXPOSE:
+                # 窗口被遮挡后重新露出时，整个画面重绘
+                self.ui.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.return_to_menu = True
@@ -154,11 +165,20 @@ class CardRoguelikeGame(GameBase):
 
                 # 检查战斗是否结束
                 if self.battle_system.is_battle_over():
+                    choices = self.ui.map_choices
+                    shop_cards = self.ui.shop_cards
+                    # 数字键选择下一层的节点
+                    if choices and pygame.K_1 <= event.key < pygame.K_1 + len(choices):
+                        self.enter_node(self.run_map.advance(event.key - pygame.K_1))
+                    # 数字键选择商店的卡牌
+                    elif shop_cards and pygame.K_1 <= event.key < pygame.K_1 + len(shop_cards):
+                        self.player.add_card_to_deck(shop_cards[event.key - pygame.K_1])
+                        self.show_map_choices()
                     # 按任意键继续或退出
-                    if event.key == pygame.K_SPACE:
+                    elif event.key == pygame.K_SPACE:
                         if self.battle_system.state == BattleState.VICTORY:
-                            # 继续下一个敌人
-                            self.next_enemy()
+                            # 选择下一层的节点
+                            self.show_map_choices()
                         else:
                             # 游戏结束，返回主菜单
                             self.return_to_menu = True
@@ -183,18 +203,28 @@ class CardRoguelikeGame(GameBase):
                     if self.battle_system.state == BattleState.ENEMY_TURN:
                         self.battle_system.execute_enemy_action()
 
-    def next_enemy(self):
-        """下一个敌人"""
-        self.current_enemy_index += 1
-        if self.current_enemy_index < len(self.enemies):
-            # 创建新的战斗
-            self.enemy = self.enemies[self.current_enemy_index]
-            self.battle_system = BattleSystem(self.player, self.enemy)
-            self.battle_system.start_player_turn()
-        else:
-            # 所有敌人都击败了，返回主菜单
+    def show_map_choices(self):
+        """显示下一层可到达的节点"""
+        self.ui.shop_cards = None
+        if self.run_map.is_complete():
+            # 路线走完，返回主菜单
             print("恭喜！所有敌人都被击败了！")
             self.return_to_menu = True
+        else:
+            self.ui.map_choices = [self.run_map.describe(node) for node in self.run_map.choices()]
+
+    def enter_node(self, node):
+        """进入地图节点：战斗节点开始新的战斗，休息处恢复HP，商店提供卡牌选择"""
+        self.ui.map_choices = None
+        self.ui.shop_cards = None
+        if node.kind == NodeType.REST:
+            self.player.heal(self.run_map.rest_amount(self.player))
+            self.show_map_choices()
+        elif node.kind == NodeType.SHOP:
+            self.ui.shop_cards = self.run_map.shop_cards(node)
+        else:
+            self.battle_system = BattleSystem(self.player, self.run_map.create_enemies(node), seed=node.seed)
+            self.battle_system.start_player_turn()
 
     def update(self):
         """更新游戏逻辑"""
@@ -206,6 +236,18 @@ class CardRoguelikeGame(GameBase):
             self.ui.draw_battle(self.battle_system)
             self.ui.flip()
 
+    def is_idle(self, drawn):
+        """
+        画面是否不需要更新：战斗和它的版本号与上次绘制时相同
+
+        Args:
+            drawn: 上次绘制后的 (战斗系统对象, 版本号)，还没有绘制时为None
+        """
+        if drawn is None or self.battle_system is None:
+            return False
+        battle, version = drawn
+        return battle is self.battle_system and version == self.battle_system.get_version()
+
     def cleanup(self):
         """清理游戏资源"""
         pass
@@ -230,16 +272,23 @@ class CardRoguelikeGame(GameBase):
         print("  - E键: 结束回合")
         print("  - ESC键: 返回主菜单")
         print("  - 空格键: 战斗结束后继续")
+        print("  - 数字键: 选择地图上下一层的节点")
         print("\n游戏开始！")
         print("=" * 60)
 
+        drawn = None
         while self.running:
             # 检查是否返回主菜单
             if self.should_return_to_menu():
                 break
 
-            # 处理事件
+            # 处理事件，画面没有变化时阻塞等待输入，不重绘也不按帧率空转
             events = pygame.event.get()
+            if not events and self.is_idle(drawn):
+                event = pygame.event.wait(IDLE_WAIT_MS)
+                if event.type == pygame.NOEVENT:
+                    continue
+                events = [event] + pygame.event.get()
             self.handle_events(events)
 
             # 更新游戏状态
@@ -247,6 +296,7 @@ class CardRoguelikeGame(GameBase):
 
             # 绘制游戏画面
             self.draw(self.screen)
+            drawn = (self.battle_system, self.battle_system.get_version())
 
             # 控制游戏速度
             self.clock.tick(60)
@@ -0,0 +1,121 @@
+"""
+批量战斗模拟测试：单场战斗、统计汇总、进程池汇总与确定性
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_metrics import BattleMetrics
+from cards import card_id, get_card
+from enemies import GoblinWarrior, Slime
+from simulation.batch_runner import ENEMY_TYPES, BatchStats, format_report, main, run_batch, run_battle
+from simulation.policies import GreedyPolicy, RandomPolicy
+
+
+def result(outcome, turns, player_hp, enemy="史莱姆"):
+    """构造run_battle格式的战斗结果"""
+    return {"enemy": enemy, "seed": 0, "outcome": outcome, "turns": turns, "player_hp": player_hp, "enemy_hp": 0}
+
+
+class TestRunBattle:
+    """单场战斗"""
+
+    @pytest.mark.parametrize("enemy_cls", list(ENEMY_TYPES.values()))
+    def test_same_seed_same_result(self, enemy_cls):
+        first = run_battle(enemy_cls, RandomPolicy(3), seed=7)
+        assert run_battle(enemy_cls, RandomPolicy(3), seed=7) == first
+        assert first["seed"] == 7 and first["enemy"] == enemy_cls().name
+
+    def test_outcome_matches_hp(self):
+        for seed in range(10):
+            battle = run_battle(GoblinWarrior, GreedyPolicy(), seed=seed)
+            assert battle["outcome"] in ("victory", "defeat")
+            assert (battle["outcome"] == "victory") == (battle["enemy_hp"] <= 0 < battle["player_hp"])
+
+    def test_timeout_at_max_turns(self):
+        battle = run_battle(Slime, GreedyPolicy(), max_turns=1, seed=0)
+        assert (battle["outcome"], battle["turns"]) == ("timeout", 2)
+
+    def test_custom_deck(self):
+        # 只有防御牌时无法击败敌人
+        battle = run_battle(Slime, GreedyPolicy(), max_turns=3, seed=0, deck=[card_id(get_card("defend"))] * 10)
+        assert battle["outcome"] == "timeout" and battle["enemy_hp"] == Slime().max_hp
+
+    def test_metrics(self):
+        metrics = BattleMetrics()
+        battle = run_battle(Slime, GreedyPolicy(), seed=0, metrics=metrics)
+        assert metrics.get_metrics()["start_player_turn"]["count"] == battle["turns"]
+
+
+class TestBatchStats:
+    """统计汇总"""
+
+    def test_win_rate_and_average_turns(self):
+        stats = BatchStats()
+        for outcome, turns, hp in [("victory", 4, 50), ("victory", 6, 50), ("defeat", 5, 0), ("timeout", 101, 10)]:
+            stats.add(result(outcome, turns, hp))
+        assert (stats.battles, stats.victories, stats.defeats, stats.timeouts) == (4, 2, 1, 1)
+        assert stats.win_rate == 0.5
+        assert stats.average_turns == 29.0
+        assert stats.to_dict()["hp_remaining"] == {0: 1, 10: 1, 50: 2}
+        assert stats.enemy_name == "史莱姆"
+
+    def test_empty(self):
+        assert (BatchStats().win_rate, BatchStats().average_turns) == (0.0, 0.0)
+
+    def test_merge_equals_adding_all(self):
+        results = [result("victory", turns, turns * 10) for turns in range(1, 6)] + [result("defeat", 9, 0)]
+        combined, left, right = BatchStats(), BatchStats(), BatchStats()
+        for index, battle in enumerate(results):
+            combined.add(battle)
+            (left if index % 2 else right).add(battle)
+        left.merge(right)
+        assert left.to_dict() == combined.to_dict()
+        assert left.win_rate == 5 / 6
+
+
+class TestRunBatch:
+    """批量运行"""
+
+    def test_counts_add_up(self):
+        results = run_batch(battles=7, workers=1, seed=1, chunk_size=3)
+        assert list(results) == list(ENEMY_TYPES)
+        for stats in results.values():
+            assert stats.battles == 7
+            assert stats.victories + stats.defeats + stats.timeouts == 7
+            assert sum(stats.turn_counts.values()) == sum(stats.hp_remaining.values()) == 7
+            assert stats.total_turns == sum(turns * count for turns, count in stats.turn_counts.items())
+            assert stats.win_rate == stats.victories / 7
+
+    def test_same_seed_same_result(self):
+        first = run_batch(battles=5, enemies=["slime"], policy=RandomPolicy(), workers=1, seed=4, chunk_size=2)
+        second = run_batch(battles=5, enemies=["slime"], policy=RandomPolicy(), workers=1, seed=4, chunk_size=2)
+        assert first["slime"].to_dict() == second["slime"].to_dict()
+
+    def test_process_pool_matches_single_process(self):
+        kwargs = dict(battles=6, enemies=["goblin_warrior", "slime"], policy=RandomPolicy(), seed=9, chunk_size=2)
+        single = run_batch(workers=1, **kwargs)
+        pooled = run_batch(workers=2, **kwargs)
+        assert {key: stats.to_dict() for key, stats in pooled.items()} == \
+            {key: stats.to_dict() for key, stats in single.items()}
+
+    def test_process_pool_merges_metrics(self):
+        single, pooled = BattleMetrics(), BattleMetrics()
+        results = run_batch(battles=4, enemies=["slime"], workers=1, seed=2, chunk_size=2, metrics=single)
+        run_batch(battles=4, enemies=["slime"], workers=2, seed=2, chunk_size=2, metrics=pooled)
+        counts = {name: phase["count"] for name, phase in single.get_metrics().items()}
+        assert counts == {name: phase["count"] for name, phase in pooled.get_metrics().items()}
+        assert counts["start_player_turn"] == results["slime"].total_turns
+
+    def test_unknown_enemy(self):
+        with pytest.raises(ValueError):
+            run_batch(battles=1, enemies=["dragon"], workers=1)
+
+
+def test_report(capsys):
+    results = run_batch(battles=2, enemies=["slime"], workers=1, seed=0)
+    assert f"胜率: {results['slime'].win_rate:.2%}" in format_report(results)
+    main(["-n", "2", "-e", "slime", "-w", "1", "--seed", "0"])
+    assert capsys.readouterr().out.strip() == format_report(results)
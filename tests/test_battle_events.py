@@ -0,0 +1,132 @@
+"""
+战斗事件总线测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+import battle_events
+from battle_events import LOG_SIZE, BattleEvent, EventBus, EventType
+from battle_system import BattleSystem, BattleState
+from cards import get_card
+from characters import Warrior
+from enemies import Enemy, GoblinWarrior
+
+
+def started_battle(record_events=True):
+    """创建战斗并开始玩家回合"""
+    battle = BattleSystem(Warrior(), GoblinWarrior(), seed=0, record_events=record_events)
+    battle.start_player_turn()
+    return battle
+
+
+class TestEventBus:
+    """订阅与日志"""
+
+    def test_subscribe_by_type_and_all(self):
+        bus = EventBus()
+        damage, everything = [], []
+        bus.subscribe(damage.append, [EventType.DAMAGE])
+        bus.subscribe(everything.append)
+        hit = BattleEvent(EventType.DAMAGE, "甲", "乙", 3, 3)
+        armor = BattleEvent(EventType.ARMOR, target="甲", value=5)
+        bus.emit(hit)
+        bus.emit(armor)
+        assert damage == [hit]
+        assert everything == [hit, armor]
+
+    def test_unsubscribe(self):
+        bus = EventBus()
+        received = []
+        bus.subscribe(received.append, [EventType.DAMAGE, EventType.ARMOR])
+        bus.emit(BattleEvent(EventType.ARMOR, target="甲", value=1))
+        bus.unsubscribe(received.append)
+        bus.emit(BattleEvent(EventType.ARMOR, target="甲", value=2))
+        bus.emit(BattleEvent(EventType.DAMAGE, "甲", "乙", 1, 1))
+        assert [event.value for event in received] == [1]
+        # 重复取消订阅不报错
+        bus.unsubscribe(received.append)
+
+    def test_ring_buffer_keeps_latest_events(self):
+        bus = EventBus(log_size=3)
+        for value in range(7):
+            bus.emit(BattleEvent(EventType.ARMOR, target="甲", value=value))
+        assert [event.value for event in bus.log] == [4, 5, 6]
+        assert EventBus().log.maxlen == LOG_SIZE
+
+    def test_format_is_lazy_and_cached(self, monkeypatch):
+        calls = []
+
+        def formatter(event):
+            calls.append(event)
+            return f"护甲{event.value}"
+
+        monkeypatch.setitem(battle_events._FORMATTERS, EventType.ARMOR, formatter)
+        bus = EventBus()
+        event = BattleEvent(EventType.ARMOR, target="甲", value=4)
+        bus.emit(event)
+        assert calls == []
+        assert event.format() == str(event) == "护甲4"
+        assert calls == [event]
+
+
+class TestBattleEvents:
+    """战斗中的事件"""
+
+    def test_card_play_emits_events(self):
+        battle = started_battle()
+        battle.player.hand = [get_card("strike")]
+        battle.player.energy = 3
+        battle.play_card(0)
+        log = list(battle.battle_log)
+        assert [event.type for event in log[-2:]] == [EventType.CARD_PLAYED, EventType.DAMAGE]
+        assert log[-2].detail is get_card("strike") and log[-2].value == 1
+        assert log[-1].format() == "战士对地精战士造成6点伤害"
+
+    def test_record_events_false(self):
+        battle = started_battle(record_events=False)
+        assert battle.events is None and battle.player.events is None
+        assert all(enemy.events is None for enemy in battle.enemies)
+        assert battle.battle_log == ()
+        assert battle.get_battle_status()["log"] == ()
+        assert battle.play_card(0) is not None
+
+    def test_same_battle_with_or_without_events(self):
+        results = []
+        for record_events in (True, False):
+            battle = started_battle(record_events)
+            for _ in range(4):
+                battle.play_card(0)
+                battle.end_player_turn()
+                battle.execute_enemy_action()
+            results.append((battle.player.hp, battle.enemy.hp, battle.action_history))
+        assert results[0] == results[1]
+
+
+class TestReturnValues:
+    """出牌接口的返回值"""
+
+    def test_card_play_returns_none(self):
+        assert get_card("strike").play(Warrior(), Enemy("测试", 20)) is None
+
+    def test_character_play_card(self):
+        player = Warrior()
+        enemy = Enemy("测试", 20)
+        strike = get_card("strike")
+        player.hand = [strike]
+        player.energy = 0
+        assert player.play_card(0, enemy) is None
+        player.energy = 1
+        assert player.play_card(1, enemy) is None
+        assert player.play_card(-1, enemy) is None
+        assert player.play_card(0, enemy) is strike
+        assert player.hand == [] and player.discard_pile[-1] is strike
+
+    def test_battle_play_card(self):
+        battle = started_battle()
+        card = battle.player.hand[0]
+        assert battle.play_card(0) is card
+        assert battle.action_history[-1] == 1
+        battle.end_player_turn()
+        assert battle.state == BattleState.ENEMY_TURN
+        assert battle.play_card(0) is None
@@ -0,0 +1,144 @@
+"""
+战斗阶段计时测试
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_metrics import BattleMetrics, BUCKETS_PER_OCTAVE, PHASES, PhaseStats
+from battle_system import BattleSystem
+from characters import Warrior
+from enemies import GoblinWarrior, Slime
+from simulation.batch_runner import run_batch
+from simulation.policies import GreedyPolicy
+
+
+def play_out(battle):
+    """用贪心策略打完一场战斗"""
+    policy = GreedyPolicy()
+    battle.start_player_turn()
+    while not battle.is_battle_over():
+        card_index = policy.choose_action(battle)
+        if card_index is None or battle.play_card(card_index) is None:
+            battle.end_player_turn()
+            battle.execute_enemy_action()
+
+
+class TestPhaseStats:
+    """单阶段统计"""
+
+    def test_percentiles_nearest_rank(self):
+        stats = PhaseStats()
+        for value in range(1, 101):
+            stats.add(value / 1000)
+        result = stats.to_dict()
+        assert (result["count"], result["max"]) == (100, 0.1)
+        # 分位数取所在桶的中点，相对误差不超过半个桶宽
+        error = 2 ** (0.5 / BUCKETS_PER_OCTAVE)
+        for key, expected in (("p50", 0.05), ("p90", 0.09), ("p99", 0.099)):
+            assert expected / error <= result[key] <= expected * error
+
+    def test_constant_durations_exact(self):
+        stats = PhaseStats()
+        for _ in range(10):
+            stats.add(0.0123)
+        assert {stats.to_dict()[f"p{p}"] for p in (50, 90, 99)} == {0.0123}
+
+    def test_zero_duration(self):
+        stats = PhaseStats()
+        stats.add(0.0)
+        stats.add(0.001)
+        result = stats.to_dict()
+        assert result["p50"] < 1e-8 and result["max"] == 0.001
+
+    def test_memory_bounded(self):
+        stats = PhaseStats()
+        for value in range(200000):
+            stats.add((value % 5000 + 1) * 1e-6)
+        # 1微秒到5毫秒约12个2倍区间
+        assert stats.count == 200000 and len(stats.buckets) <= 13 * BUCKETS_PER_OCTAVE
+
+    def test_merge_equals_adding_all(self):
+        combined, left, right = PhaseStats(), PhaseStats(), PhaseStats()
+        for value in range(1, 1001):
+            combined.add(value * 1e-6)
+            (left if value % 3 else right).add(value * 1e-6)
+        left.merge(right)
+        left.merge(PhaseStats())
+        assert left.to_dict() == pytest.approx(combined.to_dict())
+        assert left.buckets == combined.buckets
+
+    def test_merge_into_empty(self):
+        stats, other = PhaseStats(), PhaseStats()
+        other.add(0.002)
+        stats.merge(other)
+        assert stats.to_dict() == other.to_dict()
+
+    def test_empty(self):
+        assert PhaseStats().to_dict()["p99"] == 0.0
+
+
+class TestBattleMetrics:
+    """战斗计时"""
+
+    def test_disabled_by_default(self):
+        battle = BattleSystem(Warrior(), Slime(), seed=0)
+        assert battle.get_metrics() == {}
+        assert not any(phase in battle.__dict__ for phase in PHASES)
+
+    def test_counts_phases_and_cards(self):
+        battle = BattleSystem(Warrior(), GoblinWarrior(), seed=1)
+        battle.enable_metrics()
+        play_out(battle)
+        metrics = battle.get_metrics()
+        played = len([action for action in battle.action_history if action])
+        turns = battle.action_history.count(0)
+
+        assert list(metrics)[:len(PHASES)] == list(PHASES)
+        assert metrics["start_player_turn"]["count"] == battle.turn_count
+        assert metrics["end_player_turn"]["count"] == turns
+        assert sum(stats["count"] for name, stats in metrics.items() if name.startswith("card:")) == played
+        assert metrics["play_card"]["count"] >= played
+
+    def test_nested_phases_counted_once(self):
+        metrics = BattleMetrics()
+        inner = metrics.wrap("inner", lambda: time.sleep(0.01))
+
+        def outer_body():
+            inner()
+        outer = metrics.wrap("outer", outer_body)
+        outer()
+        result = metrics.get_metrics()
+        assert result["inner"]["total"] >= 0.01
+        assert result["outer"]["total"] < 0.005
+
+    def test_disable_restores_methods(self):
+        battle = BattleSystem(Warrior(), Slime(), seed=2)
+        metrics = battle.enable_metrics()
+        battle.start_player_turn()
+        assert battle.disable_metrics() is metrics
+        battle.end_player_turn()
+        assert metrics.get_metrics()["start_player_turn"]["count"] == 1
+        assert "end_player_turn" not in metrics.phases
+        assert battle.get_metrics() == {}
+
+    def test_clone_not_instrumented(self):
+        battle = BattleSystem(Warrior(), Slime(), seed=3)
+        battle.enable_metrics()
+        battle.start_player_turn()
+        other = battle.clone()
+        other.end_player_turn()
+        assert "end_player_turn" not in battle.metrics.phases
+
+    def test_batch_metrics_merged_and_dumped(self, tmp_path):
+        metrics = BattleMetrics()
+        run_batch(battles=20, enemies=["slime", "goblin_archer"], workers=1, seed=0, chunk_size=5, metrics=metrics)
+        path = tmp_path / "metrics.json"
+        metrics.dump(str(path))
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["start_player_turn"]["count"] >= 40
+        assert "card:strike" in data
@@ -0,0 +1,152 @@
+"""
+战斗服务器测试
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from server.battle_server import BattleServer
+from server.load_client import run_load
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_new_session_and_diff():
+    """出牌后只返回变化的字段"""
+    server = BattleServer()
+    created = server.handle({"cmd": "new", "enemies": ["slime"], "seed": 7, "id": "a"})
+    assert created["ok"] and created["id"] == "a"
+    state = created["state"]
+    assert state["state"] == "玩家回合" and len(state["hand"]) == 5
+
+    played = server.handle({"cmd": "play", "session": created["session"], "card": 0})
+    assert played["ok"]
+    diff = played["diff"]
+    assert "hand" in diff and "turn" not in diff and "max_hp" not in diff
+    assert server.handle({"cmd": "state", "session": created["session"]})["state"]["hand"] == diff["hand"]
+
+
+def test_same_seed_same_battle():
+    """同一种子的会话状态一致"""
+    server = BattleServer()
+    first = server.handle({"cmd": "new", "enemies": ["goblin_warrior"], "seed": 3})
+    second = server.handle({"cmd": "new", "enemies": ["goblin_warrior"], "seed": 3})
+    assert first["session"] != second["session"]
+    assert first["state"] == second["state"]
+
+
+def test_end_turn_runs_enemy_action():
+    """结束回合后自动执行敌人行动，回到玩家回合"""
+    server = BattleServer()
+    session = server.handle({"cmd": "new", "enemies": ["slime"], "seed": 1})["session"]
+    response = server.handle({"cmd": "end_turn", "session": session})
+    assert response["ok"]
+    assert response["diff"]["turn"] == 2
+    assert server.handle({"cmd": "state", "session": session})["state"]["state"] == "玩家回合"
+
+
+def test_errors():
+    """错误请求返回ok为false，不影响会话"""
+    server = BattleServer()
+    session = server.handle({"cmd": "new", "seed": 1})["session"]
+    assert not server.handle({"cmd": "fly"})["ok"]
+    assert not server.handle({"cmd": "new", "enemies": ["dragon"]})["ok"]
+    assert not server.handle({"cmd": "play", "session": 999, "card": 0})["ok"]
+    assert not server.handle({"cmd": "play", "session": session, "card": 99})["ok"]
+    assert not server.handle({"cmd": "play", "session": session, "card": "x"})["ok"]
+    assert json.loads(server.handle_line(b"{not json\n"))["ok"] is False
+    assert json.loads(server.handle_line(b"[1]\n"))["ok"] is False
+    assert server.handle({"cmd": "state", "session": session})["ok"]
+    stats = server.handle({"cmd": "stats"})["stats"]
+    assert stats["errors"] == 7 and stats["sessions"] == 1
+
+
+@pytest.mark.parametrize("request_body", [
+    {"cmd": ["x"]},
+    {"cmd": {"a": 1}},
+    {"cmd": "play", "session": [1], "card": 0},
+    {"cmd": "play", "session": {"1": 1}, "card": 0},
+    {"cmd": "play", "session": True, "card": 0},
+    {"cmd": "play", "session": 1, "card": True},
+    {"cmd": "play", "session": 1, "card": [0]},
+    {"cmd": "state", "session": 1.0},
+    {"cmd": "new", "seed": True},
+    {"cmd": "new", "enemies": [["slime"]]},
+])
+def test_malformed_fields(request_body):
+    """字段类型错误时返回ok为false，连接和会话不受影响"""
+    server = BattleServer()
+    session = server.handle({"cmd": "new", "seed": 1})["session"]
+    assert session == 1
+    response = server.handle(request_body)
+    assert response["ok"] is False and response["error"]
+    assert json.loads(server.handle_line(json.dumps(request_body)))["ok"] is False
+    assert server.handle({"cmd": "play", "session": session, "card": 0})["ok"]
+    assert server.stats["errors"] == 2
+
+def test_idle_eviction():
+    """空闲超时的会话被回收，活动的会话保留"""
+    clock = FakeClock()
+    server = BattleServer(idle_timeout=10, clock=clock)
+    idle = server.handle({"cmd": "new", "seed": 1})["session"]
+    active = server.handle({"cmd": "new", "seed": 2})["session"]
+    clock.now = 8
+    server.handle({"cmd": "state", "session": active})
+    clock.now = 12
+    assert server.evict_idle() == 1
+    assert idle not in server.sessions and active in server.sessions
+    assert not server.handle({"cmd": "state", "session": idle})["ok"]
+
+
+def test_max_sessions():
+    """会话数达到上限后拒绝创建，关闭后可以继续创建"""
+    server = BattleServer(max_sessions=2)
+    first = server.handle({"cmd": "new"})["session"]
+    server.handle({"cmd": "new"})
+    assert not server.handle({"cmd": "new"})["ok"]
+    assert server.handle({"cmd": "close", "session": first})["ok"]
+    assert server.handle({"cmd": "new"})["ok"]
+
+
+async def _load_over(unix_path=None):
+    """启动服务器并用压测客户端打完一批战斗"""
+    server = BattleServer()
+    listener = await server.start("127.0.0.1", 0, unix_path)
+    port = None if unix_path else listener.sockets[0].getsockname()[1]
+    try:
+        stats = await run_load("127.0.0.1", port, unix_path, connections=4, sessions=12)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.stop()
+    return server, stats
+
+
+def test_load_client_over_tcp():
+    """压测客户端通过TCP打完所有战斗，服务器上不残留会话"""
+    server, stats = asyncio.run(_load_over())
+    assert stats.sessions == 12 and stats.errors == 0
+    assert stats.percentile(50) <= stats.percentile(99)
+    assert stats.to_dict()["sessions_per_sec"] > 0
+    assert server.stats["created"] == server.stats["closed"] == 12
+    assert not server.sessions
+
+
+@pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="不支持Unix套接字")
+def test_load_client_over_unix_socket(tmp_path):
+    """压测客户端通过Unix套接字连接"""
+    server, stats = asyncio.run(_load_over(str(tmp_path / "battle.sock")))
+    assert stats.sessions == 12 and stats.errors == 0
+    assert server.stats["connections"] == 4
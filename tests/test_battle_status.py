@@ -0,0 +1,113 @@
+"""
+战斗状态缓存测试
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem
+from cards import get_card
+from characters import Warrior
+from enemies import GoblinWarrior, Slime
+from enemies.enemy import IntentType
+from replay import Replay
+from run_map import MapNode, NodeType, RunMap
+from save_journal import RunSnapshot
+from simulation.stress_test import create_stress_battle
+
+
+def started_battle():
+    """创建战斗并开始玩家回合"""
+    battle = BattleSystem(Warrior(), [GoblinWarrior(), Slime()], seed=4)
+    battle.start_player_turn()
+    return battle
+
+
+def expected_status(battle):
+    """不经过缓存直接计算的战斗状态"""
+    player = battle.player
+    enemy = battle.enemy
+    return {
+        "state": battle.state.value,
+        "turn": battle.turn_count,
+        "player_hp": player.hp,
+        "player_max_hp": player.max_hp,
+        "player_energy": player.energy,
+        "player_max_energy": player.max_energy,
+        "player_armor": player.armor,
+        "hand_size": len(player.hand),
+        "deck_size": len(player.deck),
+        "discard_size": len(player.discard_pile),
+        "enemy_hp": enemy.hp,
+        "enemy_max_hp": enemy.max_hp,
+        "enemy_armor": enemy.armor,
+        "enemy_intent": battle.get_enemy_intent_text(),
+        "enemy_count": len(battle.enemies.alive()),
+    }
+
+
+MUTATORS = {
+    "player.take_damage": lambda b: b.player.take_damage(7),
+    "player.heal": lambda b: (b.player.take_damage(9), b.get_battle_status(), b.player.heal(4)),
+    "player.set_hp": lambda b: b.player.set_hp(33, 90),
+    "player.add_armor": lambda b: b.player.add_armor(5),
+    "player.clear_armor": lambda b: (b.player.add_armor(5), b.get_battle_status(), b.player.clear_armor()),
+    "player.add_status": lambda b: b.player.add_status("strength", 2),
+    "player.add_card_to_deck": lambda b: b.player.add_card_to_deck(get_card("whirlwind")),
+    "player.draw_cards": lambda b: b.player.draw_cards(2, b.rng),
+    "player.discard_all": lambda b: b.player.discard_all(),
+    "player.start_turn": lambda b: (b.player.play_card(0, b.enemy), b.get_battle_status(), b.player.start_turn()),
+    "enemy.take_damage": lambda b: b.enemy.take_damage(5),
+    "enemy.set_hp": lambda b: b.enemy.set_hp(12, 60),
+    "enemy.add_armor": lambda b: b.enemy.add_armor(4),
+    "enemy.set_intent": lambda b: b.enemy.set_intent(IntentType.BUFF, 3),
+    "enemy.plan_next_action": lambda b: b.enemy.plan_next_action(b.player),
+    "enemies.take_damage_all": lambda b: b.enemies.take_damage_all(50),
+    "battle.play_card": lambda b: b.play_card(0),
+    "battle.end_player_turn": lambda b: b.end_player_turn(),
+    "battle.execute_enemy_action": lambda b: (b.end_player_turn(), b.get_battle_status(),
+                                              b.execute_enemy_action()),
+    "battle.restore": lambda b: (b.__setattr__("_undo", b.snapshot()), b.play_card(0), b.get_battle_status(),
+                                 b.restore(b._undo)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(MUTATORS))
+def test_status_read_after_mutation(name):
+    """每种修改之后读取的战斗状态都是最新的"""
+    battle = started_battle()
+    assert battle.get_battle_status() == dict(expected_status(battle), log=battle.battle_log)
+    version = battle.get_version()
+    MUTATORS[name](battle)
+    assert battle.get_version() > version
+    status = battle.get_battle_status()
+    assert {key: status[key] for key in expected_status(battle)} == expected_status(battle)
+
+
+def test_unchanged_status_is_reused():
+    """状态没有变化时返回同一个字典，不重新计算"""
+    battle = started_battle()
+    first = battle.get_battle_status()
+    assert battle.get_battle_status() is first
+    assert battle.get_version() == battle.get_version()
+
+
+def test_loaded_hp_bumps_version():
+    """读档、回放、按幕调整敌人强度和压力测试设置HP时都会更新版本号"""
+    player = Warrior()
+    player.take_damage(10)
+    run_map = RunMap(seed=1, acts=3)
+    loaded = RunSnapshot.capture(run_map, player).create_player()
+    assert loaded.hp == player.hp and loaded.version > Warrior().version
+
+    replay = Replay.from_battle(started_battle())
+    replay.player_hp = 50
+    assert replay.create_battle().get_battle_status()["player_hp"] == 50
+
+    for enemy in run_map.create_enemies(MapNode(30, 0, NodeType.ELITE, 0)):
+        assert enemy.hp == enemy.max_hp and enemy.version > 0
+
+    stress = create_stress_battle(3)
+    assert stress.get_battle_status()["player_hp"] == stress.player.max_hp
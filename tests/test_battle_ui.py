@@ -0,0 +1,237 @@
+"""
+战斗界面测试：局部重绘、文字缓存、卡牌描述换行、牌面图集
+"""
+import os
+import sys
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from cards import CARD_DEFINITIONS, Card, get_card
+from characters import Warrior
+from enemies import GoblinWarrior, Slime
+from ui import BattleUI, CardAtlas, FontManager, TextCache
+
+
+@pytest.fixture
+def ui(monkeypatch):
+    """使用dummy视频驱动的战斗界面"""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    battle_ui = BattleUI()
+    battle_ui.init()
+    yield battle_ui
+    pygame.quit()
+
+
+def started_battle(seed=1, enemies=None):
+    """创建已开始第一回合的战斗"""
+    battle = BattleSystem(Warrior(), enemies or GoblinWarrior(), seed=seed)
+    battle.start_player_turn()
+    return battle
+
+
+def pixels(surface):
+    """画面的像素数据"""
+    return pygame.image.tostring(surface, "RGB")
+
+
+def full_frame(ui, battle):
+    """整个画面重绘得到的像素"""
+    ui.invalidate()
+    ui.draw_battle(battle)
+    ui.flip()
+    return pixels(ui.screen)
+
+
+def test_unchanged_frame_draws_nothing(ui):
+    """画面没有变化时不重绘也不推送"""
+    battle = started_battle()
+    ui.draw_battle(battle)
+    ui.flip()
+    before = pixels(ui.screen)
+    ui.draw_battle(battle)
+    assert ui._dirty_rects == []
+    assert pixels(ui.screen) == before
+
+
+def test_partial_redraw_matches_full_redraw(ui):
+    """局部重绘的结果与整个画面重绘一致，只推送变化的区域"""
+    battle = started_battle(enemies=[GoblinWarrior(), Slime()])
+    ui.draw_battle(battle)
+    ui.flip()
+    screen_area = ui.width * ui.height
+    steps = 0
+    while battle.state != BattleState.VICTORY and battle.state != BattleState.DEFEAT and steps < 40:
+        steps += 1
+        if steps % 3 == 0:
+            ui.hint = None if ui.hint is not None else (-1 if steps % 2 else 0)
+        elif battle.play_card(0) is None:
+            battle.end_player_turn()
+            if battle.state == BattleState.ENEMY_TURN:
+                battle.execute_enemy_action()
+        ui.draw_battle(battle)
+        assert sum(rect.width * rect.height for rect in ui._dirty_rects) < screen_area
+        ui.flip()
+        partial = pixels(ui.screen)
+        assert partial == full_frame(ui, battle)
+
+
+def test_battle_result_overlay(ui):
+    """战斗结束的文字和商店选项出现、变化和消失时画面正确"""
+    battle = started_battle()
+    ui.draw_battle(battle)
+    ui.flip()
+    for enemy in battle.enemies:
+        enemy.hp = 1
+    while battle.state != BattleState.VICTORY:
+        if battle.play_card(0) is None:
+            battle.end_player_turn()
+            battle.execute_enemy_action()
+    ui.shop_cards = [get_card("heavy_attack"), get_card("demon_form")]
+    ui.draw_battle(battle)
+    ui.flip()
+    assert pixels(ui.screen) == full_frame(ui, battle)
+
+    ui.shop_cards = None
+    ui.map_choices = ["战斗", "休息"]
+    ui.draw_battle(battle)
+    ui.flip()
+    assert pixels(ui.screen) == full_frame(ui, battle)
+
+
+def test_new_battle_redraws_everything(ui):
+    """换成新的战斗时整个画面重绘"""
+    ui.draw_battle(started_battle(seed=1))
+    ui.flip()
+    ui.draw_battle(started_battle(seed=2))
+    assert ui._dirty_rects == [ui.screen.get_rect()]
+
+
+def test_text_cache_lru():
+    """文字缓存按最近最少使用淘汰并统计命中"""
+    cache = TextCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "capacity": 2}
+
+
+def test_font_manager_render_reuses_surface(ui):
+    """同样的文字、字号、颜色和抗锯齿只渲染一次"""
+    fonts = FontManager(text_cache_size=8)
+    first = fonts.render("结束回合", 28, (255, 255, 255))
+    assert fonts.render("结束回合", 28, (255, 255, 255)) is first
+    assert fonts.render("结束回合", 28, (255, 0, 0)) is not first
+    assert fonts.render("结束回合", 20, (255, 255, 255)) is not first
+    assert fonts.render("结束回合", 28, (255, 255, 255), antialias=False) is not first
+    assert fonts.text_cache.hits == 1 and fonts.text_cache.misses == 4
+
+
+def test_idle_redraw_hits_text_cache(ui):
+    """整帧重绘时没有变化的文字全部命中缓存"""
+    battle = started_battle()
+    ui.draw_battle(battle)
+    misses = ui.font_manager.text_cache.misses
+    ui.invalidate()
+    ui.draw_battle(battle)
+    assert ui.font_manager.text_cache.misses == misses
+    assert ui.font_manager.text_cache.hits > 20
+
+
+def wrap_by_size(text, font, max_width):
+    """逐个前缀测量整行宽度的换行，作为对照"""
+    lines = []
+    current = ""
+    for char in text:
+        if current and font.size(current + char)[0] > max_width:
+            lines.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        lines.append(current)
+    return tuple(lines)
+
+
+def test_wrap_text_matches_full_measurement(ui):
+    """按字符前进宽度累加的换行与测量整行的结果一致"""
+    fonts = FontManager()
+    font = fonts.get_font(20)
+    for card in CARD_DEFINITIONS:
+        for width in (60, 100, 160):
+            assert fonts.wrap_text(card.description, 20, width) == wrap_by_size(card.description, font, width)
+
+
+def test_wrap_text_is_memoized(ui):
+    """同样的文字、字体和宽度只计算一次，每个字符只测量一次"""
+    fonts = FontManager()
+    text = "造成6点伤害。造成6点伤害。"
+    lines = fonts.wrap_text(text, 20, 50)
+    assert fonts.wrap_text(text, 20, 50) is lines
+    assert fonts.wrap_cache.get_stats()["hits"] == 1
+    assert set(fonts.advances[(20, False)]) == set(text)
+    assert fonts.wrap_text(text, 20, 500) == (text,)
+    assert fonts.wrap_text("", 20, 50) == ()
+    assert fonts.wrap_text("WW", 20, 1) == ("W", "W")
+
+
+def counting_atlas(columns=2, rows=2):
+    """记录绘制次数的图集"""
+    drawn = []
+    atlas = CardAtlas(lambda surface, card, x, y: drawn.append((card.card_id, card.cost)), 10, 10, columns, rows)
+    return atlas, drawn
+
+
+def test_card_atlas_draws_each_face_once(ui):
+    """每种牌面只绘制一次，升级后是另一种牌面"""
+    atlas, drawn = counting_atlas()
+    strike = get_card("strike")
+    target = pygame.Surface((100, 100))
+    for _ in range(3):
+        atlas.blit(target, strike, (0, 0))
+    atlas.blit(target, get_card("strike", upgraded=True), (20, 0))
+    assert drawn == [(strike.card_id, strike.cost), (strike.card_id + 1, get_card("strike", upgraded=True).cost)]
+    assert atlas.get_stats()["hits"] == 2 and len(atlas) == 2
+
+
+def test_card_atlas_invalidates_changed_face(ui):
+    """费用变化后重新绘制牌面，旧牌面的格子被回收"""
+    atlas, drawn = counting_atlas()
+    card = get_card("defend")
+    # 卡牌定义是冻结的，用同一卡牌ID、费用为0的卡牌代替费用变化后的牌面
+    cheaper = Card(card.name, card.card_type, 0, card.description, card.upgraded, card.key, card.card_id)
+    area = atlas.get(card)
+    assert atlas.get(cheaper) == area
+    assert drawn == [(card.card_id, 1), (card.card_id, 0)]
+    assert atlas.invalidations == 1 and len(atlas) == 1
+
+
+def test_card_atlas_full_restarts(ui):
+    """图集满时清空后重新绘制"""
+    atlas, drawn = counting_atlas(columns=1, rows=2)
+    cards = [get_card("strike"), get_card("defend"), get_card("iron_wave")]
+    for card in cards:
+        atlas.get(card)
+    assert len(atlas) == 1 and len(drawn) == 3
+    atlas.get(cards[0])
+    assert len(drawn) == 4
+
+
+def test_large_hand_uses_atlas(ui):
+    """12张手牌只绘制不同的牌面，画面与整帧重绘一致"""
+    battle = started_battle()
+    battle.player.hand = [get_card(key) for key in ("strike", "defend", "heavy_attack")] * 4
+    ui.draw_battle(battle)
+    ui.flip()
+    assert ui.card_atlas.get_stats()["misses"] == 3
+    assert ui.card_atlas.get_stats()["hits"] == 9
+    ui.hint = 11
+    ui.draw_battle(battle)
+    ui.flip()
+    assert pixels(ui.screen) == full_frame(ui, battle)
@@ -0,0 +1,48 @@
+"""
+基准测试工具的测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from run_benchmarks import BENCHMARKS, DEFAULT_BASELINE, compare, load_baseline, main, run_benchmarks, run_gauntlet, save_baseline
+from simulation.policies import GreedyPolicy
+
+
+class TestBenchmarks:
+    """基准测试工具"""
+
+    def test_every_benchmark_runs(self):
+        results = run_benchmarks(min_time=0.001, repeat=1)
+        assert set(results) <= set(BENCHMARKS)
+        assert all(seconds > 0 for seconds in results.values())
+
+    def test_gauntlet_completes(self):
+        assert run_gauntlet(GreedyPolicy(), seed=0) in (True, False)
+
+    def test_compare_flags_regressions(self):
+        rows = compare({"a": 1.2, "b": 1.3, "c": 1.0}, {"a": 1.0, "b": 1.0}, threshold=0.25)
+        assert [(name, regressed) for name, _, _, _, regressed in rows] == [("a", False), ("b", True), ("c", False)]
+        assert rows[2][2:4] == (None, None)
+
+    def test_compare_reports_missing_baseline(self, tmp_path, capsys):
+        path = str(tmp_path / "baseline.json")
+        save_baseline(path, {"battle": 1.0})
+        assert main(["-k", "take_damage", "--quick", "--compare", "--baseline", path]) == 0
+        out = capsys.readouterr().out
+        assert "take_damage" in out and "无基线" in out and "1项基准没有基线" in out
+
+    def test_checked_in_baseline_covers_every_benchmark(self):
+        assert set(load_baseline(DEFAULT_BASELINE)) == set(BENCHMARKS)
+
+    def test_baseline_round_trip(self, tmp_path):
+        path = str(tmp_path / "baseline.json")
+        save_baseline(path, {"battle": 8e-5})
+        assert load_baseline(path) == {"battle": 8e-5}
+
+    def test_compare_exit_code(self, tmp_path, capsys):
+        path = str(tmp_path / "baseline.json")
+        save_baseline(path, {"take_damage": 1e-12})
+        assert main(["-k", "take_damage", "--quick", "--compare", "--baseline", path]) == 1
+        save_baseline(path, {"take_damage": 1.0})
+        assert main(["-k", "take_damage", "--quick", "--compare", "--baseline", path]) == 0
@@ -0,0 +1,188 @@
+"""
+卡牌目录测试
+"""
+import copy
+import json
+import os
+import pickle
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from cards import CATALOG, CardCatalog, CardType, card_effects, card_id, get_card, parse_catalog
+from characters import Warrior
+from enemies import Enemy, EnemyGroup
+
+
+def entry(key="test", **fields):
+    """创建一张卡牌的表项"""
+    card = {"key": key, "name": key, "type": "ATTACK", "rarity": "common", "cost": 1,
+            "description": "造成{damage}点伤害", "effects": {"damage": 6}, "upgrade": {"damage": 9}}
+    card.update(fields)
+    return card
+
+
+def write_catalog(path, entries):
+    """写入卡牌表"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+
+class TestBuiltinCatalog:
+    """内置卡牌"""
+
+    @pytest.mark.parametrize("key, upgraded, cost, effects, description", [
+        ("strike", False, 1, (6, 0, 0, 0), "造成6点伤害"),
+        ("strike", True, 1, (9, 0, 0, 0), "造成9点伤害"),
+        ("iron_wave", True, 1, (8, 8, 0, 0), "造成8点伤害，获得8点护甲"),
+        ("burning", False, 1, (0, 0, 3, 0), "每回合造成3点火伤"),
+        ("burning", True, 1, (0, 0, 5, 0), "每回合造成5点火伤"),
+        ("demon_form", True, 3, (0, 0, 0, 2), "每回合获得2点力量"),
+    ])
+    def test_card_values(self, key, upgraded, cost, effects, description):
+        card = get_card(key, upgraded)
+        assert (card.cost, card_effects(card), card.description) == (cost, effects, description)
+
+    def test_card_ids_stable(self):
+        # 回放中的卡牌ID依赖目录顺序
+        assert [card_id(get_card(key)) for key in ("strike", "heavy_attack", "whirlwind", "defend")] == [0, 2, 4, 6]
+
+    def test_upgrade_shares_definitions(self):
+        card = get_card("defend")
+        assert card.upgrade() is get_card("defend", upgraded=True)
+        assert card.upgrade().upgrade() is card.upgrade()
+        assert card.clone() is card
+        assert copy.deepcopy([card])[0] is card
+        assert pickle.loads(pickle.dumps(card)).upgrade().armor == card.upgrade().armor
+
+    @pytest.mark.parametrize("field, value", [("cost", 0), ("damage", 99), ("description", ""), ("variants", ())])
+    def test_definitions_frozen(self, field, value):
+        card = get_card("strike")
+        with pytest.raises(AttributeError):
+            setattr(card, field, value)
+        assert (card.cost, card.damage, card.description) == (1, 6, "造成6点伤害")
+
+    def test_upgrading_one_card_keeps_others(self):
+        player = Warrior()
+        player.reset_deck()
+        player.draw_cards(len(player.deck))
+        strikes = [i for i, card in enumerate(player.hand) if card.key == "strike"]
+        player.hand[strikes[0]] = player.hand[strikes[0]].upgrade()
+        assert player.hand[strikes[0]] is get_card("strike", upgraded=True)
+        assert all(player.hand[i] is get_card("strike") for i in strikes[1:])
+        assert (get_card("strike").upgraded, card_effects(get_card("strike"))) == (False, (6, 0, 0, 0))
+        assert [CATALOG.definitions[i].key for i in player.deck].count("strike") == 5
+
+    def test_warrior_starter_deck(self):
+        deck = [CATALOG.definitions[i].key for i in Warrior().deck]
+        assert deck == ["strike"] * 5 + ["defend"] * 4 + ["heavy_attack", "iron_wave"]
+
+    def test_status_cards(self):
+        player = Warrior()
+        enemy = Enemy("测试", 50)
+        get_card("burning").play(player, enemy)
+        get_card("demon_form", upgraded=True).play(player, enemy)
+        assert (enemy.get_status("burning"), player.get_status("demon_form")) == (3, 2)
+
+    def test_single_target_damage_ignores_group(self):
+        group = EnemyGroup([Enemy("甲", 20), Enemy("乙", 20)])
+        get_card("strike").play(Warrior(), group[0])
+        assert [enemy.hp for enemy in group] == [14, 20]
+
+
+class TestParseCatalog:
+    """卡牌表校验"""
+
+    def test_upgrade_overrides_cost_and_merges_status(self):
+        rows = parse_catalog([entry(
+            type="ABILITY", description="{burning}/{poison}",
+            effects={"enemy_status": {"burning": 1, "poison": 2}},
+            upgrade={"cost": 0, "enemy_status": {"burning": 4}},
+        )])
+        catalog = CardCatalog(rows)
+        card = catalog.get("test", upgraded=True)
+        assert (card.cost, card.card_type, card.description) == (0, CardType.ABILITY, "4/2")
+
+    @pytest.mark.parametrize("bad", [
+        {"type": "SPELL"},
+        {"rarity": "mythic"},
+        {"cost": -1},
+        {"effects": {"damage": "6"}},
+        {"effects": {"heal": 3}},
+        {"effects": {"damage": 6, "target": "random"}},
+        {"effects": {"enemy_status": {"frozen": 1}}},
+        {"description": "造成{block}点伤害"},
+    ])
+    def test_invalid_entries_rejected(self, bad):
+        with pytest.raises(ValueError):
+            parse_catalog([entry(**bad)])
+
+    def test_duplicate_and_missing_fields_rejected(self):
+        with pytest.raises(ValueError):
+            parse_catalog([entry(), entry()])
+        card = entry()
+        del card["cost"]
+        with pytest.raises(ValueError):
+            parse_catalog([card])
+
+
+class TestCatalogCache:
+    """磁盘缓存"""
+
+    def test_cache_used_until_source_changes(self, tmp_path):
+        path = tmp_path / "cards.json"
+        write_catalog(path, [entry()])
+        assert not CardCatalog.load(str(path)).from_cache
+        assert CardCatalog.load(str(path)).from_cache
+
+        write_catalog(path, [entry(effects={"damage": 7}), entry("other")])
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        catalog = CardCatalog.load(str(path))
+        assert not catalog.from_cache
+        assert (len(catalog), catalog.get("test").damage) == (2, 7)
+
+    def test_corrupt_cache_ignored(self, tmp_path):
+        path = tmp_path / "cards.json"
+        write_catalog(path, [entry()])
+        CardCatalog.load(str(path))
+        cache = tmp_path / "__pycache__" / "cards.catalog.pickle"
+        cache.write_bytes(b"broken")
+        assert CardCatalog.load(str(path)).get("test").damage == 6
+
+    @pytest.mark.parametrize("payload", [
+        None,
+        ("signature",),
+        "rows",
+        [(1, 2)],
+    ])
+    def test_wrong_shape_cache_ignored(self, tmp_path, payload):
+        path = tmp_path / "cards.json"
+        write_catalog(path, [entry()])
+        CardCatalog.load(str(path))
+        cache = tmp_path / "__pycache__" / "cards.catalog.pickle"
+        cache.write_bytes(pickle.dumps(payload))
+        catalog = CardCatalog.load(str(path))
+        assert not catalog.from_cache and catalog.get("test").damage == 6
+
+    def test_cache_with_bad_rows_ignored(self, tmp_path):
+        path = tmp_path / "cards.json"
+        write_catalog(path, [entry()])
+        CardCatalog.load(str(path))
+        cache = tmp_path / "__pycache__" / "cards.catalog.pickle"
+        signature = pickle.loads(cache.read_bytes())[0]
+        for rows in ([None, None], [("too", "short"), ("too", "short")], [1]):
+            cache.write_bytes(pickle.dumps((signature, rows)))
+            catalog = CardCatalog.load(str(path))
+            assert not catalog.from_cache and catalog.get("test").damage == 6
+
+    def test_large_catalog_loads_from_cache(self, tmp_path):
+        path = tmp_path / "cards.json"
+        write_catalog(path, [entry(f"card{i}", effects={"damage": i}) for i in range(3000)])
+        CardCatalog.load(str(path))
+        start = time.perf_counter()
+        catalog = CardCatalog.load(str(path))
+        elapsed = time.perf_counter() - start
+        assert catalog.from_cache and len(catalog.definitions) == 6000
+        assert elapsed < 0.5
@@ -0,0 +1,65 @@
+"""
+卡组构成扫描测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from simulation.deck_sweep import cache_key, enumerate_decks, run_sweep, write_tables
+
+
+def brute_force(constraints, min_size, max_size):
+    """逐个检查所有张数组合"""
+    decks = [()]
+    for key, (low, high) in constraints.items():
+        decks = [deck + ((key, count),) for deck in decks for count in range(low, high + 1)]
+    return sorted(
+        tuple((key, count) for key, count in deck if count)
+        for deck in decks if min_size <= sum(count for _, count in deck) <= max_size
+    )
+
+
+class TestEnumerateDecks:
+    """卡组枚举"""
+
+    def test_matches_brute_force(self):
+        constraints = {"strike": (2, 6), "defend": (0, 5), "whirlwind": (0, 2), "burning": (1, 3)}
+        assert sorted(enumerate_decks(constraints, 7, 10)) == brute_force(constraints, 7, 10)
+
+    def test_no_deck_in_range(self):
+        assert enumerate_decks({"strike": (0, 2)}, 5, 6) == []
+
+
+class TestSweepCache:
+    """结果缓存"""
+
+    def test_only_changed_combinations_simulated(self, tmp_path):
+        cache_dir = str(tmp_path)
+        options = dict(min_size=4, max_size=4, battles=3, workers=1, cache_dir=cache_dir)
+        results, simulated = run_sweep({"strike": (2, 3), "defend": (1, 2)}, enemies=["slime"], **options)
+        assert (len(results), simulated) == (2, 2)
+
+        again, simulated = run_sweep({"strike": (2, 3), "defend": (1, 2)}, enemies=["slime"], **options)
+        assert simulated == 0
+        assert again == results
+
+        _, simulated = run_sweep({"strike": (2, 4), "defend": (0, 2)}, enemies=["slime", "goblin_archer"], **options)
+        assert simulated == 3 * 2 - 2
+
+    def test_key_depends_on_deck_enemy_and_parameters(self):
+        deck = (("strike", 5), ("defend", 4))
+        base = cache_key(deck, "slime", "greedy", 100, 0, 100)
+        assert base == cache_key(deck, "slime", "greedy", 100, 0, 100)
+        assert base != cache_key((("strike", 4), ("defend", 5)), "slime", "greedy", 100, 0, 100)
+        assert base != cache_key(deck, "goblin_archer", "greedy", 100, 0, 100)
+        assert base != cache_key(deck, "slime", "random", 100, 0, 100)
+        assert base != cache_key(deck, "slime", "greedy", 100, 1, 100)
+
+    def test_write_tables(self, tmp_path):
+        results, _ = run_sweep({"strike": (3, 4), "defend": (2, 2)}, 5, 6, enemies=["slime"],
+                               battles=2, workers=1, cache_dir=None)
+        path = tmp_path / "sweep.csv"
+        write_tables(results, ["slime"], str(path))
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[0].startswith("deck,size,slime_win_rate")
+        assert len(lines) == 3
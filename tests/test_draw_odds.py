@@ -0,0 +1,119 @@
+"""
+抽牌概率测试
+"""
+import itertools
+import os
+import sys
+from fractions import Fraction
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem
+from cards import get_card
+from characters import Warrior
+from enemies import GoblinWarrior
+from draw_odds import combo_probability, deal, draw_probability, next_turn_odds
+
+
+def player_with(draw, discard=(), hand=()):
+    """创建指定牌堆的战士，牌堆用卡牌键列表表示"""
+    player = Warrior()
+    player.draw_pile = [get_card(key) for key in draw]
+    player.discard_pile = [get_card(key) for key in discard]
+    player.hand = [get_card(key) for key in hand]
+    return player
+
+
+def brute_force(draw, discard, need, turns, hand_size=5):
+    """逐个枚举抽牌堆和每次洗牌后的所有排列计算概率"""
+    def hit(hand):
+        return all(hand.count(key) >= count for key, count in need.items())
+
+    def run(draw, discard, turns):
+        if turns == 0:
+            return Fraction(0)
+        hand = draw[-hand_size:][::-1]
+        rest = draw[:-hand_size] if len(draw) > hand_size else []
+        if len(hand) < hand_size:
+            total = Fraction(0)
+            orders = list(itertools.permutations(discard))
+            for order in orders:
+                new_hand = hand + list(order[::-1][:hand_size - len(hand)])
+                new_draw = list(order[:max(0, len(order) - (hand_size - len(hand)))])
+                total += 1 if hit(new_hand) else run(new_draw, new_hand, turns - 1)
+            return total / len(orders)
+        return 1 if hit(hand) else run(rest, discard + hand, turns - 1)
+
+    orders = list(itertools.permutations(draw))
+    return sum(run(list(order), list(discard), turns) for order in orders) / len(orders)
+
+
+class TestDeal:
+    """单次抽牌"""
+
+    def test_probabilities_sum_to_one(self):
+        for draw, discard in [((3, 4, 2), (0, 0, 0)), ((1, 1, 0), (2, 3, 1)), ((0, 0, 0), (1, 1, 1))]:
+            assert sum(p for *_, p in deal(draw, discard)) == pytest.approx(1)
+
+    def test_reshuffle_keeps_drawn_cards(self):
+        outcomes = deal((1, 1), (3, 0))
+        assert all(hand[1] == 1 and hand[0] >= 1 for hand, *_ in outcomes)
+        assert all(discard == (0, 0) for _, _, discard, _ in outcomes)
+
+
+class TestDrawProbability:
+    """抽牌概率"""
+
+    def test_single_card_closed_form(self):
+        player = player_with(["heavy_attack"] + ["strike"] * 9)
+        assert draw_probability(player, "heavy_attack") == pytest.approx(0.5)
+
+    @pytest.mark.parametrize("draw, discard, need, turns", [
+        (["strike", "defend", "heavy_attack", "defend", "strike", "strike", "defend"], [],
+         {"heavy_attack": 1}, 1),
+        (["strike", "defend", "strike"], ["heavy_attack", "strike", "defend", "iron_wave"],
+         {"heavy_attack": 1, "iron_wave": 1}, 1),
+        (["strike", "heavy_attack", "defend", "strike", "defend", "iron_wave"], [],
+         {"strike": 2, "defend": 1}, 2),
+        (["defend", "strike"], ["strike", "defend", "heavy_attack", "defend", "iron_wave"],
+         {"heavy_attack": 1, "strike": 1}, 3),
+    ])
+    def test_matches_brute_force(self, draw, discard, need, turns):
+        player = player_with(draw, discard)
+        expected = brute_force(draw, discard, need, turns)
+        assert draw_probability(player, need, turns) == pytest.approx(float(expected))
+
+    def test_hand_goes_to_discard(self):
+        player = player_with(["strike"] * 5, hand=["heavy_attack"])
+        assert draw_probability(player, "heavy_attack") == 0
+        assert draw_probability(player, "heavy_attack", turns=2) == pytest.approx(5 / 6)
+
+    def test_upgraded_cards_match_key(self):
+        player = player_with([])
+        player.draw_pile = [get_card("strike", upgraded=True)] * 5
+        assert draw_probability(player, {"strike": 5}) == pytest.approx(1)
+
+    def test_memoized_on_pile_composition(self):
+        combo_probability.cache_clear()
+        draw_probability(player_with(["strike", "defend"] * 6), "defend", turns=3)
+        misses = combo_probability.cache_info().misses
+        draw_probability(player_with(["defend", "strike"] * 6), "defend", turns=3)
+        assert combo_probability.cache_info().misses == misses
+
+    def test_next_turn_odds(self):
+        player = Warrior()
+        player.reset_deck()
+        odds = next_turn_odds(player)
+        assert sorted(odds) == ["defend", "heavy_attack", "iron_wave", "strike"]
+        assert odds["heavy_attack"] == pytest.approx(5 / 11)
+
+    def test_card_choice_does_not_change_odds(self):
+        # 出牌策略不使用抽牌概率的依据：本回合打出哪张牌，下一回合的抽牌概率都一样
+        battle = BattleSystem(Warrior(), GoblinWarrior(), seed=4)
+        battle.start_player_turn()
+        expected = next_turn_odds(battle.player, turns=2)
+        for index in range(len(battle.player.hand)):
+            other = battle.clone()
+            assert other.play_card(index) is not None
+            assert next_turn_odds(other.player, turns=2) == expected
@@ -0,0 +1,114 @@
+"""
+敌人AI测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem
+from characters import Warrior
+from enemies import Enemy, ExpectimaxAI, GoblinWarrior
+from enemies.enemy import IntentType
+from enemies.enemy_ai import TranspositionTable
+
+
+class Brute(Enemy):
+    """测试用敌人：重击明显优于轻击"""
+
+    __slots__ = ()
+
+    ACTIONS = (
+        {"type": IntentType.ATTACK, "value": 1},
+        {"type": IntentType.ATTACK, "value": 10},
+    )
+
+    def __init__(self):
+        super().__init__("蛮兵", 30)
+        self.actions = self.ACTIONS
+
+
+def started_battle(enemy, seed=1):
+    """创建战斗并开始玩家回合"""
+    battle = BattleSystem(Warrior(), [enemy], seed=seed)
+    battle.start_player_turn()
+    return battle
+
+
+def test_transposition_table_evicts_least_recently_used():
+    """置换表满时淘汰最近最少使用的局面"""
+    table = TranspositionTable(capacity=2)
+    table.put("a", 1)
+    table.put("b", 2)
+    assert table.get("a") == 1
+    table.put("c", 3)
+    assert len(table) == 2
+    assert table.get("b") is None
+    assert (table.get("a"), table.get("c")) == (1, 3)
+    assert (table.hits, table.misses) == (3, 1)
+    table.put("a", 4)
+    table.put("d", 5)
+    assert table.get("c") is None and table.get("a") == 4
+
+
+def test_fixed_depth_search_is_deterministic():
+    """不限时的固定深度搜索总是完成最大深度，同一局面得到同样的行动"""
+    choices = []
+    for _ in range(3):
+        enemy = GoblinWarrior()
+        battle = started_battle(enemy)
+        ai = ExpectimaxAI(max_depth=2, time_budget=None)
+        choices.append(ai.choose_action(enemy, battle.player))
+        assert ai.last_depth == 2
+        assert ai.choose_action(enemy, battle.player) is choices[-1]
+    assert choices[0] is choices[1] is choices[2]
+    assert choices[0] in GoblinWarrior.ACTIONS
+
+
+def test_chooses_lethal_attack():
+    """能击杀玩家时选择攻击，即使行动模式轮到防御"""
+    enemy = GoblinWarrior()
+    battle = started_battle(enemy)
+    battle.player.hp = 5
+    enemy.action_index = 1
+    ai = ExpectimaxAI(max_depth=3, time_budget=None)
+    assert ai.choose_action(enemy, battle.player) == {"type": IntentType.ATTACK, "value": 6}
+
+
+def test_chooses_highest_value_intent():
+    """每一层深度都选择收益更高的意图"""
+    for depth in (1, 2, 3):
+        enemy = Brute()
+        battle = started_battle(enemy)
+        ai = ExpectimaxAI(max_depth=depth, time_budget=None)
+        assert ai.choose_action(enemy, battle.player)["value"] == 10
+
+
+def test_plan_next_action_uses_ai(monkeypatch):
+    """敌人类设置了AI时按搜索结果设置意图"""
+    monkeypatch.setattr(Brute, "AI", ExpectimaxAI(max_depth=1, time_budget=None))
+    enemy = Brute()
+    battle = started_battle(enemy)
+    for _ in range(3):
+        enemy.plan_next_action(battle.player)
+        assert (enemy.intent, enemy.intent_value) == (IntentType.ATTACK, 10)
+
+
+class _GiveUp:
+    """来不及完成一层搜索的AI"""
+
+    def choose_action(self, enemy, player):
+        return None
+
+
+def test_plan_next_action_falls_back_to_pattern(monkeypatch):
+    """没有AI或AI没有结果时按行动模式循环"""
+    for ai in (None, _GiveUp()):
+        monkeypatch.setattr(GoblinWarrior, "AI", ai)
+        enemy = GoblinWarrior()
+        battle = started_battle(enemy)
+        intents = []
+        for _ in range(len(GoblinWarrior.ACTIONS) + 1):
+            enemy.plan_next_action(battle.player)
+            intents.append({"type": enemy.intent, "value": enemy.intent_value})
+        pattern = GoblinWarrior.ACTIONS
+        assert intents == [pattern[i % len(pattern)] for i in range(1, len(pattern) + 2)]
@@ -0,0 +1,146 @@
+"""
+多敌人遭遇战测试
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_events import EventType
+from battle_system import BattleSystem, BattleState
+from cards import get_card
+from characters import Warrior
+from enemies import Enemy, EnemyGroup, GoblinWarrior, GoblinArcher, Slime
+from enemies.enemy import IntentType
+from replay import Replay
+from simulation.stress_test import measure
+
+
+def create_battle(*hps):
+    """创建给定HP的多敌人战斗"""
+    enemies = [Enemy(f"敌人{i}", hp) for i, hp in enumerate(hps)]
+    battle = BattleSystem(Warrior(), enemies, seed=0)
+    battle.start_player_turn()
+    return battle
+
+
+class TestEnemyGroup:
+    """敌人组与群体伤害"""
+
+    def test_empty_group_rejected(self):
+        with pytest.raises(ValueError):
+            EnemyGroup([])
+
+    def test_take_damage_all_matches_take_damage(self):
+        group = EnemyGroup([Enemy("甲", 20), Enemy("乙", 20), Enemy("丙", 3)])
+        group[0].add_armor(2)
+        group[1].add_armor(8)
+        expected = [Enemy("甲", 20), Enemy("乙", 20), Enemy("丙", 3)]
+        expected[0].add_armor(2)
+        expected[1].add_armor(8)
+
+        assert group.take_damage_all(5) == 3
+        for enemy in expected:
+            enemy.take_damage(5)
+        assert [(e.hp, e.armor) for e in group] == [(e.hp, e.armor) for e in expected]
+
+    def test_multi_hit_matches_take_damage(self):
+        group = EnemyGroup([Enemy("甲", 20), Enemy("乙", 20), Enemy("丙", 5)])
+        group[1].add_armor(4)
+        expected = [Enemy("甲", 20), Enemy("乙", 20), Enemy("丙", 5)]
+        expected[1].add_armor(4)
+
+        assert group.take_damage_all(3, hits=3) == 3
+        for enemy in expected:
+            enemy.take_damage(3, hits=3)
+        assert [(e.hp, e.armor) for e in group] == [(e.hp, e.armor) for e in expected] == [
+            (11, 0), (15, 0), (0, 0)]
+
+    def test_hits_stop_after_death(self):
+        enemy = Enemy("甲", 5)
+        version = enemy.version
+        assert enemy.take_damage(3, hits=4) == 6
+        assert enemy.hp == 0 and enemy.version == version + 2
+        group = EnemyGroup([Enemy("乙", 5)])
+        group.take_damage_all(3, hits=4)
+        assert group[0].version == version + 2
+
+    def test_dead_enemies_not_hit(self):
+        group = EnemyGroup([Enemy("甲", 5), Enemy("乙", 20)])
+        group.take_damage_all(5)
+        version = group[0].version
+        assert group.take_damage_all(5) == 1
+        assert group[0].version == version
+
+    def test_whirlwind_hits_all_enemies(self):
+        battle = create_battle(20, 20, 20)
+        get_card("whirlwind").play(battle.player, battle.enemy)
+        assert [enemy.hp for enemy in battle.enemies] == [15, 15, 15]
+
+    def test_damage_events_per_enemy(self):
+        battle = create_battle(20, 20)
+        get_card("whirlwind").play(battle.player, battle.enemy)
+        assert [event.format() for event in battle.battle_log][-2:] == [
+            "战士对敌人0造成5点伤害", "战士对敌人1造成5点伤害"]
+
+
+    def test_defeated_event_per_enemy(self):
+        battle = create_battle(5, 5, 20)
+        get_card("whirlwind").play(battle.player, battle.enemy)
+        log = [event.format() for event in battle.battle_log]
+        assert log[-5:] == ["战士对敌人0造成5点伤害", "敌人0被击败！", "战士对敌人1造成5点伤害",
+                            "敌人1被击败！", "战士对敌人2造成5点伤害"]
+        assert battle.state == BattleState.PLAYER_TURN
+
+    def test_victory_does_not_repeat_defeated_event(self):
+        battle = create_battle(5, 5)
+        battle.player.hand = [get_card("whirlwind")]
+        battle.play_card(0)
+        assert battle.state == BattleState.VICTORY
+        defeated = [event.target for event in battle.battle_log if event.type == EventType.DEFEATED]
+        assert defeated == ["敌人0", "敌人1"]
+class TestMultiEnemyBattle:
+    """多敌人战斗流程"""
+
+    def test_single_target_moves_to_next_alive(self):
+        battle = create_battle(6, 20)
+        battle.player.hand = [get_card("strike"), get_card("strike")]
+        battle.play_card(0)
+        assert battle.enemy is battle.enemies[1]
+        assert battle.state == BattleState.PLAYER_TURN
+
+    def test_victory_only_when_all_dead(self):
+        battle = create_battle(5, 5)
+        battle.player.hand = [get_card("whirlwind")]
+        battle.play_card(0)
+        assert battle.state == BattleState.VICTORY
+
+    def test_every_alive_enemy_plans(self):
+        battle = BattleSystem(Warrior(), [GoblinWarrior(), GoblinArcher(), Slime()], seed=1)
+        battle.start_player_turn()
+        battle.end_player_turn()
+        assert all(enemy.intent for enemy in battle.enemies)
+
+    def test_every_alive_enemy_attacks(self):
+        battle = create_battle(20, 5, 20)
+        battle.enemies[1].take_damage(5)
+        battle.end_player_turn()
+        for value, enemy in enumerate(battle.enemies, start=1):
+            enemy.set_intent(IntentType.ATTACK, value)
+        battle.execute_enemy_action()
+        assert battle.player.hp == battle.player.max_hp - 4
+
+    def test_replay_round_trip(self):
+        battle = BattleSystem(Warrior(), [GoblinWarrior(), Slime()], seed=2)
+        battle.start_player_turn()
+        for _ in range(3):
+            battle.play_card(0)
+            battle.end_player_turn()
+            battle.execute_enemy_action()
+        replay = Replay.decode(Replay.from_battle(battle).encode())
+        replayed = replay.play()
+        assert [enemy.hp for enemy in replayed.enemies] == [enemy.hp for enemy in battle.enemies]
+
+    def test_stress_mode_runs(self):
+        assert set(measure(20, rounds=2)) == {"plan", "execute", "end_turn", "aoe"}
@@ -0,0 +1,58 @@
+"""
+游戏主循环测试：画面空闲时阻塞等待输入
+"""
+import os
+import sys
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+
+
+@pytest.fixture
+def game(monkeypatch):
+    """不存档的游戏，使用dummy视频驱动"""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    from main import Game
+    return Game(save_path=None)
+
+
+def test_is_idle(game):
+    """战斗版本号变化、换成新战斗或自动战斗时不空闲"""
+    assert not game.is_idle(None)
+    drawn = game.frame_state()
+    assert game.is_idle(drawn)
+    game.play_card(0)
+    assert not game.is_idle(drawn)
+    drawn = game.frame_state()
+    game.autoplay = True
+    assert not game.is_idle(drawn)
+
+
+def test_run_waits_instead_of_redrawing(game, monkeypatch):
+    """没有输入时阻塞等待，超时不重绘，有输入时处理并重绘一次"""
+    import main
+    script = [
+        pygame.event.Event(pygame.NOEVENT),
+        pygame.event.Event(pygame.NOEVENT),
+        pygame.event.Event(pygame.KEYDOWN, key=pygame.K_e, mod=0, unicode="e", scancode=0),
+        pygame.event.Event(pygame.QUIT),
+    ]
+    waits = []
+    draws = []
+
+    def wait(timeout):
+        waits.append(timeout)
+        return script.pop(0)
+
+    monkeypatch.setattr(main.pygame.event, "get", lambda: [])
+    monkeypatch.setattr(main.pygame.event, "wait", wait)
+    original_draw = game.draw
+    monkeypatch.setattr(game, "draw", lambda: (draws.append(game.battle_system.turn_count), original_draw()))
+
+    game.run()
+    assert waits == [main.IDLE_WAIT_MS] * 4
+    # 第一帧、结束回合后、退出前各绘制一次
+    assert draws == [1, 2, 2]
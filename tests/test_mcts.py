@@ -0,0 +1,118 @@
+"""
+MCTS出牌策略与战斗副本测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from characters import Warrior
+from enemies import GoblinWarrior, Slime
+from simulation.mcts import MCTSPolicy
+
+
+def started_battle(seed=3):
+    """创建战斗并开始玩家回合"""
+    battle = BattleSystem(Warrior(), [GoblinWarrior(), Slime()], seed=seed)
+    battle.start_player_turn()
+    return battle
+
+
+def player_state(player):
+    """玩家的可变状态"""
+    return (player.hp, player.armor, player.energy, dict(player.status_effects),
+            list(player.hand), list(player.draw_pile), list(player.discard_pile), list(player.deck))
+
+
+def enemy_state(enemy):
+    """敌人的可变状态"""
+    return (enemy.hp, enemy.armor, dict(enemy.status_effects), enemy.intent, enemy.intent_value,
+            enemy.action_index)
+
+
+def test_character_clone_is_independent():
+    """修改角色副本的HP、状态和牌堆不影响原角色"""
+    player = started_battle().player
+    before = player_state(player)
+    other = player.clone()
+    other.take_damage(10)
+    other.add_status("strength", 3)
+    other.draw_pile.pop()
+    other.hand.pop(0)
+    other.discard_pile.append(player.hand[0])
+    other.energy -= 1
+    assert player_state(player) == before
+    assert other.events is None
+
+
+def test_enemy_clone_is_independent():
+    """修改敌人副本不影响原敌人，副本不属于原敌人组"""
+    enemy = started_battle().enemies[0]
+    before = enemy_state(enemy)
+    other = enemy.clone()
+    other.take_damage(7)
+    other.add_armor(5)
+    other.add_status("poison", 2)
+    other.plan_next_action()
+    assert enemy_state(enemy) == before
+    assert other.group is None and other.events is None
+
+
+def test_battle_clone_is_independent():
+    """在战斗副本上打完整场战斗，原战斗的状态、版本号、操作记录和日志都不变"""
+    battle = started_battle()
+    battle.play_card(0)
+    before = (battle.state, battle.turn_count, battle.get_version(), list(battle.action_history),
+              player_state(battle.player), [enemy_state(enemy) for enemy in battle.enemies],
+              battle.get_battle_status()["log"])
+    other = battle.clone(seed=11)
+    for _ in range(200):
+        if other.is_battle_over():
+            break
+        if other.play_card(0) is None:
+            other.end_player_turn()
+            other.execute_enemy_action()
+    assert other.is_battle_over()
+    assert before == (battle.state, battle.turn_count, battle.get_version(), list(battle.action_history),
+                      player_state(battle.player), [enemy_state(enemy) for enemy in battle.enemies],
+                      battle.get_battle_status()["log"])
+
+
+def test_clone_without_seed_continues_rng():
+    """不指定种子的副本沿用原战斗的随机数状态"""
+    battle = started_battle()
+    other = battle.clone()
+    assert other.rng.random() == battle.rng.random()
+
+
+def test_fixed_playouts_choice_is_deterministic_and_legal():
+    """固定推演次数和种子时，同一局面得到同样的合法决策"""
+    for seed in range(4):
+        choices = []
+        for _ in range(2):
+            battle = started_battle(seed)
+            policy = MCTSPolicy(playouts=60, seed=seed)
+            choices.append(policy.choose_action(battle))
+            assert policy.last_playouts == 60
+        assert choices[0] == choices[1]
+        card_index = choices[0]
+        if card_index is not None:
+            player = battle.player
+            assert 0 <= card_index < len(player.hand)
+            assert player.hand[card_index].cost <= player.energy
+            assert battle.play_card(card_index) is not None
+
+
+def test_bot_finishes_battle():
+    """MCTS策略连续决策（复用子树）能打完一场战斗"""
+    battle = started_battle()
+    policy = MCTSPolicy(playouts=30, seed=0)
+    for _ in range(500):
+        if battle.is_battle_over():
+            break
+        card_index = policy.choose_action(battle)
+        if card_index is None or battle.play_card(card_index) is None:
+            battle.end_player_turn()
+            if battle.state == BattleState.ENEMY_TURN:
+                battle.execute_enemy_action()
+    assert battle.is_battle_over()
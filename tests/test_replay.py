@@ -0,0 +1,171 @@
+"""
+战斗回放测试：varint编码、回放格式的编码解码、录制后快进回放到相同的战斗状态
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from cards import card_id, get_card
+from characters import Warrior
+from enemies import GoblinArcher, GoblinWarrior, Slime
+from replay import REPLAY_MAGIC, Replay, apply_action, read_str, read_varint, write_str, write_varint
+from run_map import RunMap
+from simulation.policies import RandomPolicy
+from state_codec import encode_battle
+
+
+def record_battle(seed=5, policy_seed=1, max_actions=500):
+    """
+    用随机策略打完一场玩家HP不满、带状态和自定义牌组的多敌人战斗
+
+    Returns:
+        tuple: (战斗系统对象, 回合号 -> 该回合开始时的战斗状态编码)
+    """
+    player = Warrior()
+    player.set_hp(60)
+    player.add_status("strength", 2)
+    player.add_card_to_deck(get_card("whirlwind", upgraded=True))
+    battle = BattleSystem(player, [GoblinWarrior(), GoblinArcher(), Slime()], seed=seed)
+    battle.start_player_turn()
+    policy = RandomPolicy(policy_seed)
+    turn_starts = {battle.turn_count: encode_battle(battle)}
+    for _ in range(max_actions):
+        if battle.is_battle_over():
+            break
+        card_index = policy.choose_action(battle)
+        apply_action(battle, 0 if card_index is None else card_index + 1)
+        if battle.state == BattleState.PLAYER_TURN and battle.turn_count not in turn_starts:
+            turn_starts[battle.turn_count] = encode_battle(battle)
+    return battle, turn_starts
+
+
+def event_fields(event):
+    """战斗事件的全部字段"""
+    return event.type, event.source, event.target, event.value, event.detail
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 32 - 1, 2 ** 63])
+def test_varint_round_trip(value):
+    buffer = bytearray()
+    write_varint(buffer, value)
+    buffer.append(0xFF)
+    assert read_varint(bytes(buffer), 0) == (value, len(buffer) - 1)
+
+
+def test_varint_rejects_negative():
+    with pytest.raises(ValueError):
+        write_varint(bytearray(), -1)
+
+
+def test_str_round_trip():
+    buffer = bytearray()
+    write_str(buffer, "史莱姆")
+    write_str(buffer, "")
+    text, pos = read_str(bytes(buffer), 0)
+    assert (text, read_str(bytes(buffer), pos)) == ("史莱姆", ("", len(buffer)))
+
+
+class TestReplayRoundTrip:
+    """录制、编码、解码后回放到相同的最终状态"""
+
+    @pytest.mark.parametrize("seed, policy_seed", [(5, 1), (11, 2), (42, 3)])
+    def test_replays_to_same_final_state(self, seed, policy_seed):
+        battle, _ = record_battle(seed, policy_seed)
+        assert battle.is_battle_over()
+        replay = Replay.decode(Replay.from_battle(battle).encode())
+        replayed = replay.play()
+        assert replayed.state == battle.state
+        assert replayed.action_history == battle.action_history
+        status, replayed_status = battle.get_battle_status(), replayed.get_battle_status()
+        assert [event_fields(event) for event in replayed_status.pop("log")] == \
+            [event_fields(event) for event in status.pop("log")]
+        assert replayed_status == status
+        # 编码包含牌堆、状态效果和随机数状态，逐字节相同说明整个战斗状态一致
+        assert encode_battle(replayed) == encode_battle(battle)
+
+    def test_fields_survive_encoding(self):
+        battle, _ = record_battle()
+        replay = Replay.from_battle(battle)
+        decoded = Replay.decode(replay.encode())
+        assert vars(decoded) == vars(replay)
+        assert decoded.player_hp == 60 and decoded.player_status == {"strength": 2}
+        assert decoded.enemy_classes == ["GoblinWarrior", "GoblinArcher", "Slime"]
+        assert decoded.deck[-1] == card_id(get_card("whirlwind", upgraded=True))
+
+    def test_stops_at_turn(self):
+        battle, turn_starts = record_battle()
+        replay = Replay.decode(Replay.from_battle(battle).encode())
+        for turn, encoded in turn_starts.items():
+            replayed = replay.play(turn)
+            assert replayed.turn_count == turn
+            assert encode_battle(replayed) == encoded
+
+    def test_save_and_load(self, tmp_path):
+        battle, _ = record_battle()
+        path = tmp_path / "battle.rpl"
+        Replay.from_battle(battle).save(path)
+        assert encode_battle(Replay.load(path).play()) == encode_battle(battle)
+
+    def test_compact(self):
+        battle, _ = record_battle()
+        data = Replay.from_battle(battle).encode()
+        # 每个操作一个字节，头部只有种子、职业、敌人、初始HP、状态和牌组
+        assert len(data) < len(battle.action_history) + 100
+
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_old_versions_use_default_enemy_hp(self, version):
+        battle = BattleSystem(Warrior(), Slime(), seed=7)
+        battle.start_player_turn()
+        battle.play_card(0)
+        battle.end_player_turn()
+        battle.execute_enemy_action()
+        replay = Replay.from_battle(battle)
+        # 版本1没有敌人数量字段，版本1和2都没有敌人HP
+        data = bytearray(REPLAY_MAGIC)
+        write_varint(data, version)
+        write_varint(data, replay.seed)
+        write_str(data, replay.player_class)
+        if version == 2:
+            write_varint(data, 1)
+        write_str(data, "Slime")
+        write_varint(data, replay.player_hp)
+        write_varint(data, 0)
+        for values in (replay.deck, replay.actions):
+            write_varint(data, len(values))
+            for value in values:
+                write_varint(data, value)
+        decoded = Replay.decode(bytes(data))
+        assert decoded.enemy_hp is None
+        assert encode_battle(decoded.play()) == encode_battle(battle)
+
+    def test_scaled_map_enemies(self):
+        # 精英和第二幕之后的敌人HP由地图调整，回放需要按记录的HP创建敌人
+        run_map = RunMap(seed=1, acts=3)
+        node = run_map.node(14, 0)
+        enemies = run_map.create_enemies(node)
+        assert any(enemy.max_hp != type(enemy)().max_hp for enemy in enemies)
+        battle = BattleSystem(Warrior(), enemies, seed=3)
+        battle.start_player_turn()
+        policy = RandomPolicy(0)
+        while not battle.is_battle_over() and battle.turn_count <= 30:
+            card_index = policy.choose_action(battle)
+            apply_action(battle, 0 if card_index is None else card_index + 1)
+
+        replay = Replay.decode(Replay.from_battle(battle).encode())
+        assert replay.enemy_hp == [(enemy.max_hp, enemy.max_hp) for enemy in run_map.create_enemies(node)]
+        assert encode_battle(replay.play()) == encode_battle(battle)
+
+    @pytest.mark.parametrize("data", [b"", b"XXXX\x02", REPLAY_MAGIC + b"\x00", REPLAY_MAGIC + b"\x09"])
+    def test_rejects_bad_header(self, data):
+        with pytest.raises(ValueError):
+            Replay.decode(data)
+
+    def test_invalid_action_rejected(self):
+        battle, _ = record_battle()
+        replay = Replay.from_battle(battle)
+        replay.actions = [99]
+        with pytest.raises(ValueError):
+            replay.play()
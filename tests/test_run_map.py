@@ -0,0 +1,134 @@
+"""
+路线地图测试
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from run_map import ACT_LENGTH, ENEMY_POOL, LANES, OPENING_FLOORS, SHOP_SIZE, MapNode, NodeType, RunMap
+
+
+def walk(run_map, floors, pick=lambda choices: len(choices) // 2):
+    """沿地图前进，返回经过的节点"""
+    path = [run_map.current]
+    for _ in range(floors):
+        choices = run_map.choices()
+        if not choices:
+            break
+        path.append(run_map.advance(pick(choices)))
+    return path
+
+
+def test_same_seed_same_map():
+    """同一种子生成同样的地图和敌人"""
+    a, b = RunMap(seed=7), RunMap(seed=7)
+    path_a, path_b = walk(a, 40), walk(b, 40)
+    assert path_a == path_b
+    assert [node.kind for node in path_a] == [node.kind for node in path_b]
+    for node in path_a:
+        if node.kind in (NodeType.COMBAT, NodeType.ELITE):
+            names = [(enemy.name, enemy.max_hp) for enemy in a.create_enemies(node)]
+            assert names == [(enemy.name, enemy.max_hp) for enemy in b.create_enemies(node)]
+
+
+def test_node_regenerates_from_seed():
+    """任意节点都可以只凭种子和位置重新生成"""
+    run_map = RunMap(seed=123)
+    path = walk(run_map, 30)
+    other = RunMap(seed=123)
+    for node in path:
+        assert other.node(node.floor, node.lane) == node
+    assert other.goto(path[-1].floor, path[-1].lane) == path[-1]
+    assert other.choices() == run_map.choices()
+
+
+def test_different_seeds_differ():
+    """不同种子得到不同的地图"""
+    kinds = {tuple(node.kind for node in walk(RunMap(seed=seed), ACT_LENGTH)) for seed in range(10)}
+    assert len(kinds) > 1
+
+
+def test_children_are_adjacent():
+    """子节点在下一层，且位于相邻位置"""
+    run_map = RunMap(seed=5)
+    for floor in range(50):
+        for lane in range(LANES):
+            children = run_map.children(run_map.node(floor, lane))
+            assert children
+            for child in children:
+                assert child.floor == floor + 1
+                assert abs(child.lane - lane) <= 1
+                assert 0 <= child.lane < LANES
+
+
+def test_act_structure():
+    """每幕开场是普通战斗，最后一层是精英战斗，前一层是休息处"""
+    run_map = RunMap(seed=9)
+    for act in range(3):
+        base = act * ACT_LENGTH
+        for lane in range(LANES):
+            for step in range(OPENING_FLOORS):
+                assert run_map.node(base + step, lane).kind == NodeType.COMBAT
+            assert run_map.node(base + ACT_LENGTH - 2, lane).kind == NodeType.REST
+            assert run_map.node(base + ACT_LENGTH - 1, lane).kind == NodeType.ELITE
+
+
+def test_all_node_types_appear():
+    """开场之后会出现全部节点类型"""
+    run_map = RunMap(seed=1)
+    kinds = {run_map.node(floor, lane).kind
+             for floor in range(OPENING_FLOORS, ACT_LENGTH - 2) for lane in range(LANES)}
+    assert kinds == set(NodeType)
+
+
+def test_finite_map_ends():
+    """有限幕数的地图在最后一层结束"""
+    run_map = RunMap(seed=3, acts=2)
+    path = walk(run_map, 10 ** 6)
+    assert len(path) == 2 * ACT_LENGTH
+    assert run_map.is_complete()
+    assert path[-1].kind == NodeType.ELITE
+
+
+def test_enemies_scale_with_act():
+    """后面幕的敌人HP更高，精英战斗敌人更多"""
+    run_map = RunMap(seed=11)
+    first = run_map.create_enemies(MapNode(0, 0, NodeType.COMBAT, 0))
+    assert len(first) == 1
+    later = run_map.create_enemies(MapNode(2 * ACT_LENGTH, 0, NodeType.COMBAT, 0))
+    base_hp = {enemy.name: enemy.max_hp for enemy in (cls() for cls in ENEMY_POOL)}
+    for enemy in later:
+        assert enemy.hp == enemy.max_hp == base_hp[enemy.name] * 2
+    elite = run_map.create_enemies(MapNode(5, 1, NodeType.ELITE, 0))
+    assert 2 <= len(elite) <= 3
+
+
+def test_shop_cards_seeded_by_node():
+    """商店出售不重复的非基础卡牌，同一节点总是出售同样的卡牌"""
+    run_map = RunMap(seed=5)
+    for seed in range(20):
+        node = MapNode(4, 1, NodeType.SHOP, seed)
+        cards = run_map.shop_cards(node)
+        assert cards == RunMap(seed=6).shop_cards(node)
+        assert 0 < len(cards) <= SHOP_SIZE and len(cards) == len(set(cards))
+        assert all(card.rarity != "basic" and not card.upgraded for card in cards)
+
+def test_memory_flat_for_long_runs():
+    """无尽模式下长距离前进，内存占用不随层数增长"""
+    def advance(floors):
+        for _ in range(floors):
+            run_map.advance(0)
+
+    run_map = RunMap(seed=2)
+    advance(100)
+    tracemalloc.start()
+    try:
+        advance(100)
+        short, _ = tracemalloc.get_traced_memory()
+        advance(3000)
+        long, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert run_map.current.floor == 3200
+    assert long - short < 4096
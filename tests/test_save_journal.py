@@ -0,0 +1,270 @@
+"""
+存档日志测试
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from characters import Warrior
+from run_map import RunMap
+import save_journal
+from save_journal import (RECORD_ACTION, RECORD_BUY, RECORD_CHOOSE, RECORD_UNDO,
+                          RunSnapshot, SaveJournal, read_journal)
+
+
+def make_snapshot(hp=70, floor=0):
+    """创建测试用快照"""
+    player = Warrior()
+    player.hp = hp
+    player.add_status("strength", 2)
+    run_map = RunMap(seed=99, acts=2)
+    run_map.goto(floor, 1)
+    return RunSnapshot.capture(run_map, player)
+
+
+def test_snapshot_round_trip():
+    """快照编码后解码得到同样的局面"""
+    snapshot = make_snapshot()
+    decoded = RunSnapshot.decode(snapshot.encode())
+    for name in RunSnapshot.__slots__:
+        assert getattr(decoded, name) == getattr(snapshot, name)
+    player = decoded.create_player()
+    assert player.hp == 70
+    assert player.get_status("strength") == 2
+    assert list(player.deck) == snapshot.deck
+
+
+def test_records_after_last_snapshot(tmp_path):
+    """读档只返回最后一个快照和其后的记录"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path)
+    journal.snapshot(make_snapshot(hp=80))
+    journal.action(1)
+    journal.snapshot(make_snapshot(hp=60, floor=1))
+    journal.action(2)
+    journal.undo()
+    journal.action(0)
+    journal.buy(3)
+    journal.buy(None)
+    journal.choose(1)
+    journal.close()
+
+    snapshot, records, end = read_journal(path)
+    assert snapshot.hp == 60 and snapshot.floor == 1
+    assert records == [(RECORD_ACTION, 2), (RECORD_UNDO, 0), (RECORD_ACTION, 0),
+                       (RECORD_BUY, 4), (RECORD_BUY, 0), (RECORD_CHOOSE, 1)]
+    assert end == os.path.getsize(path)
+
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    """不完整的记录在读档时被忽略，继续写入前截掉"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path)
+    journal.snapshot(make_snapshot())
+    journal.action(3)
+    journal.action(0)
+    journal.close()
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 2)
+
+    snapshot, records, end = read_journal(path)
+    assert records == [(RECORD_ACTION, 3)]
+
+    journal = SaveJournal(path, resume_at=end)
+    journal.action(5)
+    journal.close()
+    assert read_journal(path)[1] == [(RECORD_ACTION, 3), (RECORD_ACTION, 5)]
+
+
+def test_corrupt_record_stops_reading(tmp_path):
+    """校验失败的记录及其后的数据被忽略"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path)
+    journal.snapshot(make_snapshot())
+    journal.action(1)
+    journal.flush()
+    corrupt_at = os.path.getsize(path) - 5
+    journal.action(2)
+    journal.close()
+    with open(path, "r+b") as f:
+        f.seek(corrupt_at + 3)
+        f.write(b"\x7f")
+    assert read_journal(path)[1] == []
+
+
+def test_compaction_keeps_last_snapshot(tmp_path):
+    """文件超过阈值后在下一个快照处改写，只保留该快照"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path, compact_bytes=256)
+    for hp in range(40, 80):
+        journal.snapshot(make_snapshot(hp=hp))
+        for action in range(10):
+            journal.action(action)
+    journal.close()
+    assert os.path.getsize(path) < 512
+    snapshot, records, _ = read_journal(path)
+    assert snapshot.hp == 79
+    assert records == [(RECORD_ACTION, action) for action in range(10)]
+
+
+def test_flush_makes_records_readable(tmp_path):
+    """flush之后记录已写入文件，不需要关闭"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path)
+    journal.snapshot(make_snapshot())
+    journal.action(4)
+    journal.flush()
+    assert read_journal(path)[1] == [(RECORD_ACTION, 4)]
+    journal.close()
+
+
+def test_flush_syncs_in_writer_thread(tmp_path, monkeypatch):
+    """flush的fsync由后台线程执行，压缩替换文件时也不会用到已关闭的文件"""
+    threads = []
+    real_fsync = save_journal.os.fsync
+
+    def fsync(fd):
+        threads.append(threading.current_thread().name)
+        real_fsync(fd)
+
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path, compact_bytes=128)
+    monkeypatch.setattr(save_journal.os, "fsync", fsync)
+    for hp in range(40, 60):
+        journal.snapshot(make_snapshot(hp=hp))
+        journal.action(hp)
+        journal.flush()
+        assert read_journal(path)[1] == [(RECORD_ACTION, hp)]
+    journal.close()
+    journal.flush()
+    assert threads and set(threads) == {"save-journal"}
+
+
+@pytest.mark.parametrize("method", ["_write", "_compact"])
+def test_writer_error_is_raised(tmp_path, method):
+    """后台线程写入失败时，flush、之后的写入和close都抛出异常，不会一直等待"""
+    journal = SaveJournal(str(tmp_path / "save.journal"), compact_bytes=0)
+
+    def fail(*args):
+        raise OSError("磁盘已满")
+
+    setattr(journal, method, fail)
+    journal.snapshot(make_snapshot())
+    journal.action(1)
+    with pytest.raises(OSError, match="磁盘已满") as info:
+        journal.flush()
+    assert isinstance(info.value.__cause__, OSError)
+    with pytest.raises(OSError):
+        journal.action(2)
+    with pytest.raises(OSError):
+        journal.close()
+
+
+def test_invalid_file(tmp_path):
+    """不是存档的文件"""
+    path = str(tmp_path / "save.journal")
+    with open(path, "wb") as f:
+        f.write(b"not a journal")
+    with pytest.raises(ValueError):
+        read_journal(path)
+
+
+def test_new_journal_header_on_disk(tmp_path):
+    """新建的存档立即写入文件头，不需要等第一条记录"""
+    path = str(tmp_path / "save.journal")
+    journal = SaveJournal(path)
+    try:
+        assert read_journal(path) == (None, [], os.path.getsize(path))
+    finally:
+        journal.close()
+
+
+@pytest.mark.parametrize("content", [b"", b"CRSJ\x01", b"not a journal"])
+def test_game_starts_over_on_bad_journal(tmp_path, monkeypatch, content):
+    """存档为空、只有文件头或已损坏时，移到一边并开始新的一局"""
+    pytest.importorskip("pygame")
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    from main import BAD_SAVE_SUFFIX, Game
+
+    path = str(tmp_path / "save.journal")
+    with open(path, "wb") as f:
+        f.write(content)
+    game = Game(path)
+    try:
+        assert game.battle_system is not None and game.run_map.current.floor == 0
+        with open(path + BAD_SAVE_SUFFIX, "rb") as f:
+            assert f.read() == content
+    finally:
+        game.journal.close()
+    assert read_journal(path)[0] is not None
+
+
+def _stale_catalog_journal(path):
+    """存档中商店卡牌的ID超出当前卡牌目录"""
+    journal = SaveJournal(path)
+    journal.snapshot(make_snapshot())
+    journal.buy(10 ** 6)
+    journal.close()
+
+
+@pytest.mark.parametrize("make_save", [_stale_catalog_journal, os.mkdir], ids=["stale_catalog", "unreadable"])
+def test_game_starts_over_on_unusable_journal(tmp_path, monkeypatch, capsys, make_save):
+    """存档与卡牌目录不一致或无法打开时，同样移到一边并开始新的一局"""
+    pytest.importorskip("pygame")
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    from main import BAD_SAVE_SUFFIX, Game
+
+    path = str(tmp_path / "save.journal")
+    make_save(path)
+    game = Game(path)
+    try:
+        assert game.run_map.current.floor == 0 and os.path.exists(path + BAD_SAVE_SUFFIX)
+        assert "存档无法读取" in capsys.readouterr().out
+    finally:
+        game.journal.close()
+    assert read_journal(path)[0] is not None
+
+
+def test_game_resumes_from_journal(tmp_path, monkeypatch):
+    """游戏中途退出后从存档继续，局面与退出时一致"""
+    pytest.importorskip("pygame")
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    from main import Game
+    from battle_system import BattleState
+
+    path = str(tmp_path / "save.journal")
+    game = Game(path)
+    # 打完第一场战斗，进入下一个节点，再打几步
+    while game.battle_system.state != BattleState.VICTORY:
+        assert game.battle_system.state != BattleState.DEFEAT
+        if game.play_card(0) is None:
+            game.end_turn()
+    game.choose_node(0)
+    for _ in range(3):
+        if game.battle_system.state != BattleState.PLAYER_TURN:
+            break
+        if game.play_card(0) is not None:
+            game.undo_last_card()
+        game.play_card(len(game.player.hand) - 1)
+    game.journal.close()
+
+    resumed = Game(path)
+    try:
+        assert resumed.run_map.seed == game.run_map.seed
+        assert resumed.run_map.current == game.run_map.current
+        assert resumed.player.hp == game.player.hp
+        assert list(resumed.player.deck) == list(game.player.deck)
+        assert resumed.battle_system.turn_count == game.battle_system.turn_count
+        assert resumed.battle_system.action_history == game.battle_system.action_history
+        assert [card.card_id for card in resumed.player.hand] == [card.card_id for card in game.player.hand]
+        assert [enemy.hp for enemy in resumed.battle_system.enemies] == \
+            [enemy.hp for enemy in game.battle_system.enemies]
+    finally:
+        resumed.journal.close()
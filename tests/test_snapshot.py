@@ -0,0 +1,142 @@
+"""
+战斗快照与恢复测试
+"""
+import copy
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from characters import Warrior
+from enemies import GoblinWarrior, GoblinArcher, Slime
+from simulation.policies import RandomPolicy
+
+ENEMY_CLASSES = [GoblinWarrior, GoblinArcher, Slime]
+
+
+def battle_state(battle):
+    """战斗状态的可比较表示"""
+    player = battle.player
+    enemy = battle.enemy
+    return (
+        battle.state, battle.turn_count, battle.rng.getstate(), list(battle.action_history),
+        player.hp, player.energy, player.armor, dict(player.status_effects),
+        [card.name for card in player.hand],
+        [card.name for card in player.draw_pile],
+        [card.name for card in player.discard_pile],
+        enemy.hp, enemy.armor, dict(enemy.status_effects),
+        enemy.intent, enemy.intent_value, enemy.action_index,
+    )
+
+
+def step(battle, policy):
+    """按策略执行一步"""
+    card_index = policy.choose_action(battle)
+    if card_index is None:
+        battle.end_player_turn()
+        if battle.state == BattleState.ENEMY_TURN:
+            battle.execute_enemy_action()
+    else:
+        battle.play_card(card_index)
+
+
+class TestSnapshotRestore:
+    """快照恢复后的状态与快照时一致"""
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_restore_after_random_play(self, enemy_cls):
+        policy = RandomPolicy(seed=0)
+        for seed in range(20):
+            battle = BattleSystem(Warrior(), enemy_cls(), seed=seed)
+            battle.start_player_turn()
+            while not battle.is_battle_over():
+                before = battle_state(battle)
+                snapshot = battle.snapshot()
+                for _ in range(4):
+                    if not battle.is_battle_over():
+                        step(battle, policy)
+                battle.restore(snapshot)
+                assert battle_state(battle) == before
+                step(battle, policy)
+
+    def test_restore_twice(self):
+        battle = BattleSystem(Warrior(), Slime(), seed=1)
+        battle.start_player_turn()
+        before = battle_state(battle)
+        snapshot = battle.snapshot()
+
+        battle.play_card(0)
+        battle.restore(snapshot)
+        battle.end_player_turn()
+        battle.execute_enemy_action()
+        battle.restore(snapshot)
+
+        assert battle_state(battle) == before
+
+    def test_same_future_after_restore(self):
+        battle = BattleSystem(Warrior(), GoblinArcher(), seed=2)
+        battle.start_player_turn()
+        snapshot = battle.snapshot()
+
+        battle.end_player_turn()
+        battle.execute_enemy_action()
+        first = battle_state(battle)
+        battle.restore(snapshot)
+        battle.end_player_turn()
+        battle.execute_enemy_action()
+
+        assert battle_state(battle) == first
+
+    def test_snapshot_piles_not_modified(self):
+        battle = BattleSystem(Warrior(), GoblinWarrior(), seed=3)
+        battle.start_player_turn()
+        snapshot = battle.snapshot()
+        hand = list(snapshot.player[4])
+
+        battle.play_card(0)
+        battle.end_player_turn()
+
+        assert snapshot.player[4] == hand
+
+    def test_status_version_monotonic(self):
+        battle = BattleSystem(Warrior(), GoblinWarrior(), seed=4)
+        battle.start_player_turn()
+        snapshot = battle.snapshot()
+        version = battle.get_version()
+
+        battle.play_card(0)
+        status = dict(battle.get_battle_status())
+        battle.restore(snapshot)
+
+        assert battle.has_changed_since(version)
+        assert battle.get_battle_status()["player_energy"] == battle.player.max_energy
+        assert battle.get_battle_status()["hand_size"] == status["hand_size"] + 1
+
+
+@pytest.mark.slow
+class TestSnapshotCost:
+    """快照与恢复比deepcopy便宜得多"""
+
+    def test_faster_than_deepcopy(self):
+        battle = BattleSystem(Warrior(), GoblinWarrior(), seed=5, record_events=False)
+        battle.start_player_turn()
+        rounds = 200
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            snapshot = battle.snapshot()
+            battle.play_card(0)
+            battle.restore(snapshot)
+        snapshot_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            saved = copy.deepcopy(battle)
+            battle.play_card(0)
+            battle = saved
+        deepcopy_time = time.perf_counter() - start
+
+        assert snapshot_time * 10 < deepcopy_time
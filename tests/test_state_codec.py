@@ -0,0 +1,136 @@
+"""
+战斗状态编码测试
+"""
+import os
+import pickle
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from cards import get_card
+from characters import Warrior
+from enemies import GoblinArcher, GoblinWarrior, Slime
+from replay import apply_action
+from state_codec import decode_battle, decode_character, decode_enemy, encode_battle, encode_character, encode_enemy
+
+# 依次尝试的操作：先出前两张牌再结束回合
+ACTIONS = (1, 1, 0) * 12
+
+
+def mid_battle(seed=3):
+    """创建进行了两个回合的多敌人战斗"""
+    battle = BattleSystem(Warrior(), [GoblinWarrior(), GoblinArcher(), Slime()], seed=seed)
+    battle.start_player_turn()
+    for action in (1, 0, 2, 1, 0):
+        apply_action(battle, action)
+    return battle
+
+
+def play_out(battle):
+    """按ACTIONS继续战斗，无法出牌时结束回合，返回每一步的战斗状态"""
+    statuses = []
+    for action in ACTIONS:
+        if battle.is_battle_over():
+            break
+        if action and battle.play_card(action - 1) is None:
+            action = 0
+        if not action:
+            apply_action(battle, 0)
+        status = dict(battle.get_battle_status())
+        status.pop("log")
+        statuses.append(status)
+    return statuses
+
+
+def test_character_round_trip():
+    """角色编码后解码，战斗状态相同"""
+    player = mid_battle().player
+    player.add_card_to_deck(get_card("demon_form", upgraded=True))
+    buffer = bytearray()
+    encode_character(buffer, player)
+    decoded, pos = decode_character(buffer)
+    assert pos == len(buffer)
+    for name in ("hp", "max_hp", "energy", "max_energy", "armor", "status_effects", "triggers", "deck"):
+        assert getattr(decoded, name) == getattr(player, name)
+    for pile in ("hand", "draw_pile", "discard_pile"):
+        assert [card.card_id for card in getattr(decoded, pile)] == [card.card_id for card in getattr(player, pile)]
+    # 卡牌是共享的卡牌定义
+    assert all(a is b for a, b in zip(decoded.hand, player.hand))
+
+
+def test_enemy_round_trip():
+    """敌人编码后解码，意图、行动序号和状态相同"""
+    enemy = GoblinArcher()
+    enemy.take_damage(7)
+    enemy.add_armor(4)
+    buffer = bytearray()
+    encode_enemy(buffer, enemy)
+    decoded, pos = decode_enemy(buffer)
+    assert pos == len(buffer)
+    assert type(decoded) is GoblinArcher
+    for name in ("name", "hp", "max_hp", "armor", "intent", "intent_value", "action_index",
+                 "status_effects", "triggers", "actions"):
+        assert getattr(decoded, name) == getattr(enemy, name)
+
+
+def test_decoded_battle_continues_identically():
+    """含随机数状态时，解码后的战斗与原战斗的后续进程完全一致"""
+    battle = mid_battle()
+    decoded = decode_battle(encode_battle(battle))
+    assert decoded.turn_count == battle.turn_count
+    assert decoded.state == battle.state
+    assert decoded.events is None
+    assert play_out(decoded) == play_out(battle)
+
+
+def test_without_rng_restarts_from_seed():
+    """不含随机数状态时体积更小，随机数按种子重新开始"""
+    battle = mid_battle()
+    full, compact = encode_battle(battle), encode_battle(battle, rng=False)
+    assert len(compact) < 200 < len(full)
+    decoded = decode_battle(compact)
+    assert decoded.seed == battle.seed
+    assert decoded.rng.random() == random.Random(battle.seed).random()
+    assert decoded.player.hp == battle.player.hp
+
+
+def test_much_smaller_than_pickle():
+    """编码结果比pickle对象图小得多"""
+    battle = mid_battle()
+    assert len(encode_battle(battle, rng=False)) * 20 < len(pickle.dumps(battle))
+
+
+def test_finished_battle_and_large_values():
+    """战斗结束的状态和缩放后的大数值也能编码"""
+    enemy = Slime()
+    enemy.max_hp = enemy.hp = 100000
+    battle = BattleSystem(Warrior(), enemy, seed=1)
+    battle.start_player_turn()
+    battle.player.hp = 0
+    battle.state = BattleState.DEFEAT
+    decoded = decode_battle(encode_battle(battle))
+    assert decoded.state == BattleState.DEFEAT
+    assert decoded.enemies.members[0].max_hp == 100000
+    assert decoded.is_battle_over()
+
+
+def test_enemy_start_hp_round_trip():
+    """战斗开始时的敌人HP随战斗状态保存，解码后的战斗仍能生成正确的回放"""
+    slime = Slime()
+    slime.set_hp(40, 50)
+    battle = BattleSystem(Warrior(), [GoblinWarrior(), slime], seed=1)
+    battle.start_player_turn()
+    battle.play_card(0)
+    decoded = decode_battle(encode_battle(battle))
+    assert decoded.enemy_start_hp == battle.enemy_start_hp == [(GoblinWarrior().max_hp,) * 2, (40, 50)]
+
+
+def test_unknown_version():
+    """不支持的版本"""
+    data = bytearray(encode_battle(mid_battle()))
+    data[0] = 99
+    with pytest.raises(ValueError):
+        decode_battle(bytes(data))
@@ -0,0 +1,77 @@
+"""
+状态效果注册表与结算测试
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem
+from characters import Warrior
+from enemies import Enemy, GoblinArcher
+from enemies.enemy import IntentType
+from statuses import STATUSES, StatusRegistry, TURN_START, TURN_END, ON_ATTACK
+
+
+class TestStatusRegistry:
+    """注册表与分发表"""
+
+    def test_builtin_ids_and_masks(self):
+        assert STATUSES.masks[STATUSES.ids["poison"]] == TURN_END
+        assert STATUSES.masks[STATUSES.ids["burning"]] == TURN_END
+        assert STATUSES.masks[STATUSES.ids["strength"]] == ON_ATTACK
+        assert STATUSES.masks[STATUSES.ids["demon_form"]] == TURN_START
+
+    def test_duplicate_name_rejected(self):
+        registry = StatusRegistry()
+        registry.register("poison", "毒")
+        with pytest.raises(ValueError):
+            registry.register("poison", "毒")
+
+    def test_trigger_mask_follows_statuses(self):
+        enemy = Enemy("测试", 50)
+        assert enemy.triggers == 0
+        enemy.add_status("strength", 1)
+        enemy.add_status("poison", 1)
+        assert enemy.triggers == ON_ATTACK | TURN_END
+        enemy.remove_status("poison")
+        assert enemy.triggers == ON_ATTACK
+
+
+class TestStatusResolution:
+    """状态结算"""
+
+    def test_burning_and_poison_both_tick(self):
+        enemy = Enemy("测试", 50)
+        enemy.add_status("burning", 3)
+        enemy.add_status("poison", 2)
+        enemy.end_turn()
+        assert enemy.hp == 45
+
+    def test_player_poison_does_not_tick(self):
+        player = Warrior()
+        player.add_armor(10)
+        player.add_status("poison", 4)
+        player.end_turn()
+        assert (player.hp, player.armor, player.get_status("poison")) == (player.max_hp, 0, 4)
+
+    def test_strength_adds_to_attack(self):
+        player = Warrior()
+        enemy = Enemy("测试", 50)
+        enemy.add_status("strength", 2)
+        enemy.set_intent(IntentType.ATTACK, 5)
+        enemy.execute_action(player)
+        assert player.hp == player.max_hp - 7
+
+    def test_demon_form_grants_strength(self):
+        player = Warrior()
+        player.add_status("demon_form", 2)
+        player.start_turn()
+        player.start_turn()
+        assert player.get_status("strength") == 4
+
+    def test_status_log_uses_display_name(self):
+        battle = BattleSystem(Warrior(), GoblinArcher(), seed=0)
+        battle.player.add_status("poison", 2)
+        assert battle.battle_log[-1].format() == "战士获得了2层毒"
@@ -0,0 +1,270 @@
+"""
+向量化战斗引擎与BattleSystem的一致性测试
+"""
+import json
+import os
+import random
+import sys
+from array import array
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "card_roguelike"))
+from battle_system import BattleSystem, BattleState
+from cards import CARD_DEFINITIONS, DEFAULT_CATALOG_PATH, CardCatalog, card_id, get_card, parse_catalog
+from characters import Warrior
+from enemies import Enemy, GoblinWarrior, GoblinArcher, Slime
+from simulation.batch_runner import BatchStats, run_battle
+from simulation.policies import GreedyPolicy, RandomPolicy
+from simulation import vector_engine
+from simulation.vector_engine import VectorBattleEngine, CARD_ID_LIMIT, STATE_CODES, INTENT_CODES, INTENT_NONE
+
+ENEMY_CLASSES = [GoblinWarrior, GoblinArcher, Slime]
+
+
+def _custom_warrior(cards):
+    """创建使用指定卡组的战士"""
+    player = Warrior()
+    player.deck = array("H")
+    for card in cards:
+        player.add_card_to_deck(card)
+    return player
+
+
+def _deck(*keys):
+    """按卡牌键创建卡组，键以+结尾表示升级版"""
+    return [get_card(key.rstrip("+"), upgraded=key.endswith("+")) for key in keys]
+
+
+CUSTOM_DECKS = [
+    _deck("strike", "strike", "defend", "burning", "demon_form", "heavy_attack", "whirlwind"),
+    _deck("strike+", "defend+", "iron_wave+", "burning+", "whirlwind+", "defend", "strike", "heavy_attack+"),
+    _deck("defend", "defend", "defend", "defend", "defend", "defend"),
+]
+
+
+def assert_same_state(engine, i, battle):
+    """断言引擎中第i场战斗与BattleSystem状态一致"""
+    player = battle.player
+    enemy = battle.enemy
+    assert engine.state[i] == STATE_CODES[battle.state]
+    assert engine.turn[i] == battle.turn_count
+    assert engine.player_hp[i] == player.hp
+    assert engine.player_armor[i] == player.armor
+    assert engine.player_energy[i] == player.energy
+    assert engine.player_strength[i] == player.get_status("strength")
+    assert engine.player_poison[i] == player.get_status("poison")
+    assert engine.enemy_hp[i] == enemy.hp
+    assert engine.enemy_armor[i] == enemy.armor
+    assert engine.enemy_strength[i] == enemy.get_status("strength")
+    assert engine.enemy_poison[i] == enemy.get_status("poison")
+    assert engine.enemy_burning[i] == enemy.get_status("burning")
+    assert engine.enemy_action_index[i] == enemy.action_index
+    assert engine.enemy_intent[i] == INTENT_CODES.get(enemy.intent, INTENT_NONE)
+    assert engine.enemy_intent_value[i] == enemy.intent_value
+    for pile, count, cards in (
+        (engine.draw, engine.draw_count, player.draw_pile),
+        (engine.hand, engine.hand_count, player.hand),
+        (engine.discard, engine.discard_count, player.discard_pile),
+    ):
+        assert count[i] == len(cards)
+        assert pile[i, :count[i]].tolist() == [card_id(card) for card in cards]
+
+
+@pytest.fixture
+def no_shuffle(monkeypatch):
+    """关闭BattleSystem的洗牌，使两个引擎的抽牌顺序一致"""
+    monkeypatch.setattr(random.Random, "shuffle", lambda self, cards: None)
+
+
+@pytest.fixture
+def large_catalog():
+    """在内置卡牌之后追加300种卡牌，卡牌ID超过int8的范围；返回追加的卡牌"""
+    with open(DEFAULT_CATALOG_PATH, encoding="utf-8") as f:
+        entries = json.load(f)
+    for i in range(300):
+        entries.append({"key": f"extra_{i}", "name": f"追加{i}", "type": "ATTACK", "rarity": "common",
+                        "cost": 1, "description": "造成{damage}点伤害",
+                        "effects": {"damage": 5 + i % 4}, "upgrade": {"damage": 9}})
+    catalog = CardCatalog(parse_catalog(entries))
+    saved = CARD_DEFINITIONS[:]
+    CARD_DEFINITIONS[:] = catalog.definitions
+    try:
+        yield CARD_DEFINITIONS[len(saved)::2]
+    finally:
+        CARD_DEFINITIONS[:] = saved
+
+
+class TestTakeDamage:
+    """伤害结算一致性"""
+
+    def test_matches_enemy_take_damage(self):
+        rng = random.Random(0)
+        cases = [(rng.randint(1, 50), rng.randint(0, 20), rng.randint(0, 40)) for _ in range(500)]
+        hp = np.array([case[0] for case in cases], dtype=np.int32)
+        armor = np.array([case[1] for case in cases], dtype=np.int32)
+        damage = np.array([case[2] for case in cases], dtype=np.int32)
+
+        VectorBattleEngine._take_damage(hp, armor, np.arange(len(cases)), damage)
+
+        for i, (enemy_hp, enemy_armor, amount) in enumerate(cases):
+            enemy = Enemy("测试", 50)
+            enemy.hp = enemy_hp
+            enemy.armor = enemy_armor
+            enemy.take_damage(amount)
+            assert (hp[i], armor[i]) == (enemy.hp, enemy.armor)
+
+
+class TestFullBattleParity:
+    """关闭洗牌后整场战斗逐步一致"""
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_starter_deck(self, no_shuffle, enemy_cls):
+        result = run_battle(enemy_cls, GreedyPolicy())
+
+        engine = VectorBattleEngine(1, enemy_cls, shuffle=False)
+        engine.run()
+
+        assert engine.turn[0] == result["turns"]
+        assert engine.player_hp[0] == result["player_hp"]
+        assert engine.enemy_hp[0] == result["enemy_hp"]
+        assert engine.to_stats().victories == (result["outcome"] == "victory")
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    @pytest.mark.parametrize("max_turns", [1, 3])
+    def test_max_turns(self, no_shuffle, enemy_cls, max_turns):
+        result = run_battle(enemy_cls, GreedyPolicy(), max_turns=max_turns)
+
+        engine = VectorBattleEngine(1, enemy_cls, shuffle=False)
+        engine.run(max_turns)
+
+        assert engine.turn[0] == result["turns"]
+        assert (engine.player_hp[0], engine.enemy_hp[0]) == (result["player_hp"], result["enemy_hp"])
+        assert engine.to_stats().timeouts == (result["outcome"] == "timeout")
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    @pytest.mark.parametrize("deck_index", range(len(CUSTOM_DECKS)))
+    def test_step_by_step(self, no_shuffle, enemy_cls, deck_index):
+        player = _custom_warrior(CUSTOM_DECKS[deck_index])
+        battle = BattleSystem(player, enemy_cls())
+        battle.start_player_turn()
+        engine = VectorBattleEngine.from_battles([battle], shuffle=False)
+        assert_same_state(engine, 0, battle)
+
+        policy = GreedyPolicy()
+        while not battle.is_battle_over() and battle.turn_count <= 30:
+            card_index = policy.choose_action(battle)
+            engine.step(np.array([-1 if card_index is None else card_index]))
+            if card_index is None:
+                battle.end_player_turn()
+                battle.execute_enemy_action()
+            else:
+                battle.play_card(card_index)
+            assert_same_state(engine, 0, battle)
+
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_large_catalog(self, no_shuffle, large_catalog, enemy_cls):
+        cards = large_catalog[-8:] + [large_catalog[-1].upgrade(), get_card("defend")]
+        assert max(card_id(card) for card in cards) > 127
+        battle = BattleSystem(_custom_warrior(cards), enemy_cls())
+        battle.start_player_turn()
+        engine = VectorBattleEngine.from_battles([battle], shuffle=False)
+
+        policy = GreedyPolicy()
+        while not battle.is_battle_over() and battle.turn_count <= 30:
+            card_index = policy.choose_action(battle)
+            engine.step(np.array([-1 if card_index is None else card_index]))
+            if card_index is None:
+                battle.end_player_turn()
+                battle.execute_enemy_action()
+            else:
+                battle.play_card(card_index)
+            assert_same_state(engine, 0, battle)
+        assert battle.is_battle_over()
+
+    def test_card_id_limit(self, monkeypatch):
+        monkeypatch.setattr(vector_engine, "CARD_DEFINITIONS", [get_card("strike")] * (CARD_ID_LIMIT + 1))
+        with pytest.raises(ValueError):
+            VectorBattleEngine(1, Slime)
+
+
+class TestPhaseParity:
+    """从随机对局的中间状态出发，逐阶段对比"""
+
+    def _collect_states(self, enemy_cls, count, seed):
+        """用随机策略推进多场战斗，收集处于玩家回合的中间状态"""
+        random.seed(seed)
+        policy = RandomPolicy(seed)
+        battles = []
+        for _ in range(count):
+            battle = BattleSystem(Warrior(), enemy_cls())
+            battle.start_player_turn()
+            for _ in range(random.randint(0, 12)):
+                if battle.state != BattleState.PLAYER_TURN:
+                    break
+                card_index = policy.choose_action(battle)
+                if card_index is None:
+                    battle.end_player_turn()
+                    battle.execute_enemy_action()
+                else:
+                    battle.play_card(card_index)
+            if battle.state == BattleState.PLAYER_TURN:
+                battles.append(battle)
+        return battles
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_play_card(self, enemy_cls):
+        battles = self._collect_states(enemy_cls, 60, seed=1)
+        engine = VectorBattleEngine.from_battles(battles)
+        actions = [0 if battle.player.hand else -1 for battle in battles]
+
+        engine.play_cards(np.array(actions))
+        for i, battle in enumerate(battles):
+            if actions[i] >= 0:
+                battle.play_card(actions[i])
+            assert_same_state(engine, i, battle)
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_enemy_turn(self, no_shuffle, enemy_cls):
+        battles = self._collect_states(enemy_cls, 60, seed=2)
+        engine = VectorBattleEngine.from_battles(battles, shuffle=False)
+
+        engine.end_player_turn()
+        engine.execute_enemy_action()
+        for i, battle in enumerate(battles):
+            battle.end_player_turn()
+            battle.execute_enemy_action()
+            assert_same_state(engine, i, battle)
+
+
+class TestStatistics:
+    """开启洗牌时的统计结果与标量模拟一致"""
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_average_turns(self, enemy_cls):
+        random.seed(3)
+        scalar_turns = [run_battle(enemy_cls, GreedyPolicy())["turns"] for _ in range(400)]
+
+        engine = VectorBattleEngine(4000, enemy_cls, seed=3)
+        engine.run()
+
+        assert engine.to_stats().average_turns == pytest.approx(np.mean(scalar_turns), abs=0.25)
+
+    @pytest.mark.parametrize("enemy_cls", ENEMY_CLASSES)
+    def test_turn_histogram_with_max_turns(self, enemy_cls):
+        # 超过回合上限的战斗不再推进，回合数分布与标量模拟一样止于max_turns+1
+        random.seed(4)
+        scalar = BatchStats()
+        for _ in range(200):
+            scalar.add(run_battle(enemy_cls, GreedyPolicy(), max_turns=3))
+
+        engine = VectorBattleEngine(2000, enemy_cls, seed=4)
+        engine.run(3)
+        stats = engine.to_stats()
+
+        assert set(stats.turn_counts) == set(scalar.turn_counts)
+        assert max(stats.turn_counts) == 4
+        assert stats.timeouts == stats.turn_counts[4]